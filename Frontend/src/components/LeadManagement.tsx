@@ -7,10 +7,16 @@ import {
     XCircle,
     Calculator,
     Zap,
-    BookOpen
+    BookOpen,
+    ChevronLeft,
+    ChevronRight
 } from 'lucide-react';
 import { apiService, type Lead, type LeadInput, type MatchResults } from '../services/api';
 
+const PAGE_SIZE = 100;
+// Only the columns this screen renders
+const LEAD_FIELDS = ['company_name', 'industry', 'segment', 'quote_value', 'item_count', 'conversion_days', 'lead_score'];
+
 export default function LeadManagement() {
     const [leads, setLeads] = useState<Lead[]>([]);
     const [filteredLeads, setFilteredLeads] = useState<Lead[]>([]);
@@ -18,6 +24,10 @@ export default function LeadManagement() {
     const [searchTerm, setSearchTerm] = useState('');
     const [filterScore, setFilterScore] = useState<'all' | 'high' | 'medium' | 'low'>('all');
 
+    // Keyset paging: the token that starts each visited page, and the token for the next one
+    const [pageTokens, setPageTokens] = useState<(string | null)[]>([null]);
+    const [nextAfter, setNextAfter] = useState<string | null>(null);
+
     // Calculator Modal State
     const [showScoreModal, setShowScoreModal] = useState(false);
     const [scoringLead, setScoringLead] = useState<LeadInput>({
@@ -33,23 +43,30 @@ export default function LeadManagement() {
     const [matchingLeadName, setMatchingLeadName] = useState('');
 
     useEffect(() => {
-        loadLeads();
+        loadLeads(null);
     }, []);
 
     useEffect(() => {
         filterLeads();
     }, [searchTerm, filterScore, leads]);
 
-    const loadLeads = async () => {
+    const loadLeads = async (after: string | null) => {
         try {
-            const data = await apiService.getLeads();
-            if (Array.isArray(data)) {
-                setLeads(data);
-                setFilteredLeads(data);
+            const page = await apiService.getLeadsPage({
+                limit: PAGE_SIZE,
+                after,
+                order: 'lead_score',
+                fields: LEAD_FIELDS,
+            });
+            if (Array.isArray(page.leads)) {
+                setLeads(page.leads);
+                setFilteredLeads(page.leads);
+                setNextAfter(page.next_after);
             } else {
-                console.error("API returned non-array data:", data);
+                console.error("API returned non-array data:", page);
                 setLeads([]);
                 setFilteredLeads([]);
+                setNextAfter(null);
             }
         } catch (error) {
             console.error('Error loading leads:', error);
@@ -58,6 +75,19 @@ export default function LeadManagement() {
         }
     };
 
+    const goToNextPage = async () => {
+        if (!nextAfter) return;
+        setPageTokens([...pageTokens, nextAfter]);
+        await loadLeads(nextAfter);
+    };
+
+    const goToPreviousPage = async () => {
+        if (pageTokens.length <= 1) return;
+        const tokens = pageTokens.slice(0, -1);
+        setPageTokens(tokens);
+        await loadLeads(tokens[tokens.length - 1]);
+    };
+
 
 
     const filterLeads = () => {
@@ -165,8 +195,24 @@ export default function LeadManagement() {
                     </div>
                 </div>
 
-                <div className="mt-4 text-sm text-gray-600">
-                    Showing {filteredLeads.length} of {leads.length} leads
+                <div className="mt-4 flex items-center justify-between text-sm text-gray-600">
+                    <span>Showing {filteredLeads.length} of {leads.length} leads on page {pageTokens.length}</span>
+                    <div className="flex gap-2">
+                        <button
+                            onClick={goToPreviousPage}
+                            disabled={pageTokens.length <= 1}
+                            className="btn flex items-center gap-1 disabled:opacity-50"
+                        >
+                            <ChevronLeft className="w-4 h-4" /> Previous
+                        </button>
+                        <button
+                            onClick={goToNextPage}
+                            disabled={!nextAfter}
+                            className="btn flex items-center gap-1 disabled:opacity-50"
+                        >
+                            Next <ChevronRight className="w-4 h-4" />
+                        </button>
+                    </div>
                 </div>
             </div>
 
@@ -23,6 +23,19 @@ export interface Lead {
     maturity_level?: string;
 }
 
+// One keyset-paginated page of leads; pass next_after back as `after`
+export interface LeadPage {
+    leads: Lead[];
+    next_after: string | null;
+}
+
+export interface LeadPageParams {
+    limit?: number;
+    after?: string | null;
+    order?: '_id' | 'lead_score';
+    fields?: string[];
+}
+
 export interface UseCase {
     id: string;
     title: string;
@@ -91,6 +104,19 @@ export const apiService = {
         return response.data;
     },
 
+    // Get one page of leads (constant latency at any depth)
+    async getLeadsPage({ limit = 100, after, order = '_id', fields }: LeadPageParams = {}): Promise<LeadPage> {
+        const response = await api.get('/leads', {
+            params: {
+                limit,
+                order,
+                after: after || undefined,
+                fields: fields?.join(','),
+            },
+        });
+        return response.data;
+    },
+
     // Get all use cases
     async getUseCases(): Promise<UseCase[]> {
         const response = await api.get('/use-cases');
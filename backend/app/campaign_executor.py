@@ -0,0 +1,250 @@
+"""
+Asynchronous campaign execution.
+
+Each campaign's recipients live in the delivery queue (one document per
+recipient: pending → sending → sent/failed, with an attempt count). A run
+claims CAMPAIGN_BATCH_SIZE deliveries at a time, sends them and
+checkpoints the outcomes in one bulk write, until the queue is drained.
+Deliveries a crashed run left in `sending` are requeued when the campaign
+resumes, so delivery is at-least-once.
+
+A campaign runs in one worker at a time: the one holding its
+`campaign:<id>` lease (see app.leases). Every worker checks for due
+campaigns, so campaigns spread across API workers or dedicated worker
+processes, and a campaign whose worker died is taken over once its
+lease expires. Batches are claimed atomically and stamped with the
+claiming worker.
+
+Due campaigns run concurrently, at most CAMPAIGN_CONCURRENCY at a time,
+and each is paced by its own token bucket at its throttle_rate (emails
+per minute). send_sales_email blocks on the LLM call and on SMTP, so
+sends run on a dedicated pool of CAMPAIGN_SEND_WORKERS threads; that is
+also the cap on sends in flight across all campaigns. The event loop
+only waits on timers and futures, so API requests keep being served
+while campaigns send.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.database import db
+from app.email_cache import email_cache
+from app.email_sender import send_sales_email
+from app.leases import WORKER_ID, Lease
+
+# Campaigns sending at the same time
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "4"))
+# Threads running blocking sends (LLM + SMTP), shared by all campaigns
+CAMPAIGN_SEND_WORKERS = int(os.getenv("CAMPAIGN_SEND_WORKERS", "8"))
+# Recipients looked up per query while sending a campaign
+CAMPAIGN_BATCH_SIZE = int(os.getenv("CAMPAIGN_BATCH_SIZE", "50"))
+# Lead fields the campaign email is built from
+CAMPAIGN_LEAD_PROJECTION = {"email": 1, "company_name": 1, "lead_score": 1, "quote_value": 1, "item_count": 1}
+DEFAULT_THROTTLE_RATE = 10  # emails per minute
+# Sends per recipient before a failed delivery is given up on
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "3"))
+# Seconds shutdown waits for stopped campaigns to checkpoint and release their leases
+CAMPAIGN_SHUTDOWN_TIMEOUT = float(os.getenv("CAMPAIGN_SHUTDOWN_TIMEOUT", "10"))
+
+
+class TokenBucket:
+    """
+    Async rate limiter: `rate_per_minute` tokens are added per minute, up to
+    `capacity`. The default capacity of 1 allows no bursts, so acquisitions
+    are spaced exactly 60 / rate_per_minute seconds apart.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = 1):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CampaignExecutor:
+    """Runs scheduled campaigns without blocking the event loop"""
+
+    def __init__(self, sender=send_sales_email, concurrency: int = CAMPAIGN_CONCURRENCY,
+                 send_workers: int = CAMPAIGN_SEND_WORKERS):
+        self.sender = sender
+        self.concurrency = concurrency
+        self.send_workers = send_workers
+        self._send_pool = None
+        self._loop = None
+        self._campaign_slots = None
+        self._send_slots = None
+        # campaign id -> task, for campaigns running in this process
+        self._running = {}
+
+    @property
+    def send_pool(self) -> ThreadPoolExecutor:
+        if self._send_pool is None:
+            self._send_pool = ThreadPoolExecutor(max_workers=self.send_workers, thread_name_prefix="campaign-send")
+        return self._send_pool
+
+    def _ensure_slots(self):
+        # Semaphores belong to the event loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._campaign_slots = asyncio.Semaphore(self.concurrency)
+            self._send_slots = asyncio.Semaphore(self.send_workers)
+
+    def submit(self, campaigns: list) -> list:
+        """
+        Start campaigns in the background and return their tasks.
+        Campaigns already running in this process are skipped.
+        """
+        self._ensure_slots()
+        tasks = []
+        for campaign in campaigns:
+            campaign_id = str(campaign["_id"])
+            if campaign_id in self._running:
+                continue
+            task = asyncio.create_task(self._run_in_slot(campaign))
+            self._running[campaign_id] = task
+            task.add_done_callback(lambda _, campaign_id=campaign_id: self._running.pop(campaign_id, None))
+            tasks.append(task)
+        return tasks
+
+    async def run(self, campaigns: list):
+        """Execute campaigns concurrently; returns once all of them have finished"""
+        await asyncio.gather(*self.submit(campaigns))
+
+    async def _run_in_slot(self, campaign: dict) -> int:
+        async with self._campaign_slots:
+            # Taken after the slot, so a worker never holds a campaign it isn't sending
+            lease = Lease(f"campaign:{campaign['_id']}")
+            if not await lease.acquire():
+                print(f"⏭️ Campaign {campaign['name']} is running on another worker")
+                return 0
+            return await lease.hold(self.run_campaign(campaign)) or 0
+
+    async def run_campaign(self, campaign: dict) -> int:
+        """
+        Drain a campaign's delivery queue at its throttle_rate.
+        Outcomes are checkpointed per batch, so an interrupted campaign
+        resumes where it stopped. Returns the number of emails sent.
+        """
+        campaign_id = str(campaign["_id"])
+        try:
+            print(f"🚀 Executing Campaign: {campaign['name']}")
+            counts = await db.get_delivery_counts(campaign_id)
+            if not counts and campaign.get("target_leads"):
+                # Campaigns created before the delivery queue list their recipients inline
+                await db.enqueue_deliveries(campaign_id, campaign["target_leads"])
+            # Deliveries a crashed or stopped run left mid-send go back to the queue;
+            # the campaign lease guarantees that run is no longer sending
+            requeued = await db.requeue_stalled_deliveries(campaign_id)
+            if requeued:
+                print(f"♻️ Resuming {campaign['name']}: {requeued} interrupted deliveries requeued")
+
+            emails_sent = counts.get("sent", 0)
+            await db.update_campaign_status(campaign_id, status="active", emails_sent=emails_sent)
+
+            throttle_rate = campaign.get("throttle_rate") or DEFAULT_THROTTLE_RATE
+            bucket = TokenBucket(throttle_rate)
+            subject = f"Exclusive {campaign['campaign_type']} Opportunity"
+
+            while True:
+                deliveries = await db.claim_deliveries(campaign_id, CAMPAIGN_BATCH_SIZE, DELIVERY_MAX_ATTEMPTS,
+                                                   owner=WORKER_ID)
+                if not deliveries:
+                    break
+                # One indexed $in lookup per batch instead of a lead scan per email
+                leads = await db.get_leads_by_emails([delivery["email"] for delivery in deliveries],
+                                                     CAMPAIGN_LEAD_PROJECTION)
+                results = []
+                sends = []
+                try:
+                    for delivery in deliveries:
+                        lead = leads.get(delivery["email"])
+                        if not lead:
+                            results.append((delivery["_id"], "failed", "Lead not found"))
+                            continue
+                        # Pace here; _send then waits for a free send slot, so a campaign
+                        # waiting on its rate never holds a slot other campaigns could use
+                        await bucket.acquire()
+                        sends.append(asyncio.create_task(self._send(delivery, lead, subject, campaign_id)))
+
+                    results.extend(await asyncio.gather(*sends))
+                except asyncio.CancelledError:
+                    # Checkpoint the sends that finished before the stop so resuming doesn't repeat them
+                    results.extend(task.result() for task in sends if task.done() and not task.cancelled())
+                    await asyncio.shield(db.checkpoint_deliveries(results))
+                    raise
+                await db.checkpoint_deliveries(results)
+                emails_sent += sum(1 for _, state, _ in results if state == "sent")
+                await db.update_campaign_status(campaign_id, status="active", emails_sent=emails_sent)
+
+            counts = await db.get_delivery_counts(campaign_id)
+            await db.update_campaign_status(campaign_id, status="completed", emails_sent=counts.get("sent", 0))
+            print(f"✅ Campaign Complete: {counts.get('sent', 0)} emails sent, {counts.get('failed', 0)} failed")
+            drafts = email_cache.campaign_stats(campaign_id)
+            if drafts["lookups"]:
+                print(f"   - Email cache: {drafts['hit_rate']:.0%} hit rate, {drafts['llm_calls_saved']} LLM calls "
+                      f"and {drafts['latency_saved_seconds']:.0f}s of generation saved")
+            return counts.get("sent", 0)
+
+        except Exception as e:
+            print(f"Campaign execution error: {e}")
+            return 0
+
+    async def _send(self, delivery: dict, lead: dict, subject: str, campaign_id: str) -> tuple:
+        """
+        Generate and send one email on the send pool, once a send slot is free.
+        Returns the (delivery_id, state, error) checkpoint for the delivery.
+        """
+        email = lead["email"]
+        try:
+            async with self._send_slots:
+                result = await asyncio.get_running_loop().run_in_executor(self.send_pool, partial(
+                    self.sender,
+                    customer_name=lead.get("company_name"),
+                    customer_email=email,
+                    lead_score=lead.get("lead_score", 0),
+                    quote_value=lead.get("quote_value", 0),
+                    item_count=lead.get("item_count", 0),
+                    subject=subject,
+                    campaign_id=campaign_id
+                ))
+            if result.get("success"):
+                return delivery["_id"], "sent", None
+            return delivery["_id"], "failed", result.get("message")
+        except Exception as e:
+            print(f"Error sending to {email}: {e}")
+            return delivery["_id"], "failed", str(e)
+
+    async def shutdown(self, timeout: float = CAMPAIGN_SHUTDOWN_TIMEOUT):
+        """
+        Stop running campaigns and wait for them to checkpoint their finished
+        sends and release their leases; call it before closing the store.
+        Sends still in flight are requeued on the next run.
+        """
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                print(f"⚠️ {len(pending)} campaigns did not stop within {timeout:.0f}s")
+        if self._send_pool is not None:
+            self._send_pool.shutdown(wait=False, cancel_futures=True)
+            self._send_pool = None
+
+# Global executor used by the scheduler
+campaign_executor = CampaignExecutor()
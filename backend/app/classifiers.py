@@ -0,0 +1,217 @@
+"""
+Compiled string classifiers used by segmentation.
+
+IndustryClassifier folds the industry keyword lists into one regular
+expression, so a company name is scanned once instead of once per
+keyword. Names that match no keyword get a deterministic fallback
+(a CRC32 of the name) so the same company always lands in the same
+industry, and results are memoized per company name.
+
+JobTitleNormalizer maps free-form CRM titles ('VP, Engineering & Ops')
+to a JobRole by matching canonical token sets, and interns resolved
+titles so repeated titles cost a single dict lookup.
+"""
+import os
+import re
+import zlib
+from functools import lru_cache
+
+from app.schemas import Industry, JobRole
+
+# Company names remembered by the industry memo
+INDUSTRY_CACHE_SIZE = int(os.getenv("INDUSTRY_CACHE_SIZE", "100000"))
+
+# Distinct job titles remembered by the title intern table
+JOB_TITLE_CACHE_SIZE = int(os.getenv("JOB_TITLE_CACHE_SIZE", "10000"))
+
+# Keyword lists in priority order: the first industry with any keyword in the name wins
+INDUSTRY_KEYWORDS = [
+    (Industry.TECHNOLOGY, ['tech', 'soft', 'data', 'cloud', 'ai', 'cyber', 'sys']),
+    (Industry.HEALTHCARE, ['health', 'med', 'pharma', 'care', 'bio']),
+    (Industry.FINANCE, ['bank', 'fin', 'capital', 'invest', 'insur']),
+    (Industry.RETAIL, ['shop', 'retail', 'store', 'market']),
+    (Industry.MANUFACTURING, ['mfg', 'ind', 'eng', 'construct', 'build']),
+    (Industry.EDUCATION, ['edu', 'school', 'univ', 'learn']),
+]
+
+# Industries assigned to names that match no keyword
+FALLBACK_INDUSTRIES = [Industry.TECHNOLOGY, Industry.MANUFACTURING, Industry.FINANCE, Industry.OTHER]
+
+# Multi-word phrases folded into a single token before tokenizing
+TITLE_PHRASES = {'vice president': 'vp'}
+
+# Exact title tokens and their canonical form
+TITLE_TOKEN_ALIASES = {
+    'svp': 'vp', 'evp': 'vp', 'avp': 'vp',
+    'ops': 'operations', 'mgr': 'manager', 'managers': 'manager',
+    'dir': 'director', 'directors': 'director', 'sale': 'sales',
+}
+
+# Token prefixes and their canonical form (engineer, engineering -> engineering)
+TITLE_TOKEN_PREFIXES = [
+    ('eng', 'engineering'), ('oper', 'operations'), ('tech', 'technology'),
+    ('info', 'information'), ('financ', 'finance'), ('exec', 'executive'),
+    ('purchas', 'purchasing'), ('procure', 'procurement'),
+]
+
+# Title rules in priority order: a role matches if its title holds every
+# token of any one of its token sets
+TITLE_RULES = [
+    (JobRole.CTO, [{'cto'}, {'chief', 'technology'}]),
+    (JobRole.CIO, [{'cio'}, {'chief', 'information'}]),
+    (JobRole.CFO, [{'cfo'}, {'chief', 'finance'}]),
+    (JobRole.CEO, [{'ceo'}, {'chief', 'executive'}]),
+    (JobRole.VP_ENGINEERING, [{'vp', 'engineering'}]),
+    (JobRole.VP_SALES, [{'vp', 'sales'}]),
+    (JobRole.VP_OPERATIONS, [{'vp', 'operations'}]),
+    (JobRole.DIRECTOR_IT, [{'director', 'it'}, {'director', 'information', 'technology'}]),
+    (JobRole.MANAGER, [{'manager'}]),
+    (JobRole.PROCUREMENT, [{'procurement'}, {'purchasing'}]),
+]
+
+TITLE_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def compile_keyword_pattern(groups: list) -> re.Pattern:
+    """
+    One regex with a capture group per keyword list, in priority order.
+    The alternation sits in a lookahead so matches may overlap: every start
+    position reports its highest-priority keyword, and `lastindex` tells
+    which list it came from. A leading first-character class lets the
+    engine skip positions where no keyword can start.
+    """
+    alternatives = "|".join(
+        "(" + "|".join(re.escape(k) for k in keywords) + ")"
+        for keywords in groups
+    )
+    first_chars = "".join(sorted({re.escape(k[0]) for keywords in groups for k in keywords}))
+    return re.compile(f"(?=[{first_chars}])(?=(?:{alternatives}))")
+
+
+class IndustryClassifier:
+    """Maps company names to an Industry with a single compiled scan."""
+
+    def __init__(self, keywords: list = INDUSTRY_KEYWORDS, fallback: list = FALLBACK_INDUSTRIES,
+                 cache_size: int = INDUSTRY_CACHE_SIZE):
+        self.industries = [industry for industry, _ in keywords]
+        self.fallback = list(fallback)
+        self._pattern = compile_keyword_pattern([words for _, words in keywords])
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, company_name: str) -> Industry:
+        name = company_name.lower()
+
+        best = None
+        for match in self._pattern.finditer(name):
+            group = match.lastindex
+            if best is None or group < best:
+                best = group
+                if best == 1:
+                    break
+        if best is not None:
+            return self.industries[best - 1]
+
+        return self.fallback[zlib.crc32(name.encode("utf-8")) % len(self.fallback)]
+
+    def clear(self):
+        self.classify.cache_clear()
+
+    def stats(self) -> dict:
+        info = self.classify.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class JobTitleNormalizer:
+    """
+    Maps raw job titles to a JobRole using token-set rules.
+    Resolved titles are kept in an intern table of up to `cache_size`
+    entries; once it is full, new titles are resolved but not stored.
+    """
+
+    def __init__(self, rules: list = TITLE_RULES, cache_size: int = JOB_TITLE_CACHE_SIZE):
+        self._rules = [(role, [frozenset(tokens) for tokens in token_sets]) for role, token_sets in rules]
+        self.max_size = cache_size
+        self._interned = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def tokenize(title: str) -> frozenset:
+        """Canonical token set of a title"""
+        title = title.lower()
+        for phrase, token in TITLE_PHRASES.items():
+            title = title.replace(phrase, token)
+
+        tokens = set()
+        for token in TITLE_TOKEN_PATTERN.findall(title):
+            token = TITLE_TOKEN_ALIASES.get(token, token)
+            for prefix, canonical in TITLE_TOKEN_PREFIXES:
+                if token.startswith(prefix):
+                    token = canonical
+                    break
+            tokens.add(token)
+        return frozenset(tokens)
+
+    def normalize(self, title: str) -> JobRole:
+        """Resolve a title without touching the intern table"""
+        tokens = self.tokenize(title)
+        for role, token_sets in self._rules:
+            if any(required <= tokens for required in token_sets):
+                return role
+        return JobRole.OTHER
+
+    def resolve(self, title) -> JobRole:
+        if not title or not isinstance(title, str):
+            return JobRole.OTHER
+
+        role = self._interned.get(title)
+        if role is not None:
+            self.hits += 1
+            return role
+
+        self.misses += 1
+        role = self.normalize(title)
+        if len(self._interned) < self.max_size:
+            self._interned[title] = role
+        return role
+
+    def resolve_many(self, titles) -> list:
+        """
+        Resolve a whole column of titles (any iterable, e.g. a list or
+        pandas Series). Each distinct title is normalized once.
+        """
+        interned = self._interned
+        roles = []
+        for title in titles:
+            role = interned.get(title) if isinstance(title, str) else None
+            if role is None:
+                role = self.resolve(title)
+            else:
+                self.hits += 1
+            roles.append(role)
+        return roles
+
+    def clear(self):
+        self._interned.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._interned),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global classifier instances
+industry_classifier = IndustryClassifier()
+job_title_normalizer = JobTitleNormalizer()
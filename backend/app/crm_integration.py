@@ -1,14 +1,7 @@
 import os
-import pandas as pd
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
-# Try importing simple_salesforce, handle if not installed
-try:
-    from simple_salesforce import Salesforce
-except ImportError:
-    Salesforce = None
-
 load_dotenv()
 
 class CRMConnector:
@@ -33,7 +26,10 @@ class SalesforceClient(CRMConnector):
 
     def connect(self):
         """Authenticates with Salesforce API"""
-        if not Salesforce:
+        # Imported here so the Salesforce stack only loads when CRM is used
+        try:
+            from simple_salesforce import Salesforce
+        except ImportError:
             print("❌ simple-salesforce library not installed. Run: pip install simple-salesforce")
             return False
             
@@ -1,26 +1,353 @@
 import os
+import asyncio
+import base64
+import uuid
 import motor.motor_asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId, json_util
 from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from app.mongo_metrics import mongo_metrics
+from app.read_cache import lead_cache
 
 load_dotenv()
 
+# Backend behind the global `db`: "mongo" (default) or "sqlite" (embedded, see app/sqlite_storage.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+
 # MongoDB Configuration
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "ai_sales_db")
 
-class Database:
+# Connection pool and wire settings
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+# Milliseconds a request may wait for a pooled connection before failing (unset = wait indefinitely)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+# Comma-separated wire compressors in order of preference (zlib, snappy, zstd); empty disables compression
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# Connections opened by Database.warm_up at startup
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(MONGO_MIN_POOL_SIZE)))
+
+# Operations sent per bulk_write call by the bulk lead writers
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", "1000"))
+
+# Default and maximum page sizes for Database.get_leads_page
+LEADS_PAGE_SIZE = int(os.getenv("LEADS_PAGE_SIZE", "100"))
+MAX_LEADS_PAGE_SIZE = int(os.getenv("MAX_LEADS_PAGE_SIZE", "1000"))
+
+# Keyset orders for lead pages; every order ends on _id so keys are unique
+LEAD_PAGE_ORDERS = {
+    "_id": [("_id", ASCENDING)],
+    "lead_score": [("lead_score", DESCENDING), ("_id", DESCENDING)],
+}
+
+# Documents fetched per round trip when streaming leads
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+# Indexes created (idempotently) at startup by Database.ensure_indexes
+INDEX_SPECS = {
+    "leads": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Serves segment filters and covers the segment analytics pipeline
+        IndexModel([("segment", ASCENDING), ("industry", ASCENDING), ("lead_score", ASCENDING),
+                    ("revenue_potential", ASCENDING)], name="segment_analytics"),
+        IndexModel([("lead_score", DESCENDING), ("_id", DESCENDING)], name="lead_score_id"),
+        IndexModel([("last_segmented_at", ASCENDING)], name="last_segmented_at"),
+    ],
+    "campaigns": [
+        IndexModel([("status", ASCENDING), ("send_time", ASCENDING)], name="status_send_time"),
+    ],
+    "deliveries": [
+        IndexModel([("campaign_id", ASCENDING), ("email", ASCENDING)], name="campaign_email_unique", unique=True),
+        # Serves claiming the next batch and the per-state counts
+        IndexModel([("campaign_id", ASCENDING), ("state", ASCENDING), ("attempts", ASCENDING)], name="campaign_state"),
+    ],
+    "leases": [
+        # Removes leases a day after they expire (finished campaigns, renamed jobs)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=86400),
+    ],
+}
+
+# Per-segment counts, revenue, average score and industry histogram in one pass.
+# The leading $sort lets the planner feed the groups from the segment_analytics
+# index without fetching documents.
+SEGMENT_ANALYTICS_PIPELINE = [
+    {"$sort": {"segment": 1, "industry": 1}},
+    {"$group": {
+        "_id": {
+            "segment": {"$ifNull": ["$segment", "GENERAL"]},
+            "industry": {"$ifNull": ["$industry", "OTHER"]}
+        },
+        "count": {"$sum": 1},
+        "revenue": {"$sum": {"$ifNull": ["$revenue_potential", 0]}},
+        "score": {"$sum": {"$ifNull": ["$lead_score", 0]}}
+    }},
+    {"$group": {
+        "_id": "$_id.segment",
+        "count": {"$sum": "$count"},
+        "total_revenue_potential": {"$sum": "$revenue"},
+        "total_lead_score": {"$sum": "$score"},
+        "top_industries": {"$push": {"k": "$_id.industry", "v": "$count"}}
+    }},
+    {"$project": {
+        "count": 1,
+        "total_revenue_potential": 1,
+        "avg_lead_score": {"$round": [{"$divide": ["$total_lead_score", "$count"]}, 2]},
+        "avg_revenue_potential": {"$round": [{"$divide": ["$total_revenue_potential", "$count"]}, 2]},
+        "top_industries": {"$arrayToObject": "$top_industries"}
+    }}
+]
+
+# Hot query shapes that must be served by one of the indexes above
+# (collection, filter, description); checked by check_indexes.py
+HOT_QUERIES = [
+    ("leads", {"email": "lead@example.com"}, "lead upsert by email"),
+    ("leads", {"segment": "General"}, "campaign targeting by segment"),
+    ("leads", {"email": {"$in": ["lead@example.com", "other@example.com"]}}, "campaign recipients by email"),
+    ("leads", {"lead_score": {"$gte": 70}}, "lead score tiers"),
+    ("leads", {"$or": [{"lead_score": {"$lt": 0.5}}, {"lead_score": 0.5, "_id": {"$lt": ObjectId("0" * 24)}}]}, "lead pages by score"),
+    ("leads", {"last_segmented_at": {"$lt": "2026-01-01T00:00:00"}}, "leads due for re-segmentation"),
+    ("campaigns", {"status": "scheduled"}, "scheduled campaigns"),
+    ("campaigns", {"status": "scheduled", "send_time": {"$lte": "2026-01-01T00:00:00"}}, "campaigns due to send"),
+    ("deliveries", {"campaign_id": "0" * 24, "state": "pending"}, "next deliveries to send"),
+    ("deliveries", {"campaign_id": "0" * 24, "state": "sending"}, "interrupted deliveries"),
+    ("deliveries", {"campaign_id": "0" * 24, "state": "sending", "claim_id": "0" * 32}, "claimed delivery batch"),
+]
+
+
+def client_options() -> dict:
+    """Motor client keyword arguments built from the MONGO_* settings"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "event_listeners": [mongo_metrics],
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+def _projection_key(projection: dict = None):
+    return tuple(sorted(projection.items())) if projection else None
+
+
+def _copy_documents(documents: list) -> list:
+    # Callers enrich and annotate returned documents in place; cached
+    # results are handed out as shallow copies so the cache stays intact
+    return [dict(document) for document in documents]
+
+
+def encode_page_token(lead: dict, order: str) -> str:
+    """Opaque cursor holding the order and the sort-key values of the last lead on a page"""
+    values = [order] + [lead.get(key) for key, _ in LEAD_PAGE_ORDERS[order]]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(token: str, order: str) -> list:
+    """Sort-key values from a page token; raises ValueError if it is malformed or for another order"""
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid page token")
+    if not isinstance(values, list) or len(values) != len(LEAD_PAGE_ORDERS[order]) + 1 or values[0] != order:
+        raise ValueError("Page token does not match the requested order")
+    return values[1:]
+
+
+def _keyset_filter(order: str, values: list) -> dict:
+    """Filter selecting the leads that sort after `values` in the given order"""
+    if order == "_id":
+        return {"_id": {"$gt": values[0]}}
+
+    score, last_id = values
+    if score is None:
+        # Leads without a score sort last in descending order
+        return {"lead_score": None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {"lead_score": {"$lt": score}},
+        {"lead_score": score, "_id": {"$lt": last_id}},
+        {"lead_score": None}
+    ]}
+
+
+class StorageBackend(ABC):
+    """
+    Operations every storage backend provides to the API and scheduler.
+    Documents go in and come out as dicts with an ObjectId `_id`; `db` is
+    None while the backend is unavailable. A backend missing one of the
+    abstract methods fails when it is instantiated.
+    """
+    db = None
+
+    @abstractmethod
+    def connect(self):
+        raise NotImplementedError
+
+    async def warm_up(self):
+        pass
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError
+
+    # Leads
+    @abstractmethod
+    async def get_all_leads(self, limit=1000, projection: dict = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_leads_page(self, limit: int = LEADS_PAGE_SIZE, after: str = None,
+                             order: str = "_id", projection: dict = None) -> tuple:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_leads(self, order: str = "_id", projection: dict = None, batch_size: int = STREAM_BATCH_SIZE):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_leads_by_segment(self, segment: str, projection: dict = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_leads_by_emails(self, emails: list, projection: dict = None) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_segment_analytics(self) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_lead(self, lead_data: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_lead_fields(self, lead_id, fields: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_leads_bulk(self, leads: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_leads_bulk(self, updates: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        raise NotImplementedError
+
+    # Use cases
+    @abstractmethod
+    async def get_use_cases(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def seed_use_cases(self, use_cases_list):
+        raise NotImplementedError
+
+    # Campaigns
+    @abstractmethod
+    async def save_campaign(self, campaign_data: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_campaigns(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_campaigns_by_status(self, status: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_campaign_status(self, campaign_id: str, status: str, emails_sent: int = 0):
+        raise NotImplementedError
+
+    # Campaign delivery queue: one document per recipient, state pending → sending → sent/failed
+    @abstractmethod
+    async def enqueue_deliveries(self, campaign_id: str, emails: list,
+                                 batch_size: int = BULK_WRITE_BATCH_SIZE) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim_deliveries(self, campaign_id: str, limit: int, max_attempts: int, owner: str = None) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def checkpoint_deliveries(self, results: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def requeue_stalled_deliveries(self, campaign_id: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_delivery_counts(self, campaign_id: str) -> dict:
+        raise NotImplementedError
+
+    # Leases coordinating scheduled work across processes (see app.leases)
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lease(self, name: str, owner: str, linger_seconds: float = 0):
+        raise NotImplementedError
+
+
+class Database(StorageBackend):
+    """MongoDB backend"""
     client: motor.motor_asyncio.AsyncIOMotorClient = None
     db = None
 
     def connect(self):
         """Connect to MongoDB."""
         try:
-            self.client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL)
+            self.client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL, **client_options())
             self.db = self.client[DB_NAME]
-            print(f"✅ Connected to MongoDB: {DB_NAME}")
+            print(f"✅ Connected to MongoDB: {DB_NAME} (pool {MONGO_MIN_POOL_SIZE}-{MONGO_MAX_POOL_SIZE}, "
+                  f"compression: {MONGO_COMPRESSORS or 'off'}, read preference: {MONGO_READ_PREFERENCE})")
         except Exception as e:
             print(f"❌ MongoDB Connection Error: {e}")
 
+    async def warm_up(self, connections: int = MONGO_WARMUP_CONNECTIONS):
+        """
+        Open pooled connections before traffic arrives by running
+        `connections` concurrent pings, so the first requests don't pay for
+        connection setup and authentication.
+        """
+        if self.db is None: return
+        try:
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(max(connections, 1))))
+            print(f"✅ MongoDB pool warmed ({max(connections, 1)} connections)")
+        except Exception as e:
+            print(f"⚠️ MongoDB warm-up failed: {e}")
+
+    async def ensure_indexes(self):
+        """
+        Create the indexes in INDEX_SPECS. Existing identical indexes are a
+        no-op; an index that cannot be built (e.g. duplicate emails block
+        the unique index) is reported and the others still get created.
+        """
+        if self.db is None: return
+        try:
+            for collection, indexes in INDEX_SPECS.items():
+                for index in indexes:
+                    try:
+                        await self.db[collection].create_indexes([index])
+                    except OperationFailure as e:
+                        print(f"⚠️ Could not create index {collection}.{index.document['name']}: {e}")
+            print("✅ MongoDB indexes ensured")
+        except Exception as e:
+            print(f"❌ MongoDB index provisioning failed: {e}")
+
     def close(self):
         """Close MongoDB connection."""
         if self.client:
@@ -29,19 +356,167 @@ class Database:
 
     # --- CRUD Operations ---
 
-    async def get_all_leads(self, limit=1000):
+    async def get_all_leads(self, limit=1000, projection: dict = None):
         if self.db is None: return []
-        cursor = self.db["leads"].find().limit(limit)
-        return await cursor.to_list(length=limit)
+
+        async def load():
+            cursor = self.db["leads"].find({}, projection).limit(limit)
+            return await cursor.to_list(length=limit)
+
+        if not lead_cache.enabled:
+            return await load()
+        leads = await lead_cache.get_or_load(("all_leads", limit, _projection_key(projection)), load)
+        return _copy_documents(leads)
+
+    async def get_leads_page(self, limit: int = LEADS_PAGE_SIZE, after: str = None,
+                             order: str = "_id", projection: dict = None) -> tuple:
+        """
+        One keyset-paginated page of leads.
+        `after` is the token returned with the previous page; each page is an
+        index range scan, so latency stays flat however deep the page is.
+        Returns (leads, next_after); next_after is None on the last page.
+        Raises ValueError for an unknown order or a bad token.
+        """
+        if order not in LEAD_PAGE_ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {', '.join(LEAD_PAGE_ORDERS)}")
+        query = _keyset_filter(order, decode_page_token(after, order)) if after else {}
+        if self.db is None: return [], None
+
+        sort = LEAD_PAGE_ORDERS[order]
+        if projection is not None:
+            # Sort keys are needed to build the next token
+            projection = {**projection, **{key: 1 for key, _ in sort}}
+
+        async def load():
+            cursor = self.db["leads"].find(query, projection).sort(sort).limit(limit)
+            leads = await cursor.to_list(length=limit)
+            next_after = encode_page_token(leads[-1], order) if len(leads) == limit else None
+            return leads, next_after
+
+        if not lead_cache.enabled:
+            return await load()
+        leads, next_after = await lead_cache.get_or_load(
+            ("leads_page", limit, after, order, _projection_key(projection)), load
+        )
+        return _copy_documents(leads), next_after
+
+    def iter_leads(self, order: str = "_id", projection: dict = None, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Async cursor over every lead in a stable order. Only one batch of
+        `batch_size` documents is held in memory at a time.
+        Raises ValueError for an unknown order.
+        """
+        if order not in LEAD_PAGE_ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {', '.join(LEAD_PAGE_ORDERS)}")
+        return self.db["leads"].find({}, projection).sort(LEAD_PAGE_ORDERS[order]).batch_size(batch_size)
+
+    async def get_leads_by_segment(self, segment: str, projection: dict = None):
+        if self.db is None: return []
+
+        async def load():
+            cursor = self.db["leads"].find({"segment": segment}, projection)
+            return await cursor.to_list(length=None)
+
+        if not lead_cache.enabled:
+            return await load()
+        leads = await lead_cache.get_or_load(("leads_by_segment", segment, _projection_key(projection)), load)
+        return _copy_documents(leads)
+
+    async def get_leads_by_emails(self, emails: list, projection: dict = None) -> dict:
+        """
+        {email: lead} for the given emails in one indexed $in query.
+        Emails without a stored lead are absent from the result.
+        """
+        if self.db is None or not emails: return {}
+        if projection is not None:
+            projection = {**projection, "email": 1}
+        cursor = self.db["leads"].find({"email": {"$in": list(emails)}}, projection)
+        return {lead["email"]: lead async for lead in cursor}
+
+    async def get_segment_analytics(self) -> list:
+        """Per-segment stats computed by SEGMENT_ANALYTICS_PIPELINE; one document per segment"""
+        if self.db is None: return []
+
+        async def load():
+            cursor = self.db["leads"].aggregate(SEGMENT_ANALYTICS_PIPELINE)
+            return await cursor.to_list(length=None)
+
+        if not lead_cache.enabled:
+            return await load()
+        return _copy_documents(await lead_cache.get_or_load(("segment_analytics",), load))
 
     async def save_lead(self, lead_data: dict):
         if self.db is None: return
         # Update if exists, insert if new (Upsert)
-        await self.db["leads"].update_one(
-            {"email": lead_data["email"]},
-            {"$set": lead_data},
-            upsert=True
-        )
+        try:
+            await self.db["leads"].update_one(
+                {"email": lead_data["email"]},
+                {"$set": lead_data},
+                upsert=True
+            )
+        finally:
+            lead_cache.invalidate()
+
+    async def update_lead_fields(self, lead_id, fields: dict):
+        """$set only the given fields on an existing lead"""
+        if self.db is None or not fields: return
+        try:
+            await self.db["leads"].update_one({"_id": lead_id}, {"$set": fields})
+        finally:
+            lead_cache.invalidate()
+
+    async def save_leads_bulk(self, leads: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        """
+        Upsert leads by email in unordered bulk_write batches.
+        Returns {"written": n, "errors": [...]}; each error carries the lead's
+        index in `leads`, and a failing lead does not stop the rest of the batch.
+        """
+        operations = []
+        errors = []
+        for index, lead in enumerate(leads):
+            if not lead.get("email"):
+                errors.append({"index": index, "email": None, "error": "Lead has no email"})
+                continue
+            operations.append((index, UpdateOne({"email": lead["email"]}, {"$set": lead}, upsert=True)))
+        return await self._bulk_write_leads(operations, leads, errors, batch_size)
+
+    async def update_leads_bulk(self, updates: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        """
+        Bulk counterpart of update_lead_fields.
+        `updates` holds (lead, fields) pairs; `fields` are $set on the lead's _id.
+        """
+        operations = [
+            (index, UpdateOne({"_id": lead["_id"]}, {"$set": fields}))
+            for index, (lead, fields) in enumerate(updates) if fields
+        ]
+        return await self._bulk_write_leads(operations, [lead for lead, _ in updates], [], batch_size)
+
+    async def _bulk_write_leads(self, operations: list, leads: list, errors: list, batch_size: int) -> dict:
+        if self.db is None:
+            return {"written": 0, "errors": errors}
+
+        written = 0
+        for start in range(0, len(operations), batch_size):
+            batch = operations[start:start + batch_size]
+            try:
+                await self.db["leads"].bulk_write([op for _, op in batch], ordered=False)
+                written += len(batch)
+            except BulkWriteError as e:
+                # Unordered: every operation without a write error was applied
+                write_errors = e.details.get("writeErrors", [])
+                written += len(batch) - len(write_errors)
+                for write_error in write_errors:
+                    index = batch[write_error["index"]][0]
+                    errors.append({"index": index, "email": leads[index].get("email"), "error": write_error.get("errmsg")})
+            except Exception as e:
+                for index, _ in batch:
+                    errors.append({"index": index, "email": leads[index].get("email"), "error": str(e)})
+
+        if operations:
+            lead_cache.invalidate()
+        if errors:
+            print(f"⚠️ Bulk lead write: {len(errors)} of {len(leads)} leads failed")
+        return {"written": written, "errors": errors}
 
     async def get_use_cases(self):
         if self.db is None: return []
@@ -69,13 +544,136 @@ class Database:
         cursor = self.db["campaigns"].find()
         return await cursor.to_list(length=100)
 
+    async def get_campaigns_by_status(self, status: str):
+        if self.db is None: return []
+        cursor = self.db["campaigns"].find({"status": status})
+        return await cursor.to_list(length=None)
+
     async def update_campaign_status(self, campaign_id: str, status: str, emails_sent: int = 0):
         """Update campaign progress"""
         if self.db is None: return
-        from bson import ObjectId
         await self.db["campaigns"].update_one(
             {"_id": ObjectId(campaign_id)},
             {"$set": {"status": status, "emails_sent": emails_sent}}
         )
 
-db = Database()
+    # --- Campaign delivery queue ---
+
+    async def enqueue_deliveries(self, campaign_id: str, emails: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> int:
+        """
+        Queue one pending delivery per email. Emails already queued for the
+        campaign keep their state, so re-enqueueing is safe.
+        Returns the number of deliveries newly queued.
+        """
+        if self.db is None: return 0
+        emails = list(dict.fromkeys(email for email in emails if email))
+        now = datetime.now().isoformat()
+        queued = 0
+        for start in range(0, len(emails), batch_size):
+            operations = [
+                UpdateOne(
+                    {"campaign_id": campaign_id, "email": email},
+                    {"$setOnInsert": {"state": "pending", "attempts": 0, "last_error": None, "updated_at": now}},
+                    upsert=True
+                )
+                for email in emails[start:start + batch_size]
+            ]
+            result = await self.db["deliveries"].bulk_write(operations, ordered=False)
+            queued += result.upserted_count
+        return queued
+
+    async def claim_deliveries(self, campaign_id: str, limit: int, max_attempts: int, owner: str = None) -> list:
+        """
+        Mark up to `limit` pending deliveries, or failed ones with attempts
+        left, as sending and return them ({_id, email, attempts}).
+        The update re-checks each delivery's state and stamps a claim id, so
+        concurrent claimers never get the same delivery.
+        """
+        if self.db is None: return []
+        query = {"campaign_id": campaign_id, "$or": [
+            {"state": "pending"},
+            {"state": "failed", "attempts": {"$lt": max_attempts}}
+        ]}
+        candidates = await self.db["deliveries"].find(query, {"_id": 1}).limit(limit).to_list(length=limit)
+        if not candidates:
+            return []
+        claim_id = uuid.uuid4().hex
+        await self.db["deliveries"].update_many(
+            {**query, "_id": {"$in": [delivery["_id"] for delivery in candidates]}},
+            {"$set": {"state": "sending", "claimed_by": owner, "claim_id": claim_id,
+                      "updated_at": datetime.now().isoformat()},
+             "$inc": {"attempts": 1}}
+        )
+        return await self.db["deliveries"].find(
+            {"campaign_id": campaign_id, "state": "sending", "claim_id": claim_id},
+            {"email": 1, "attempts": 1}
+        ).to_list(length=limit)
+
+    async def checkpoint_deliveries(self, results: list):
+        """Record send outcomes in one bulk write; `results` holds (delivery_id, state, error) triples"""
+        if self.db is None or not results: return
+        now = datetime.now().isoformat()
+        await self.db["deliveries"].bulk_write([
+            UpdateOne({"_id": delivery_id}, {"$set": {"state": state, "last_error": error, "updated_at": now}})
+            for delivery_id, state, error in results
+        ], ordered=False)
+
+    async def requeue_stalled_deliveries(self, campaign_id: str) -> int:
+        """Put deliveries left in `sending` by an interrupted run back to pending"""
+        if self.db is None: return 0
+        result = await self.db["deliveries"].update_many(
+            {"campaign_id": campaign_id, "state": "sending"},
+            {"$set": {"state": "pending", "updated_at": datetime.now().isoformat()}}
+        )
+        return result.modified_count
+
+    async def get_delivery_counts(self, campaign_id: str) -> dict:
+        """{state: count} for a campaign's deliveries"""
+        if self.db is None: return {}
+        cursor = self.db["deliveries"].aggregate([
+            {"$match": {"campaign_id": campaign_id}},
+            {"$group": {"_id": "$state", "count": {"$sum": 1}}}
+        ])
+        return {group["_id"]: group["count"] async for group in cursor}
+
+    # --- Leases ---
+
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Take or renew lease `name` for `owner` until ttl_seconds from now.
+        Succeeds if the lease is new, expired or already held by `owner`.
+        """
+        # Without a store there is nothing to coordinate with
+        if self.db is None: return True
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await self.db["leases"].find_one_and_update(
+                {"_id": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The filter missed an existing lease, so the upsert collided with it: held by another worker
+            return False
+        return lease is not None and lease["owner"] == owner
+
+    async def release_lease(self, name: str, owner: str, linger_seconds: float = 0):
+        """Let lease `name` expire `linger_seconds` from now, if `owner` still holds it"""
+        if self.db is None: return
+        await self.db["leases"].update_one(
+            {"_id": name, "owner": owner},
+            {"$set": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=linger_seconds)}}
+        )
+
+def create_database() -> StorageBackend:
+    """The backend selected by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "sqlite":
+        from app.sqlite_storage import SQLiteDatabase
+        return SQLiteDatabase()
+    if STORAGE_BACKEND != "mongo":
+        print(f"⚠️ Unknown STORAGE_BACKEND '{STORAGE_BACKEND}', using MongoDB")
+    return Database()
+
+
+db = create_database()
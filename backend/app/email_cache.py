@@ -0,0 +1,269 @@
+"""
+Persistent cache for LLM-generated sales emails.
+
+Each draft costs an LLM round trip of up to 30 seconds, and leads with
+the same profile get the same email. Prompt inputs are first normalized:
+- customer name: trimmed, case-folded, inner whitespace collapsed
+- lead score: tier (Low / Medium / High on the stored 0-1 score, the tiers
+  the prompt's tone follows)
+- quote value and item count: bands
+together with the use case ID and EMAIL_PROMPT_VERSION. The prompt is
+built from these normalized inputs, so a cached draft is exactly what
+the LLM would have been asked for any lead with the same key.
+
+Personalization knob: fields listed in EMAIL_PERSONALIZED_FIELDS
+(lead_score, quote_value, item_count) bypass normalization. They reach
+the LLM and the key verbatim, so drafts for them are only reused for an
+exact repeat. Set EMAIL_CACHE_ENABLED=false to bypass the cache entirely.
+
+Entries live in a SQLite file (EMAIL_CACHE_PATH, by default in the
+backend directory), so they survive restarts and are shared by workers
+on one host. The least recently used entries are evicted beyond
+EMAIL_CACHE_SIZE, and entries expire after EMAIL_CACHE_TTL seconds. Stats are kept per campaign: hit rate, LLM
+calls saved and the generation time they would have cost.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EMAIL_CACHE_ENABLED = os.getenv("EMAIL_CACHE_ENABLED", "true").lower() == "true"
+# Defaults to the backend directory, whatever the working directory, so every worker shares one file
+EMAIL_CACHE_PATH = os.getenv("EMAIL_CACHE_PATH", os.path.join(BASE_DIR, "..", "email_cache.sqlite3"))
+EMAIL_CACHE_SIZE = int(os.getenv("EMAIL_CACHE_SIZE", "10000"))
+EMAIL_CACHE_TTL = float(os.getenv("EMAIL_CACHE_TTL", str(7 * 24 * 3600)))
+# Bump when the prompt template changes so drafts from the old prompt are not reused
+EMAIL_PROMPT_VERSION = os.getenv("EMAIL_PROMPT_VERSION", "1")
+EMAIL_PERSONALIZED_FIELDS = {
+    field.strip() for field in os.getenv("EMAIL_PERSONALIZED_FIELDS", "").split(",") if field.strip()
+}
+
+# Lead score tiers on the stored 0-1 scale, bucketed as on the dashboard:
+# High above 0.7, Medium from 0.4, Low below
+HIGH_SCORE = 0.7
+MEDIUM_SCORE = 0.4
+VALUE_BANDS = [1_000, 10_000, 50_000, 150_000]
+ITEM_BANDS = [10, 50, 200]
+
+# Stats bucket for drafts generated outside a campaign
+NO_CAMPAIGN = "adhoc"
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS emails (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    generation_seconds REAL NOT NULL
+)"""
+
+
+def score_tier(lead_score: float) -> str:
+    score = lead_score or 0
+    if score > HIGH_SCORE:
+        return "High"
+    if score >= MEDIUM_SCORE:
+        return "Medium"
+    return "Low"
+
+
+def band(value: float, bounds: list, unit: str = "") -> str:
+    """Label of the band `value` falls into, e.g. '10,000-50,000'"""
+    value = value or 0
+    if value < bounds[0]:
+        return f"under {unit}{bounds[0]:,}"
+    for lower, upper in zip(bounds, bounds[1:]):
+        if value < upper:
+            return f"{unit}{lower:,}-{unit}{upper:,}"
+    return f"{unit}{bounds[-1]:,}+"
+
+
+def normalize_name(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+class EmailCache:
+    """Disk-backed LRU/TTL cache of generated emails with per-campaign stats"""
+
+    def __init__(self, path: str = EMAIL_CACHE_PATH, enabled: bool = EMAIL_CACHE_ENABLED,
+                 maxsize: int = EMAIL_CACHE_SIZE, ttl: float = EMAIL_CACHE_TTL,
+                 personalized_fields: set = EMAIL_PERSONALIZED_FIELDS, prompt_version: str = EMAIL_PROMPT_VERSION):
+        self.path = path
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.personalized_fields = set(personalized_fields)
+        self.prompt_version = prompt_version
+        self._db = None
+        self._lock = threading.Lock()
+        # campaign id -> counters
+        self._stats = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the app doesn't touch the disk
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._db.execute("CREATE INDEX IF NOT EXISTS emails_last_used ON emails (last_used)")
+            self._db.commit()
+        return self._db
+
+    def prompt_inputs(self, customer_name: str, lead_score: float, quote_value: float,
+                      item_count: int, use_case_id: str = None) -> dict:
+        """Normalized prompt inputs; personalized fields are kept verbatim"""
+        return {
+            "customer_name": " ".join((customer_name or "").split()),
+            "lead_score": lead_score if "lead_score" in self.personalized_fields else f"{score_tier(lead_score)} tier",
+            "quote_value": quote_value if "quote_value" in self.personalized_fields else band(quote_value, VALUE_BANDS, "$"),
+            "item_count": item_count if "item_count" in self.personalized_fields else f"{band(item_count, ITEM_BANDS)} items",
+            "use_case_id": use_case_id,
+        }
+
+    def key(self, inputs: dict) -> str:
+        parts = [
+            self.prompt_version,
+            normalize_name(inputs["customer_name"]),
+            str(inputs["lead_score"]),
+            str(inputs["quote_value"]),
+            str(inputs["item_count"]),
+            str(inputs["use_case_id"] or ""),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def _new_counters() -> dict:
+        return {"hits": 0, "misses": 0, "expired": 0, "llm_seconds": 0.0, "latency_saved_seconds": 0.0}
+
+    def _counters(self, campaign_id) -> dict:
+        return self._stats.setdefault(str(campaign_id or NO_CAMPAIGN), self._new_counters())
+
+    def _lookup(self, key: str) -> tuple:
+        """
+        (entry, expired): entry is (body, generation_seconds) for a live
+        entry, whose LRU position is refreshed, and None otherwise.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            row = db.execute("SELECT body, created_at, generation_seconds FROM emails WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, False
+            body, created_at, generation_seconds = row
+            with db:
+                if now - created_at > self.ttl:
+                    db.execute("DELETE FROM emails WHERE key = ?", (key,))
+                    return None, True
+                db.execute("UPDATE emails SET last_used = ? WHERE key = ?", (now, key))
+            return (body, generation_seconds), False
+
+    def _store(self, key: str, body: str, generation_seconds: float):
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO emails (key, body, created_at, last_used, generation_seconds) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, body, now, now, generation_seconds)
+                )
+                overflow = db.execute("SELECT COUNT(*) FROM emails").fetchone()[0] - self.maxsize
+                if overflow > 0:
+                    db.execute(
+                        "DELETE FROM emails WHERE key IN (SELECT key FROM emails ORDER BY last_used LIMIT ?)",
+                        (overflow,)
+                    )
+
+    def get_or_generate(self, inputs: dict, generate, campaign_id: str = None) -> str:
+        """
+        Return the cached email for the normalized `inputs`, or call
+        generate() -> (body, cacheable) on a miss and store the body if cacheable.
+        """
+        if not self.enabled:
+            return generate()[0]
+
+        key = self.key(inputs)
+        started = time.perf_counter()
+        try:
+            cached, expired = self._lookup(key)
+        except sqlite3.Error as e:
+            # The cache must never stop an email from going out
+            print(f"⚠️ Email cache lookup failed: {e}")
+            cached, expired = None, False
+        lookup_seconds = time.perf_counter() - started
+
+        if cached:
+            body, generation_seconds = cached
+            with self._lock:
+                counters = self._counters(campaign_id)
+                counters["hits"] += 1
+                counters["latency_saved_seconds"] += max(0.0, generation_seconds - lookup_seconds)
+            return body
+
+        started = time.perf_counter()
+        body, cacheable = generate()
+        generation_seconds = time.perf_counter() - started
+        with self._lock:
+            counters = self._counters(campaign_id)
+            counters["misses"] += 1
+            counters["expired"] += expired
+            counters["llm_seconds"] += generation_seconds
+        if cacheable:
+            try:
+                self._store(key, body, generation_seconds)
+            except sqlite3.Error as e:
+                print(f"⚠️ Email cache store failed: {e}")
+        return body
+
+    def clear(self):
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute("DELETE FROM emails")
+            self._stats.clear()
+
+    @staticmethod
+    def _report(counters: dict) -> dict:
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "lookups": lookups,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "expired": counters["expired"],
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "llm_calls_saved": counters["hits"],
+            "llm_seconds": round(counters["llm_seconds"], 3),
+            "latency_saved_seconds": round(counters["latency_saved_seconds"], 3)
+        }
+
+    def campaign_stats(self, campaign_id: str = None) -> dict:
+        """Report for one campaign's drafts; campaign_id None covers drafts outside campaigns"""
+        with self._lock:
+            return self._report(self._stats.get(str(campaign_id or NO_CAMPAIGN)) or self._new_counters())
+
+    def stats(self) -> dict:
+        with self._lock:
+            campaigns = {campaign_id: self._report(counters) for campaign_id, counters in self._stats.items()}
+            totals = self._new_counters()
+            for counters in self._stats.values():
+                for field in totals:
+                    totals[field] += counters[field]
+            size = None
+            if self._db is not None:
+                size = self._db.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "prompt_version": self.prompt_version,
+            "personalized_fields": sorted(self.personalized_fields),
+            **self._report(totals),
+            "campaigns": campaigns
+        }
+
+
+# Global cache instance
+email_cache = EmailCache()
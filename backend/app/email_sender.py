@@ -4,6 +4,7 @@ from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
 from app.utils import generate_email_llama2
+from app.smtp_pool import SMTPConnectionPool
 
 load_dotenv()
 
@@ -12,6 +13,9 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
 EMAIL_USER = os.getenv("EMAIL_USER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
+# Authenticated sessions reused across sends
+smtp_pool = SMTPConnectionPool(EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD)
+
 
 def send_sales_email(
     customer_name: str,
@@ -19,10 +23,12 @@ def send_sales_email(
     lead_score: float,
     quote_value: float,
     item_count: int,
-    subject: str
+    subject: str,
+    campaign_id: str = None
 ):
     """
-    Generate AI-powered email content and send it via SMTP
+    Generate AI-powered email content and send it via SMTP.
+    campaign_id attributes the draft to a campaign in the email cache stats.
     """
     
     # Validate SMTP credentials
@@ -38,7 +44,8 @@ def send_sales_email(
         customer_name=customer_name,
         lead_score=lead_score,
         quote_value=quote_value,
-        item_count=item_count
+        item_count=item_count,
+        campaign_id=campaign_id
     )
     
     # Create email message
@@ -51,13 +58,8 @@ def send_sales_email(
     message.attach(MIMEText(email_body, "plain"))
     
     try:
-        # Create SMTP session
-        with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
-            server.starttls()  # Enable security
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            
-            # Send email
-            server.send_message(message)
+        # Send on a pooled, already authenticated SMTP session
+        smtp_pool.send(message)
             
         return {
             "success": True,
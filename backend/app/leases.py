@@ -0,0 +1,95 @@
+"""
+Storage-backed leases that coordinate scheduled work across processes.
+
+Every API worker starts the scheduler, so with `uvicorn --workers N` each
+cron trigger fires N times. A job or campaign runs only in the worker
+that holds its lease: a named record with an owner and an expiry,
+taken atomically (findOneAndUpdate on MongoDB, a conditional upsert on
+SQLite) when it is free or expired. The holder renews it every third of
+LEASE_TTL_SECONDS. If renewal fails for a whole TTL, the work is
+cancelled because another worker may already have taken over.
+A crashed holder's lease expires after at most one TTL.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+from app.database import db
+
+# Identifies this process as a lease owner
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "60"))
+# Seconds a finished job keeps its lease, so workers whose trigger fires a
+# little later (clock skew, slow startup) don't run the same job again
+JOB_LEASE_LINGER_SECONDS = float(os.getenv("JOB_LEASE_LINGER_SECONDS", "120"))
+
+
+class Lease:
+    """A named lease held by this worker"""
+
+    def __init__(self, name: str, ttl: float = LEASE_TTL_SECONDS, owner: str = WORKER_ID):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner
+        self.lost = False
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours"""
+        return await db.acquire_lease(self.name, self.owner, self.ttl)
+
+    async def release(self, linger: float = 0):
+        """Give the lease up, `linger` seconds from now"""
+        try:
+            await db.release_lease(self.name, self.owner, linger)
+        except Exception as e:
+            # It expires on its own after one TTL
+            print(f"⚠️ Could not release lease {self.name}: {e}")
+
+    async def _keep_alive(self, task: asyncio.Task):
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if await self.acquire():
+                    renewed_at = time.monotonic()
+                    continue
+            except Exception as e:
+                print(f"⚠️ Could not renew lease {self.name}: {e}")
+                if time.monotonic() - renewed_at < self.ttl:
+                    continue
+            self.lost = True
+            print(f"❌ Lost lease {self.name}; stopping its work")
+            task.cancel()
+            return
+
+    async def hold(self, coro, linger: float = 0):
+        """
+        Run coro while renewing the lease, then release it.
+        Returns coro's result, or None if the lease was lost and coro cancelled.
+        """
+        task = asyncio.ensure_future(coro)
+        keep_alive = asyncio.create_task(self._keep_alive(task))
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.lost:
+                return None
+            raise
+        finally:
+            keep_alive.cancel()
+            if not self.lost:
+                await self.release(linger)
+
+
+async def run_exclusive(name: str, job, linger: float = JOB_LEASE_LINGER_SECONDS):
+    """
+    Run job() only in the worker that gets lease `name`; elsewhere it is
+    skipped. Returns job()'s result, or None when skipped.
+    """
+    lease = Lease(name)
+    if not await lease.acquire():
+        print(f"⏭️ {name} is running on another worker")
+        return None
+    return await lease.hold(job(), linger=linger)
@@ -1,66 +1,72 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.responses import StreamingResponse
+import asyncio
 import numpy as np
 import os
-import math
+import json
 
-from app.model import model
+from app.model import get_model_snapshot, get_model_version, is_model_loaded, model_registry, shadow_evaluator
+from app.score_cache import score_cache
+from app.classifiers import industry_classifier, job_title_normalizer
 from app.schemas import (
-    LeadInput, LeadScoreResponse, EmailInput, SendEmailInput, SendEmailResponse, UseCase,
+    LeadInput, LeadScoreResponse, LeadBatchInput, LeadBatchScoreResponse, EmailInput, SendEmailInput, SendEmailResponse, UseCase,
     SegmentationResponse, CampaignCreate, Campaign, EnhancedLead
 )
-from app.utils import generate_email_llama2, calculate_lead_score
-from app.email_sender import send_sales_email
-from app.segmentation import enrich_lead_data, resegment_all_leads
+from app.utils import generate_email_llama2, calculate_lead_score, calculate_lead_scores
+from app.email_sender import send_sales_email, smtp_pool
+from app.segmentation import enrich_lead_data, enrich_leads_batch, resegment_all_leads, resegment_stale_leads
 from app.use_cases import get_all_use_cases, get_use_case_by_id, match_use_case
-from app.crm_integration import get_crm_client
-from app.database import db
-from typing import List
+from app.serialization import FastJSONResponse, dumps
+from app.mongo_metrics import mongo_metrics
+from app.read_cache import lead_cache
+from app.email_cache import email_cache
+from app.database import db, LEADS_PAGE_SIZE, MAX_LEADS_PAGE_SIZE
+from typing import List, Optional
 from datetime import datetime
 
-# Import automation scheduler
-from app.scheduler import automation_scheduler
-
 # toggle for CRM integration
 USE_CRM = os.getenv("USE_CRM", "false").lower() == "true"
-crm_client = get_crm_client(use_mock=False) if USE_CRM else None
 
+# Heavy components are created on first use (see get_crm_client_lazy,
+# get_fallback_df, app.model.get_model) to keep worker cold starts fast
+_crm_client = None
+_fallback_df = None
 
-def sanitize_json_data(obj):
-    """
-    Recursively sanitize data to ensure JSON compliance.
-    Converts inf, -inf, and NaN to None.
-    """
-    if isinstance(obj, dict):
-        return {k: sanitize_json_data(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [sanitize_json_data(item) for item in obj]
-    elif isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
-            return None
-        return obj
-    elif isinstance(obj, np.floating):
-        if np.isnan(obj) or np.isinf(obj):
-            return None
-        return float(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    return obj
-
-
-app = FastAPI(title="AI-Based Outbound Sales Backend")
+# Batches larger than this are streamed back from /predict/batch
+BATCH_STREAM_THRESHOLD = int(os.getenv("BATCH_STREAM_THRESHOLD", "10000"))
+BATCH_STREAM_CHUNK = 5000
+
+# Leads per chunk written by /leads/stream
+LEADS_STREAM_CHUNK = int(os.getenv("LEADS_STREAM_CHUNK", "500"))
+
+# /leads/stream formats: newline-delimited JSON or a single JSON array
+LEAD_STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+app = FastAPI(title="AI-Based Outbound Sales Backend", default_response_class=FastJSONResponse)
 
 @app.on_event("startup")
 async def startup_db_client():
     db.connect()
+    # Warm the connection pool and provision indexes in the background so an
+    # unreachable server doesn't stall startup
+    app.state.warm_up_task = asyncio.create_task(db.warm_up())
+    app.state.index_task = asyncio.create_task(db.ensure_indexes())
+    # Hot-reload the scoring model when a new version lands in MODEL_DIR
+    model_registry.start_watching()
     # Start automation scheduler for monthly segmentation and campaigns
+    from app.scheduler import automation_scheduler
     automation_scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Stopped campaigns checkpoint their sends and release their leases, so the store must still be open
+    from app.scheduler import automation_scheduler
+    await automation_scheduler.stop()
     db.close()
-    automation_scheduler.stop()
+    model_registry.stop_watching()
+    smtp_pool.close()
 
 # Add CORS middleware to allow frontend connection
 app.add_middleware(
@@ -76,11 +82,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load scored leads CSV
+# Scored leads CSV, used as a fallback when Mongo and CRM have no data
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, "..", "data", "scored_leads.csv")
 
-df = pd.read_csv(DATA_PATH)
+
+def get_fallback_df():
+    """Load the fallback CSV on first use"""
+    global _fallback_df
+    if _fallback_df is None:
+        import pandas as pd
+        _fallback_df = pd.read_csv(DATA_PATH)
+    return _fallback_df
+
+
+def get_crm_client_lazy():
+    """Create the CRM client on first use (None when CRM is disabled)"""
+    global _crm_client
+    if USE_CRM and _crm_client is None:
+        from app.crm_integration import get_crm_client
+        _crm_client = get_crm_client(use_mock=False)
+    return _crm_client
 
 
 @app.get("/")
@@ -93,68 +115,248 @@ def health_check():
     return {"status": "OK"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: reports which lazily loaded components are warmed"""
+    from app.scheduler import automation_scheduler
+    components = {
+        "database": db.db is not None,
+        "model": is_model_loaded(),
+        "fallback_csv": _fallback_df is not None,
+        "crm_client": _crm_client is not None if USE_CRM else "disabled",
+        "scheduler": automation_scheduler.is_running
+    }
+    return {"ready": db.db is not None, "components": components}
+
+
+@app.get("/metrics/score-cache")
+def score_cache_metrics():
+    """Hit/miss/eviction counters for the model score cache"""
+    return {"model_version": get_model_version(), **score_cache.stats()}
+
+
+@app.get("/metrics/classifiers")
+def classifier_metrics():
+    """Memo hit rates for the industry classifier and job-title intern table"""
+    return {
+        "industry": industry_classifier.stats(),
+        "job_title": job_title_normalizer.stats()
+    }
+
+
+@app.get("/metrics/mongo")
+def mongo_pool_metrics():
+    """Connection pool gauges and per-command latency histograms"""
+    return mongo_metrics.snapshot()
+
+
+@app.get("/metrics/lead-cache")
+def lead_cache_metrics():
+    """Hit/miss counters and staleness of the lead read-through cache"""
+    return lead_cache.stats()
+
+
+@app.get("/metrics/smtp")
+def smtp_pool_metrics():
+    """Sessions opened, reconnects, retirements and messages sent by the SMTP pool"""
+    return smtp_pool.stats()
+
+
+@app.get("/metrics/email-cache")
+def email_cache_metrics():
+    """Generated-email cache hit rate, LLM calls and latency saved, overall and per campaign"""
+    return email_cache.stats()
+
+
+@app.get("/metrics/model")
+def model_metrics():
+    """Active model version, reload counters and shadow-model comparison"""
+    return {
+        "registry": model_registry.status(),
+        "shadow": shadow_evaluator.stats()
+    }
+
+
+async def load_fallback_leads(limit: int = 50) -> list:
+    """
+    Leads from the CRM, or the bundled CSV when the CRM is disabled.
+    They are enriched and synced to MongoDB, so later reads are served
+    from the stored enrichment.
+    """
+    crm_client = get_crm_client_lazy()
+    if USE_CRM and crm_client and crm_client.connect():
+        print("DEBUG: Fetching leads from CRM...")
+        records = crm_client.fetch_leads(limit=limit)
+    else:
+        # Fallback to CSV
+        print("DEBUG: Loading fallback CSV...")
+        import pandas as pd
+        leads_df = get_fallback_df().head(limit).copy()
+        leads_df = leads_df.rename(columns={"customer_name": "company_name"})
+        # Column operations: inf → NaN, then NaN → None in every column
+        leads_df = leads_df.replace([np.inf, -np.inf], np.nan)
+        leads_df = leads_df.astype(object).where(pd.notna(leads_df), None)
+        records = leads_df.to_dict(orient="records")
+        for r in records:
+            if "email" not in r or not r["email"]:
+                clean_name = str(r["company_name"]).replace(" ", "").lower()
+                r["email"] = f"contact@{clean_name}.com"
+
+    # Enrich records with segmentation data (records that fail are returned as-is)
+    print(f"DEBUG: Enriching {len(records)} records")
+    enriched_leads, failed = enrich_leads_batch(records)
+    segmented_at = datetime.now().isoformat()
+    for lead in enriched_leads:
+        lead['last_segmented_at'] = segmented_at
+
+    # Sync to Mongo
+    if db.db is not None:
+        print(f"DEBUG: Syncing {len(enriched_leads)} leads to Mongo...")
+        result = await db.save_leads_bulk(enriched_leads)
+        for error in result["errors"]:
+            print(f"Failed to save fallback lead: {error['error']}")
+
+    # Records are enriched in place: return them all in source order,
+    # with the ones that failed enrichment left as they were
+    return records
+
+
+def serve_stored_leads(leads: list, projection: dict = None) -> list:
+    """
+    Prepare stored leads for a response. Stored enrichment is served as-is;
+    only full documents that were never enriched are enriched on the way out.
+    """
+    if projection is None:
+        pending = [lead for lead in leads if "segment" not in lead or "lead_score" not in lead]
+        if pending:
+            enrich_leads_batch(pending)
+    return leads
+
+
+def project_lead(lead: dict, projection: dict = None) -> dict:
+    if projection is None:
+        return lead
+    return {key: value for key, value in lead.items() if key in projection or key == "_id"}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """Comma-separated field names → MongoDB projection"""
+    if not fields:
+        return None
+    return {name.strip(): 1 for name in fields.split(",") if name.strip()}
+
+
 @app.get("/leads")
-async def get_leads():
+async def get_leads(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LEADS_PAGE_SIZE),
+    after: Optional[str] = None,
+    order: str = "_id",
+    fields: Optional[str] = None
+):
+    """
+    Without paging parameters: up to 1000 leads as a JSON array.
+    With `limit` and/or `after`: one keyset-paginated page,
+    {"leads": [...], "next_after": token}, ordered by `order` ("_id" or
+    "lead_score"); pass next_after back as `after` to get the next page.
+    `fields` is an optional comma-separated list of fields to return.
+    """
     print("DEBUG: /leads endpoint called")
+    projection = parse_fields(fields)
+
+    if limit is not None or after is not None:
+        return await get_leads_page(limit or LEADS_PAGE_SIZE, after, order, projection)
+
     records = []
 
     # 1. Try to fetch from MongoDB first
     try:
         if db.db is not None:
-             mongo_leads = await db.get_all_leads()
+             mongo_leads = await db.get_all_leads(projection=projection)
              if mongo_leads:
                  print(f"DEBUG: Found {len(mongo_leads)} leads in Mongo")
-                 for lead in mongo_leads:
-                     if "_id" in lead: lead["_id"] = str(lead["_id"])
-                 records = mongo_leads
+                 records = serve_stored_leads(mongo_leads, projection)
     except Exception as e:
         print(f"⚠️ MongoDB fetch error: {e}")
 
     # 2. If no leads in DB, try fetching from CRM or CSV
     if not records:
         print("DEBUG: No Mongo records found. Checking CRM/CSV...")
-        if USE_CRM and crm_client and crm_client.connect():
-            print("DEBUG: Fetching leads from CRM...")
-            records = crm_client.fetch_leads(limit=50)
-            if db.db is not None:
-                for r in records:
-                    await db.save_lead(r)
-        else:
-            # Fallback to CSV
-            print("DEBUG: Loading fallback CSV...")
-            leads_df = df.head(50).copy()
-            leads_df = leads_df.rename(columns={"customer_name": "company_name"})
-            leads_df = leads_df.replace([np.inf, -np.inf], None)
-            leads_df = leads_df.where(pd.notna(leads_df), None)
-            records = leads_df.to_dict(orient="records")
-            
-            # Sync to Mongo
-            if db.db is not None:
-                print(f"DEBUG: Syncing {len(records)} CSV leads to Mongo...")
-                for r in records:
-                    if "email" not in r or not r["email"]:
-                        clean_name = str(r["company_name"]).replace(" ", "").lower()
-                        r["email"] = f"contact@{clean_name}.com"
-                    try:
-                         await db.save_lead(r)
-                    except Exception as e:
-                        print(f"Failed to save CSV lead: {e}")
-
-    # Enrich each record with segmentation data
-    enriched_leads = []
-    print(f"DEBUG: Enriching {len(records)} records")
-    for record in records:
-        try:
-            enriched = enrich_lead_data(record)
-            enriched_leads.append(enriched)
-        except Exception as e:
-            enriched_leads.append(record)
-    
-    # Sanitize data to ensure JSON compliance
-    sanitized_leads = sanitize_json_data(enriched_leads)
-            
-    print(f"DEBUG: Returning {len(sanitized_leads)} leads to frontend")
-    return sanitized_leads
+        records = [project_lead(lead, projection) for lead in await load_fallback_leads()]
+
+    # orjson writes NaN/inf as null and encodes NumPy values, ObjectIds and Enums natively
+    print(f"DEBUG: Returning {len(records)} leads to frontend")
+    return FastJSONResponse(records)
+
+
+async def get_leads_page(limit: int, after: Optional[str], order: str, projection: Optional[dict]) -> FastJSONResponse:
+    store_available = db.db is not None
+    try:
+        leads, next_after = await db.get_leads_page(limit, after, order, projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"⚠️ MongoDB fetch error: {e}")
+        leads, next_after = [], None
+        store_available = False
+
+    if not leads and after is None:
+        # Empty store: seed it from the CRM/CSV fallback, then serve its first page
+        fallback = await load_fallback_leads()
+        if store_available:
+            leads, next_after = await db.get_leads_page(limit, None, order, projection)
+        if not leads:
+            leads = [project_lead(lead, projection) for lead in fallback[:limit]]
+
+    return FastJSONResponse({
+        "leads": serve_stored_leads(leads, projection),
+        "next_after": next_after
+    })
+
+
+async def stream_leads(cursor, stream_format: str):
+    """
+    Serialize leads as the cursor yields them, in chunks of
+    LEADS_STREAM_CHUNK, so memory stays flat whatever the result size.
+    The first lead is flushed on its own to get the first byte out early.
+    """
+    if stream_format == "json":
+        opening, separator, closing = b"[", b",", b"]"
+    else:
+        opening, separator, closing = b"", b"\n", b"\n"
+
+    if opening:
+        yield opening
+    rows = []
+    written = 0
+    if cursor is not None:
+        async for lead in cursor:
+            rows.append(dumps(lead))
+            if written == 0 or len(rows) >= LEADS_STREAM_CHUNK:
+                yield (separator if written else b"") + separator.join(rows)
+                written += len(rows)
+                rows = []
+    if rows:
+        yield (separator if written else b"") + separator.join(rows)
+        written += len(rows)
+    if written or opening:
+        yield closing
+
+
+@app.get("/leads/stream")
+async def stream_all_leads(format: str = "ndjson", order: str = "_id", fields: Optional[str] = None):
+    """
+    Stream every stored lead straight from the database cursor, as
+    newline-delimited JSON (format=ndjson) or one JSON array (format=json).
+    Stored enrichment is served as-is; `fields` is an optional
+    comma-separated projection.
+    """
+    if format not in LEAD_STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}', expected ndjson or json")
+    try:
+        cursor = db.iter_leads(order, parse_fields(fields)) if db.db is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(stream_leads(cursor, format), media_type=LEAD_STREAM_MEDIA_TYPES[format])
 
 
 @app.get("/use-cases", response_model=list[UseCase])
@@ -177,6 +379,7 @@ def find_best_use_case(lead: LeadInput):
     use_case = match_use_case(industry, segment)
     
     # Write back to CRM if enabled and ID is present (mock or real)
+    crm_client = get_crm_client_lazy()
     if USE_CRM and crm_client and lead.id:
         # We don't have lead score here, so pass 0 or maybe remove that arg from update_lead_ai_data
         # Actually update_lead_ai_data expects lead_id, lead_score, use_case
@@ -199,11 +402,65 @@ def predict_lead(lead: LeadInput):
         lead.conversion_days
     ]]
 
-    score, prob = calculate_lead_score(model, X)
+    model, model_version = get_model_snapshot()
+    score, prob = calculate_lead_score(model, X, model_version)
 
     return {
         "lead_score": score,
-        "conversion_probability": prob
+        "conversion_probability": prob,
+        "model_version": model_version
+    }
+
+
+def stream_batch_scores(scores, probabilities, model_version):
+    """
+    Yield the /predict/batch JSON body in chunks so large responses are
+    never materialized as a single string.
+    """
+    yield '{"model_version":' + json.dumps(model_version) + ',"lead_score":['
+    for start in range(0, len(scores), BATCH_STREAM_CHUNK):
+        prefix = "," if start else ""
+        yield prefix + ",".join(map(repr, scores[start:start + BATCH_STREAM_CHUNK]))
+    yield '],"conversion_probability":['
+    for start in range(0, len(probabilities), BATCH_STREAM_CHUNK):
+        prefix = "," if start else ""
+        yield prefix + ",".join(map(repr, probabilities[start:start + BATCH_STREAM_CHUNK]))
+    yield ']}'
+
+
+@app.post("/predict/batch", response_model=LeadBatchScoreResponse)
+def predict_leads_batch(batch: LeadBatchInput):
+    """
+    Score many leads in one request.
+    Takes parallel arrays and runs the model once over the whole matrix.
+    """
+    X = np.column_stack([
+        np.asarray(batch.quote_value, dtype=float),
+        np.asarray(batch.item_count, dtype=float),
+        np.asarray(batch.conversion_days, dtype=float)
+    ])
+
+    if not np.isfinite(X).all():
+        raise HTTPException(status_code=422, detail="Batch contains NaN or infinite values")
+
+    model, model_version = get_model_snapshot()
+    if len(X) == 0:
+        return {"lead_score": [], "conversion_probability": [], "model_version": model_version}
+
+    scores, probabilities = calculate_lead_scores(model, X)
+    scores = scores.tolist()
+    probabilities = probabilities.tolist()
+
+    if len(scores) > BATCH_STREAM_THRESHOLD:
+        return StreamingResponse(
+            stream_batch_scores(scores, probabilities, model_version),
+            media_type="application/json"
+        )
+
+    return {
+        "lead_score": scores,
+        "conversion_probability": probabilities,
+        "model_version": model_version
     }
 
 
@@ -251,24 +508,26 @@ async def bulk_upload_leads(leads: List[dict]):
     Bulk upload leads from external system (CRM, CSV, API)
     Enables live data ingestion as per problem statement
     """
-    uploaded_count = 0
     failed = []
     
-    for lead in leads:
-        try:
-            # Enrich and segment the lead
-            enriched_lead = enrich_lead_data(lead)
-            enriched_lead['last_segmented_at'] = datetime.now().isoformat()
-            
-            # Save to MongoDB
-            await db.save_lead(enriched_lead)
-            uploaded_count += 1
-        except Exception as e:
-            failed.append({"lead": lead.get("company_name", "Unknown"), "error": str(e)})
+    # Enrich and segment all leads in one vectorized pass
+    enriched_leads, rejected = enrich_leads_batch(leads)
+    for lead, error in rejected:
+        failed.append({"lead": lead.get("company_name", "Unknown"), "error": error})
+    
+    segmented_at = datetime.now().isoformat()
+    for enriched_lead in enriched_leads:
+        enriched_lead['last_segmented_at'] = segmented_at
+    
+    # Save to MongoDB in bulk; failures are reported per lead
+    result = await db.save_leads_bulk(enriched_leads)
+    for error in result["errors"]:
+        lead = enriched_leads[error["index"]]
+        failed.append({"lead": lead.get("company_name", "Unknown"), "error": error["error"]})
     
     return {
         "success": True,
-        "uploaded": uploaded_count,
+        "uploaded": result["written"],
         "failed": len(failed),
         "errors": failed[:5]  # Show first 5 errors
     }
@@ -291,29 +550,33 @@ async def run_segmentation(force_resegment: bool = False):
             "segment_distribution": {}
         }
     
-    # Re-segment all leads
-    segment_counts = {}
-    updated = 0
+    # Only re-segment if forced or never segmented; forced runs still skip
+    # leads whose input fingerprint, rules and model version are current
+    candidates = [
+        lead for lead in all_leads
+        if force_resegment or not lead.get("last_segmented_at")
+    ]
+    report = resegment_stale_leads(candidates, datetime.now().isoformat())
+    for lead, error in report["failed"]:
+        print(f"Segmentation error for {lead.get('company_name')}: {error}")
     
-    for lead in all_leads:
-        try:
-            # Only re-segment if forced or never segmented
-            should_segment = force_resegment or not lead.get("last_segmented_at")
-            
-            if should_segment:
-                enriched = enrich_lead_data(lead)
-                enriched['last_segmented_at'] = datetime.now().isoformat()
-                await db.save_lead(enriched)
-                updated += 1
-                
-                segment = enriched.get("segment", "GENERAL")
-                segment_counts[segment] = segment_counts.get(segment, 0) + 1
-        except Exception as e:
-            print(f"Segmentation error for {lead.get('company_name')}: {e}")
+    result = await db.update_leads_bulk(report["updates"])
+    failed_writes = {error["index"] for error in result["errors"]}
+    for error in result["errors"]:
+        print(f"Segmentation error for {error['email']}: {error['error']}")
+    
+    segment_counts = {}
+    for index, (enriched, _) in enumerate(report["updates"]):
+        if index not in failed_writes:
+            segment = enriched.get("segment", "GENERAL")
+            segment_counts[segment] = segment_counts.get(segment, 0) + 1
     
     return {
-        "segments_updated": updated,
-        "segment_distribution": segment_counts
+        "segments_updated": result["written"],
+        "segment_distribution": segment_counts,
+        "skipped": len(all_leads) - len(candidates) + report["skipped"],
+        "changed": report["changed"],
+        "unchanged": report["unchanged"]
     }
 
 
@@ -323,12 +586,8 @@ async def create_email_campaign(campaign: CampaignCreate):
     Create scheduled email campaign with throttling
     Supports: Onboarding, Nurture, Cross-sell, Upsell campaigns
     """
-    # Fetch leads matching target segment
-    all_leads = await db.get_all_leads()
-    target_leads = [
-        lead for lead in all_leads 
-        if lead.get("segment") == campaign.target_segment
-    ]
+    # Fetch leads matching target segment (served by the segment index)
+    target_leads = await db.get_leads_by_segment(campaign.target_segment.value, {"email": 1})
     
     campaign_doc = {
         "name": campaign.name,
@@ -339,13 +598,25 @@ async def create_email_campaign(campaign: CampaignCreate):
         "emails_sent": 0,
         "throttle_rate": campaign.throttle_rate,
         "send_time": campaign.send_time,
-        "status": "scheduled",
-        "created_at": datetime.now().isoformat(),
-        "target_leads": [lead.get("email") for lead in target_leads]
+        "status": "queuing",
+        "created_at": datetime.now().isoformat()
     }
     
-    # Save campaign to database
-    await db.save_campaign(campaign_doc)
+    # Save campaign to database, queue one delivery per recipient, then
+    # release it to the scheduler
+    if await db.save_campaign(campaign_doc):
+        try:
+            await db.enqueue_deliveries(campaign_doc["_id"], [lead.get("email") for lead in target_leads])
+            await db.update_campaign_status(campaign_doc["_id"], status="scheduled")
+        except Exception as e:
+            print(f"❌ Failed to queue campaign {campaign_doc['_id']}: {e}")
+            # Don't leave it in "queuing": the scheduler never picks that up
+            await db.update_campaign_status(campaign_doc["_id"], status="failed")
+            return {
+                "success": False,
+                "campaign_id": campaign_doc["_id"],
+                "message": f"Failed to queue campaign deliveries: {e}"
+            }
     
     return {
         "success": True,
@@ -366,12 +637,25 @@ async def list_campaigns():
     return campaigns
 
 
+@app.get("/campaigns/{campaign_id}/deliveries")
+async def campaign_delivery_progress(campaign_id: str):
+    """Per-state delivery counts for a campaign (pending, sending, sent, failed)"""
+    counts = await db.get_delivery_counts(campaign_id)
+    return {
+        "campaign_id": campaign_id,
+        "total": sum(counts.values()),
+        "states": counts,
+        "email_cache": email_cache.campaign_stats(campaign_id)
+    }
+
+
 @app.post("/crm/sync")
 async def sync_crm_data():
     """
     Manual trigger for CRM data sync
     Fetches: customer data, industry, role, past engagements
     """
+    crm_client = get_crm_client_lazy()
     if not USE_CRM or not crm_client:
         return {
             "success": False,
@@ -388,20 +672,22 @@ async def sync_crm_data():
     crm_leads = crm_client.fetch_leads(limit=500)
     
     # Save to MongoDB with enrichment
-    synced = 0
-    for lead in crm_leads:
-        try:
-            enriched = enrich_lead_data(lead)
-            enriched['last_segmented_at'] = datetime.now().isoformat()
-            await db.save_lead(enriched)
-            synced += 1
-        except Exception as e:
-            print(f"CRM sync error: {e}")
+    enriched_leads, failed = enrich_leads_batch(crm_leads)
+    for _, error in failed:
+        print(f"CRM sync error: {error}")
+    
+    segmented_at = datetime.now().isoformat()
+    for enriched in enriched_leads:
+        enriched['last_segmented_at'] = segmented_at
+    
+    result = await db.save_leads_bulk(enriched_leads)
+    for error in result["errors"]:
+        print(f"CRM sync error: {error['error']}")
     
     return {
         "success": True,
         "source": "CRM",
-        "records_synced": synced,
+        "records_synced": result["written"],
         "timestamp": datetime.now().isoformat()
     }
 
@@ -412,41 +698,16 @@ async def get_segment_analytics():
     Analytics dashboard for segment distribution
     Used for cross-sell/upsell opportunity identification
     """
-    all_leads = await db.get_all_leads()
+    # Aggregated in MongoDB; only one small document per segment comes back
+    segments = await db.get_segment_analytics()
     
-    if not all_leads:
+    if not segments:
         return {"total_leads": 0, "segments": {}}
     
-    # Calculate segment distribution
-    segment_stats = {}
-    for lead in all_leads:
-        segment = lead.get("segment", "GENERAL")
-        if segment not in segment_stats:
-            segment_stats[segment] = {
-                "count": 0,
-                "total_revenue_potential": 0,
-                "avg_lead_score": 0,
-                "top_industries": {}
-            }
-        
-        segment_stats[segment]["count"] += 1
-        segment_stats[segment]["total_revenue_potential"] += lead.get("revenue_potential", 0)
-        segment_stats[segment]["avg_lead_score"] += lead.get("lead_score", 0)
-        
-        industry = lead.get("industry", "OTHER")
-        segment_stats[segment]["top_industries"][industry] = \
-            segment_stats[segment]["top_industries"].get(industry, 0) + 1
-    
-    # Calculate averages
-    for segment, stats in segment_stats.items():
-        if stats["count"] > 0:
-            stats["avg_lead_score"] = round(stats["avg_lead_score"] / stats["count"], 2)
-            stats["avg_revenue_potential"] = round(
-                stats["total_revenue_potential"] / stats["count"], 2
-            )
+    segment_stats = {stats.pop("_id"): stats for stats in segments}
     
     return {
-        "total_leads": len(all_leads),
+        "total_leads": sum(stats["count"] for stats in segment_stats.values()),
         "segments": segment_stats
     }
 
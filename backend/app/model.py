@@ -1,9 +1,283 @@
-import joblib
+"""
+Versioned, hot-reloadable lead scoring model.
+
+ModelRegistry watches the model directory and atomically swaps in a new
+model when the model file changes, without restarting workers. Requests
+take a (model, version) snapshot, so in-flight scoring finishes on the
+model it started with.
+
+ShadowEvaluator optionally scores the same traffic with a candidate model
+on a background thread and reports how its scores differ from the
+current model's, without adding latency to the request.
+"""
+import hashlib
 import os
+import queue
+import threading
+
+import numpy as np
 
-# Get absolute path to model file
+from app.score_cache import score_cache
+
+# Get absolute path to model files
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, "lead_scoring_model.pkl")
+MODEL_DIR = os.getenv("MODEL_DIR", BASE_DIR)
+MODEL_PATH = os.path.join(MODEL_DIR, "lead_scoring_model.pkl")
+KERNEL_PATH = os.path.join(MODEL_DIR, "lead_scoring_model.npz")
+
+# Seconds between checks of the model directory for a new model file
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "10"))
+
+# The estimator counts as retrained only if written this much later than the
+# kernel, so files written together (e.g. a git checkout) keep the kernel
+MODEL_EXPORT_GRACE_SECONDS = 2
+
+# Optional candidate model scored in shadow mode (.npz or .pkl)
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+
+# Score tiers used to count shadow disagreements (probability thresholds)
+SCORE_TIERS = [0.4, 0.7]
+
+
+def load_model_file(path: str):
+    """
+    Load a model file: exported NumPy kernels (.npz) need no scikit-learn;
+    pickled estimators are loaded with joblib.
+    """
+    if path.endswith(".npz"):
+        from app.scoring_kernel import load_kernel
+        return load_kernel(path)
+    import joblib
+    return joblib.load(path)
+
+
+def file_version(path: str) -> str:
+    """Content hash of a model file, used as its version tag"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _file_signature(path: str):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    """
+    Holds the active (model, version) pair and reloads it when the model
+    file in the watched directory changes.
+    Prefers the exported NumPy kernel over the pickled estimator, unless the
+    estimator is newer (retrained since the last export): then the estimator
+    is served until the kernel is regenerated with: python export_model.py
+    """
+
+    def __init__(self, kernel_path: str = KERNEL_PATH, pickle_path: str = MODEL_PATH):
+        self.kernel_path = kernel_path
+        self.pickle_path = pickle_path
+        # (model, version, path, signature), replaced as a single reference
+        self._active = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _model_file(self) -> str:
+        kernel, pickle = _file_signature(self.kernel_path), _file_signature(self.pickle_path)
+        if kernel is None or (pickle is not None and pickle[0] - kernel[0] > MODEL_EXPORT_GRACE_SECONDS * 1e9):
+            return self.pickle_path
+        return self.kernel_path
+
+    def snapshot(self) -> tuple:
+        """Return the current (model, version), loading the model on first call."""
+        active = self._active
+        if active is None:
+            self.reload()
+            active = self._active
+        return active[0], active[1]
+
+    def is_loaded(self) -> bool:
+        return self._active is not None
+
+    def reload(self) -> bool:
+        """
+        Load the model file if it changed since the last load.
+        Returns True when a new version was swapped in. A file that fails
+        to load (e.g. half-written) leaves the current model active.
+        """
+        with self._lock:
+            path = self._model_file()
+            signature = _file_signature(path)
+            active = self._active
+            if active is not None and active[2] == path and active[3] == signature:
+                return False
+
+            try:
+                loaded = load_model_file(path)
+                version = file_version(path)
+            except Exception as e:
+                if active is None:
+                    raise
+                self.reload_errors += 1
+                print(f"⚠️ Model reload failed, keeping version {active[1]}: {e}")
+                return False
+
+            if active is not None and active[1] == version:
+                # Same content (e.g. touched file): keep the loaded model
+                self._active = (active[0], version, path, signature)
+                return False
+
+            self._active = (loaded, version, path, signature)
+            score_cache.watch(path)
+            if path == self.pickle_path and os.path.exists(self.kernel_path):
+                print("⚠️ Model estimator is newer than its NumPy kernel; serving the estimator. "
+                      "Run python export_model.py to regenerate the kernel")
+            if active is not None:
+                self.reloads += 1
+                score_cache.clear()
+                print(f"🔄 Model reloaded: {active[1]} → {version}")
+            return True
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"⚠️ Model watcher error: {e}")
+
+    def start_watching(self, interval: float = MODEL_RELOAD_INTERVAL):
+        """Poll the model directory on a daemon thread"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        active = self._active
+        return {
+            "loaded": active is not None,
+            "version": active[1] if active else None,
+            "path": active[2] if active else self._model_file(),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "watching": bool(self._watcher and self._watcher.is_alive())
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores primary traffic with a candidate model on a background thread.
+    Work is queued without blocking; when the queue is full the sample is
+    dropped (and counted) rather than slowing the request down.
+    """
+
+    def __init__(self, path: str = SHADOW_MODEL_PATH, queue_size: int = SHADOW_QUEUE_SIZE):
+        self.path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.candidate = None
+        self.version = None
+        self.compared = 0
+        self.dropped = 0
+        self.errors = 0
+        self.sum_abs_diff = 0.0
+        self.max_abs_diff = 0.0
+        self.tier_disagreements = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def submit(self, X, primary_probabilities):
+        """Queue a scored batch for comparison; never blocks the caller"""
+        if not self.enabled:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((
+                np.array(X, dtype=np.float64, ndmin=2),
+                np.array(primary_probabilities, dtype=np.float64, ndmin=1)
+            ))
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        try:
+            self.candidate = load_model_file(self.path)
+            self.version = file_version(self.path)
+            print(f"👥 Shadow model loaded: {self.version}")
+        except Exception as e:
+            print(f"❌ Shadow model failed to load: {e}")
+            self.path = None
+            return
+
+        while True:
+            X, primary = self._queue.get()
+            try:
+                shadow = self.candidate.predict_proba(X)[:, 1]
+                diff = np.abs(shadow - primary)
+                tiers_differ = np.digitize(shadow, SCORE_TIERS) != np.digitize(primary, SCORE_TIERS)
+                with self._stats_lock:
+                    self.compared += len(diff)
+                    self.sum_abs_diff += float(diff.sum())
+                    self.max_abs_diff = max(self.max_abs_diff, float(diff.max()))
+                    self.tier_disagreements += int(tiers_differ.sum())
+            except Exception:
+                with self._stats_lock:
+                    self.errors += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "enabled": self.enabled,
+                "candidate_version": self.version,
+                "compared": self.compared,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "mean_abs_diff": round(self.sum_abs_diff / self.compared, 6) if self.compared else 0.0,
+                "max_abs_diff": round(self.max_abs_diff, 6),
+                "tier_disagreement_rate": round(self.tier_disagreements / self.compared, 4) if self.compared else 0.0
+            }
+
+
+# Global instances
+model_registry = ModelRegistry()
+shadow_evaluator = ShadowEvaluator()
+
+
+def get_model():
+    """Return the active scoring model, loading it on first call."""
+    return model_registry.snapshot()[0]
+
+
+def get_model_version() -> str:
+    """Return the active model's version hash, loading the model if needed."""
+    return model_registry.snapshot()[1]
+
+
+def get_model_snapshot() -> tuple:
+    """Return (model, version) from the same registry state."""
+    return model_registry.snapshot()
+
 
-# Load model
-model = joblib.load(MODEL_PATH)
+def is_model_loaded() -> bool:
+    return model_registry.is_loaded()
@@ -0,0 +1,156 @@
+"""
+Connection-pool gauges and command latency histograms for MongoDB.
+
+MongoMetrics is registered on the Motor client as a pymongo event
+listener. Pool events keep per-server gauges of open, in-use, available
+and waiting connections; command events feed a latency histogram per
+command name (find, update, aggregate, getMore, ...).
+Listeners run on the driver's threads, so all updates take a lock.
+"""
+import threading
+from collections import defaultdict
+
+from pymongo import monitoring
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: list = LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float, failed: bool = False):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.failures += failed
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class PoolGauges:
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.check_out_failures = defaultdict(int)
+        self.cleared = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "available": max(self.open - self.in_use, 0),
+            "waiting": self.waiting,
+            "check_out_failures": dict(self.check_out_failures),
+            "cleared": self.cleared
+        }
+
+
+class MongoMetrics(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """pymongo event listener collecting pool gauges and command latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = defaultdict(PoolGauges)
+        self._commands = defaultdict(LatencyHistogram)
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _pool(self, event) -> PoolGauges:
+        return self._pools[self._address(event)]
+
+    # --- Command events ---
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self._commands[event.command_name].observe(event.duration_micros / 1000)
+
+    def failed(self, event):
+        with self._lock:
+            self._commands[event.command_name].observe(event.duration_micros / 1000, failed=True)
+
+    # --- Connection pool events ---
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event).cleared += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(self._address(event), None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event).open -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event).waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.waiting -= 1
+            pool.check_out_failures[str(event.reason)] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.waiting -= 1
+            pool.in_use += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event).in_use -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pools": {address: pool.snapshot() for address, pool in self._pools.items()},
+                "commands": {name: histogram.snapshot() for name, histogram in sorted(self._commands.items())}
+            }
+
+
+# Global listener registered on the Motor client
+mongo_metrics = MongoMetrics()
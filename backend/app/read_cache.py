@@ -0,0 +1,117 @@
+"""
+Optional in-process read-through cache for lead queries and analytics.
+
+Entries are tagged with the cache version current when their load
+started. Every lead write in Database bumps the version, so entries
+loaded before a write are treated as stale and reloaded on next use.
+Writes made by other processes (other workers, maintenance scripts) do
+not bump this process's version; the TTL bounds how stale those reads
+can get.
+
+Disabled unless LEAD_CACHE_ENABLED=true.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+LEAD_CACHE_ENABLED = os.getenv("LEAD_CACHE_ENABLED", "false").lower() == "true"
+LEAD_CACHE_TTL = float(os.getenv("LEAD_CACHE_TTL", "30"))
+LEAD_CACHE_SIZE = int(os.getenv("LEAD_CACHE_SIZE", "256"))
+
+
+class ReadCache:
+    """
+    LRU cache of query results with a TTL and version-counter invalidation.
+    Values are returned as stored; callers must not mutate them.
+    """
+
+    def __init__(self, enabled: bool = LEAD_CACHE_ENABLED, ttl: float = LEAD_CACHE_TTL,
+                 maxsize: int = LEAD_CACHE_SIZE):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version = 0
+        # key -> (value, version, loaded_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hit_age_total = 0.0
+        self.max_hit_age = 0.0
+
+    async def get_or_load(self, key, loader):
+        """Return the cached value for key, or await loader() and cache its result."""
+        if not self.enabled:
+            return await loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, version, loaded_at = entry
+                if version != self.version:
+                    self.stale += 1
+                    del self._entries[key]
+                elif now - loaded_at > self.ttl:
+                    self.expired += 1
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    age = now - loaded_at
+                    self._hit_age_total += age
+                    self.max_hit_age = max(self.max_hit_age, age)
+                    return value
+            self.misses += 1
+            version = self.version
+
+        value = await loader()
+
+        with self._lock:
+            # A write that landed during the load leaves this entry stale on arrival
+            if version == self.version:
+                self._entries[key] = (value, version, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self):
+        """Mark every cached entry stale; called after each lead write."""
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "size": len(self._entries),
+                "max_size": self.maxsize,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stale": self.stale,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "avg_hit_age_seconds": round(self._hit_age_total / self.hits, 3) if self.hits else 0.0,
+                "max_hit_age_seconds": round(self.max_hit_age, 3)
+            }
+
+
+# Global cache used by app.database.Database
+lead_cache = ReadCache()
@@ -0,0 +1,147 @@
+"""
+Table-driven business rules for maturity, segment and hybrid lead score.
+
+The thresholds live in segmentation_rules.json (or SEGMENTATION_RULES_PATH)
+and are compiled once into NumPy evaluators that run over whole columns:
+- "greater than" ladders become numpy.searchsorted lookups
+- first-match maturity rules become a numpy.select
+- segment rules become an (industry x maturity) lookup table
+
+Changing a threshold, multiplier or segment mapping only needs an edit to
+the JSON file; the rules version is recorded with each segmentation.
+"""
+import json
+import os
+
+import numpy as np
+
+from app.schemas import Industry, MaturityLevel, Segment, JobRole
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_PATH = os.getenv("SEGMENTATION_RULES_PATH", os.path.join(BASE_DIR, "segmentation_rules.json"))
+
+# Code <-> Enum lookups; rule evaluators work on integer codes
+INDUSTRIES = np.array(list(Industry), dtype=object)
+MATURITY_LEVELS = np.array(list(MaturityLevel), dtype=object)
+SEGMENTS = np.array(list(Segment), dtype=object)
+
+INDUSTRY_CODES = {member: code for code, member in enumerate(Industry)}
+MATURITY_CODES = {member: code for code, member in enumerate(MaturityLevel)}
+SEGMENT_CODES = {member: code for code, member in enumerate(Segment)}
+
+
+class Ladder:
+    """
+    Points awarded by a 'value > threshold' ladder.
+    `gt` holds ascending thresholds; `points[i]` applies when value exceeds
+    exactly i of them, so len(points) == len(gt) + 1.
+    """
+
+    def __init__(self, gt: list, points: list):
+        if len(points) != len(gt) + 1:
+            raise ValueError("Ladder needs exactly one more points entry than thresholds")
+        if list(gt) != sorted(gt):
+            raise ValueError("Ladder thresholds must be ascending")
+        self.gt = np.asarray(gt, dtype=np.float64)
+        self.points = np.asarray(points)
+
+    def __call__(self, values):
+        # side="left" counts thresholds strictly below each value
+        return self.points[np.searchsorted(self.gt, values, side="left")]
+
+
+class RuleEngine:
+    """Compiled form of a segmentation rules table."""
+
+    def __init__(self, rules: dict):
+        self.version = str(rules["version"])
+
+        # Maturity: first matching rule wins; a rule matches if any *_gt threshold is exceeded
+        self._maturity_rules = [
+            (MATURITY_CODES[MaturityLevel(rule["level"])],
+             rule.get("quote_value_gt"), rule.get("item_count_gt"))
+            for rule in rules["maturity"]
+        ]
+        self._default_maturity = MATURITY_CODES[MaturityLevel(rules["default_maturity"])]
+
+        # Segment: resolve the first-match rule list into an industry x maturity table
+        default_segment = SEGMENT_CODES[Segment(rules["default_segment"])]
+        self.segment_table = np.full((len(INDUSTRIES), len(MATURITY_LEVELS)), default_segment, dtype=np.int64)
+        assigned = np.zeros(self.segment_table.shape, dtype=bool)
+        for rule in rules["segments"]:
+            industry = INDUSTRY_CODES[Industry(rule["industry"])]
+            maturities = [MATURITY_CODES[MaturityLevel(m)] for m in rule.get("maturity", [m.value for m in MaturityLevel])]
+            for maturity in maturities:
+                if not assigned[industry, maturity]:
+                    self.segment_table[industry, maturity] = SEGMENT_CODES[Segment(rule["segment"])]
+                    assigned[industry, maturity] = True
+
+        self.decision_maker_roles = frozenset(JobRole(role) for role in rules["decision_maker_roles"])
+
+        revenue = rules["revenue_potential"]
+        self.enterprise_multiplier = revenue["enterprise_multiplier"]
+        self.default_multiplier = revenue["default_multiplier"]
+        self.decision_maker_multiplier = revenue["decision_maker_multiplier"]
+
+        score = rules["score"]
+        self.base_score = Ladder(**score["base_by_quote_value"])
+        self.decision_maker_points = score["decision_maker_points"]
+        self.high_value_segments = np.zeros(len(SEGMENTS), dtype=bool)
+        for segment in score["high_value_segments"]:
+            self.high_value_segments[SEGMENT_CODES[Segment(segment)]] = True
+        self.high_value_segment_points = score["high_value_segment_points"]
+        self.engagement_points = Ladder(**score["past_engagements"])
+        self.item_count_points = Ladder(**score["item_count"])
+        self.ml_contribution_cap = score["ml_contribution_cap"]
+        self.max_score = score["max_score"]
+
+    @classmethod
+    def from_file(cls, path: str = RULES_PATH) -> "RuleEngine":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def maturity(self, quote_value, item_count) -> np.ndarray:
+        """Maturity codes (index into MATURITY_LEVELS) for whole columns"""
+        quote_value = np.asarray(quote_value, dtype=np.float64)
+        item_count = np.asarray(item_count, dtype=np.float64)
+        conditions, choices = [], []
+        for code, quote_gt, items_gt in self._maturity_rules:
+            condition = np.zeros(quote_value.shape, dtype=bool)
+            if quote_gt is not None:
+                condition |= quote_value > quote_gt
+            if items_gt is not None:
+                condition |= item_count > items_gt
+            conditions.append(condition)
+            choices.append(code)
+        return np.select(conditions, choices, default=self._default_maturity)
+
+    def segment(self, industry_codes, maturity_codes) -> np.ndarray:
+        """Segment codes (index into SEGMENTS) via the compiled lookup table"""
+        return self.segment_table[industry_codes, maturity_codes]
+
+    def is_decision_maker(self, job_role: JobRole) -> bool:
+        return job_role in self.decision_maker_roles
+
+    def decision_makers(self, job_roles) -> np.ndarray:
+        return np.fromiter((role in self.decision_maker_roles for role in job_roles), dtype=bool, count=len(job_roles))
+
+    def revenue_potential(self, quote_value, maturity_codes, decision_maker) -> np.ndarray:
+        is_enterprise = np.asarray(maturity_codes) == MATURITY_CODES[MaturityLevel.ENTERPRISE]
+        revenue = np.where(is_enterprise, quote_value * self.enterprise_multiplier, quote_value * self.default_multiplier)
+        return np.where(decision_maker, revenue * self.decision_maker_multiplier, revenue)
+
+    def hybrid_score(self, quote_value, item_count, past_engagements, decision_maker, segment_codes, ml_score) -> np.ndarray:
+        """
+        Business-rule points plus the capped ML contribution, capped at max_score.
+        Returned on the 0-100 scale.
+        """
+        points = self.base_score(quote_value)
+        points = points + np.where(decision_maker, self.decision_maker_points, 0)
+        points = points + np.where(self.high_value_segments[segment_codes], self.high_value_segment_points, 0)
+        points = points + self.engagement_points(past_engagements)
+        points = points + self.item_count_points(item_count)
+        return np.minimum(points + np.minimum(ml_score, self.ml_contribution_cap), self.max_score)
+
+
+# Global rule engine compiled from the rules file
+rule_engine = RuleEngine.from_file()
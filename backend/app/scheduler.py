@@ -7,12 +7,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
 from app.database import db
-from app.segmentation import enrich_lead_data
-from app.email_sender import send_sales_email
+from app.segmentation import resegment_stale_leads
+from app.campaign_executor import campaign_executor
+from app.leases import run_exclusive
 from app.use_cases import match_use_case
-from app.utils import generate_email_llama2, calculate_lead_score
-from app.model import model
-import time
+from app.utils import generate_email_llama2
 
 
 class AutomationScheduler:
@@ -21,6 +20,10 @@ class AutomationScheduler:
     1. Monthly customer segmentation
     2. Email campaign execution with throttling
     3. CRM data sync
+    
+    Every API worker starts its own scheduler. Segmentation and CRM sync
+    run under a job lease, so each trigger runs them in one worker only;
+    campaigns are claimed per campaign by the executor.
     """
     
     def __init__(self):
@@ -41,38 +44,39 @@ class AutomationScheduler:
                 print("⚠️ No leads found for segmentation")
                 return
             
-            updated_count = 0
-            segment_changes = {}
+            # Re-segment only leads whose inputs, rules or model changed
+            report = resegment_stale_leads(all_leads, datetime.now().isoformat())
+            for lead, error in report["failed"]:
+                print(f"Error segmenting {lead.get('company_name')}: {error}")
             
-            for lead in all_leads:
-                try:
-                    old_segment = lead.get("segment", "UNKNOWN")
-                    
-                    # Re-enrich and re-segment
-                    enriched = enrich_lead_data(lead)
-                    enriched['last_segmented_at'] = datetime.now().isoformat()
-                    
-                    new_segment = enriched.get("segment")
-                    
-                    # Track segment changes (upsell/cross-sell opportunities)
-                    if old_segment != new_segment:
-                        change_key = f"{old_segment} → {new_segment}"
-                        segment_changes[change_key] = segment_changes.get(change_key, 0) + 1
-                    
-                    # Save updated lead
-                    await db.save_lead(enriched)
-                    updated_count += 1
-                    
-                except Exception as e:
-                    print(f"Error segmenting {lead.get('company_name')}: {e}")
+            # Save only the fields that changed, in bulk
+            result = await db.update_leads_bulk(report["updates"])
+            updated_count = result["written"]
+            for error in result["errors"]:
+                print(f"Error segmenting {error['email']}: {error['error']}")
             
+            # Segment changes flag upsell/cross-sell opportunities
             print(f"✅ Monthly Segmentation Complete:")
             print(f"   - Total Leads Updated: {updated_count}")
-            print(f"   - Segment Changes: {segment_changes}")
+            print(f"   - Changed: {report['changed']}, Unchanged: {report['unchanged']}, Skipped: {report['skipped']}")
+            print(f"   - Segment Changes: {report['segment_changes']}")
             
         except Exception as e:
             print(f"❌ Monthly Segmentation Failed: {e}")
     
+    @staticmethod
+    def is_due(campaign: dict) -> bool:
+        send_time = campaign.get("send_time")
+        if not send_time:
+            return True
+        try:
+            send_at = datetime.fromisoformat(send_time)
+            # Timezone-aware send times ("...Z", "+05:30") compare against an aware now
+            return send_at <= datetime.now(send_at.tzinfo)
+        except (TypeError, ValueError):
+            print(f"Campaign execution error: invalid send_time '{send_time}' for {campaign.get('name')}")
+            return False
+    
     async def execute_scheduled_campaigns(self):
         """
         Execute scheduled email campaigns with throttling.
@@ -81,77 +85,20 @@ class AutomationScheduler:
         print(f"\n📧 Checking for Scheduled Campaigns at {datetime.now()}")
         
         try:
-            # Get all scheduled campaigns
-            campaigns = await db.get_all_campaigns()
-            scheduled = [c for c in campaigns if c.get("status") == "scheduled"]
+            # Get all scheduled campaigns, plus active ones an interrupted run left unfinished
+            scheduled = await db.get_campaigns_by_status("scheduled")
+            active = await db.get_campaigns_by_status("active")
             
-            if not scheduled:
+            if not scheduled and not active:
                 print("No campaigns scheduled for execution")
                 return
             
-            for campaign in scheduled:
-                try:
-                    # Check if campaign should run now
-                    send_time = campaign.get("send_time")
-                    if send_time and datetime.fromisoformat(send_time) > datetime.now():
-                        continue  # Not yet time
-                    
-                    print(f"🚀 Executing Campaign: {campaign['name']}")
-                    
-                    # Update status to active
-                    await db.update_campaign_status(
-                        str(campaign["_id"]), 
-                        status="active"
-                    )
-                    
-                    # Get target leads
-                    target_emails = campaign.get("target_leads", [])
-                    throttle_rate = campaign.get("throttle_rate", 10)  # emails per minute
-                    delay = 60 / throttle_rate  # seconds between emails
-                    
-                    use_case_id = campaign.get("use_case_id")
-                    emails_sent = 0
-                    
-                    # Send emails with throttling
-                    for email in target_emails[:50]:  # Limit to 50 per execution
-                        try:
-                            # Fetch lead data
-                            all_leads = await db.get_all_leads()
-                            lead = next((l for l in all_leads if l.get("email") == email), None)
-                            
-                            if not lead:
-                                continue
-                            
-                            # Generate and send email
-                            result = send_sales_email(
-                                customer_name=lead.get("company_name"),
-                                customer_email=email,
-                                lead_score=lead.get("lead_score", 0),
-                                quote_value=lead.get("quote_value", 0),
-                                item_count=lead.get("item_count", 0),
-                                subject=f"Exclusive {campaign['campaign_type']} Opportunity"
-                            )
-                            
-                            if result.get("success"):
-                                emails_sent += 1
-                            
-                            # Throttle - wait before next email
-                            time.sleep(delay)
-                            
-                        except Exception as e:
-                            print(f"Error sending to {email}: {e}")
-                    
-                    # Update campaign progress
-                    await db.update_campaign_status(
-                        str(campaign["_id"]),
-                        status="completed",
-                        emails_sent=emails_sent
-                    )
-                    
-                    print(f"✅ Campaign Complete: {emails_sent} emails sent")
-                    
-                except Exception as e:
-                    print(f"Campaign execution error: {e}")
+            # Campaigns whose send time has come
+            due = [campaign for campaign in scheduled if self.is_due(campaign)] + active
+            
+            # Campaigns drain in the background, off the event loop and paced per
+            # campaign; ones still running from an earlier check are skipped
+            campaign_executor.submit(due)
         
         except Exception as e:
             print(f"❌ Campaign Execution Failed: {e}")
@@ -177,8 +124,9 @@ class AutomationScheduler:
         
         # Monthly segmentation - Run on 1st day of month at 2 AM
         self.scheduler.add_job(
-            self.monthly_segmentation_job,
+            run_exclusive,
             CronTrigger(day=1, hour=2, minute=0),
+            args=["job:monthly_segmentation", self.monthly_segmentation_job],
             id="monthly_segmentation",
             name="Monthly Customer Segmentation"
         )
@@ -193,8 +141,9 @@ class AutomationScheduler:
         
         # CRM Sync - Daily at 1 AM
         self.scheduler.add_job(
-            self.sync_crm_data,
+            run_exclusive,
             CronTrigger(hour=1, minute=0),
+            args=["job:crm_sync", self.sync_crm_data],
             id="crm_sync",
             name="Daily CRM Data Sync"
         )
@@ -206,10 +155,11 @@ class AutomationScheduler:
         print("   - Campaign Execution: Every 15 minutes")
         print("   - CRM Sync: Daily at 1:00 AM")
     
-    def stop(self):
-        """Stop the scheduler"""
+    async def stop(self):
+        """Stop the scheduler and the campaigns it started; call it before closing the store"""
         if self.scheduler.running:
             self.scheduler.shutdown()
+            await campaign_executor.shutdown()
             self.is_running = False
             print("✅ Scheduler stopped")
 
@@ -1,7 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from enum import Enum
 from datetime import datetime
+import os
+
+# Maximum number of leads accepted by /predict/batch in one request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100000"))
 
 
 # Enums for structured data
@@ -61,6 +65,27 @@ class LeadInput(BaseModel):
 class LeadScoreResponse(BaseModel):
     lead_score: float
     conversion_probability: float
+    model_version: Optional[str] = None
+
+
+# Columnar batch scoring: one entry per lead at the same index in each array
+class LeadBatchInput(BaseModel):
+    quote_value: List[float] = Field(max_length=MAX_BATCH_SIZE)
+    item_count: List[int] = Field(max_length=MAX_BATCH_SIZE)
+    conversion_days: List[int] = Field(max_length=MAX_BATCH_SIZE)
+
+    @model_validator(mode="after")
+    def check_column_lengths(self):
+        size = len(self.quote_value)
+        if len(self.item_count) != size or len(self.conversion_days) != size:
+            raise ValueError("quote_value, item_count and conversion_days must have the same length")
+        return self
+
+
+class LeadBatchScoreResponse(BaseModel):
+    lead_score: List[float]
+    conversion_probability: List[float]
+    model_version: Optional[str] = None
 
 
 # Enhanced Lead Schema with Segmentation
@@ -79,6 +104,9 @@ class EnhancedLead(BaseModel):
     past_engagements: Optional[int] = 0
     revenue_potential: Optional[float] = 0.0
     last_segmented_at: Optional[str] = None
+    model_version: Optional[str] = None  # Model that produced lead_score
+    rules_version: Optional[str] = None  # Segmentation rules table version
+    input_fingerprint: Optional[str] = None  # Hash of the segmentation inputs
 
 
 # Use Case Schemas
@@ -187,6 +215,9 @@ class SegmentationRequest(BaseModel):
 class SegmentationResponse(BaseModel):
     segments_updated: int
     segment_distribution: dict
+    skipped: int = 0
+    changed: int = 0
+    unchanged: int = 0
 
 
 # Cross-sell/Upsell Schemas
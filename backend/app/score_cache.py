@@ -0,0 +1,103 @@
+"""
+Bounded LRU cache in front of lead scoring model inference.
+Repeated (quote_value, item_count, conversion_days) triples are common in
+both the quote book and live traffic, so single-lead scoring looks them up
+here before calling the model.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "50000"))
+# Seconds between checks of the watched model file for changes
+SCORE_CACHE_CHECK_INTERVAL = float(os.getenv("SCORE_CACHE_CHECK_INTERVAL", "5"))
+
+
+class ScoreCache:
+    """
+    LRU cache keyed on (model_version, features).
+    Cleared automatically when the watched model file changes on disk.
+    """
+
+    def __init__(self, maxsize: int = SCORE_CACHE_SIZE, check_interval: float = SCORE_CACHE_CHECK_INTERVAL):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._watch_path = None
+        self._file_signature = None
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def watch(self, path: str):
+        """Clear the cache whenever `path` is modified or replaced."""
+        self._watch_path = path
+        self._file_signature = self._signature(path)
+        self._next_check = time.monotonic() + self.check_interval
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            return None
+
+    def _check_model_file(self):
+        now = time.monotonic()
+        if self._watch_path is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._signature(self._watch_path)
+        if signature != self._file_signature:
+            self._file_signature = signature
+            self._entries.clear()
+            print(f"🔄 Model file changed, score cache cleared: {self._watch_path}")
+
+    def get_or_compute(self, model_version, features: tuple, compute):
+        """
+        Return the cached result for (model_version, features),
+        calling compute() and storing its result on a miss.
+        """
+        key = (model_version, features)
+        with self._lock:
+            self._check_model_file()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so slow inference doesn't serialize callers
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global cache instance
+score_cache = ScoreCache()
@@ -0,0 +1,133 @@
+"""
+Dependency-free NumPy scoring kernel for the lead scoring model.
+
+The fitted scikit-learn estimator is exported once (see export_model.py)
+into a compact .npz archive of plain arrays. Serving processes load that
+archive with NumPy only, so scikit-learn is never imported at startup and
+predictions skip predict_proba's input validation overhead.
+
+Supported estimators:
+- Linear classifiers (LogisticRegression): coefficients + intercept
+- Decision trees and random forests: flattened node/threshold arrays
+"""
+import numpy as np
+
+KERNEL_LINEAR = "linear"
+KERNEL_TREES = "trees"
+
+
+def export_model(estimator, path: str):
+    """
+    Export a fitted scikit-learn classifier to a NumPy .npz archive.
+    Raises ValueError for estimator types the kernel cannot evaluate.
+    """
+    classes = np.asarray(estimator.classes_)
+
+    if hasattr(estimator, "coef_") and hasattr(estimator, "intercept_"):
+        np.savez(
+            path,
+            kind=np.array(KERNEL_LINEAR),
+            classes=classes,
+            coef=np.asarray(estimator.coef_, dtype=np.float64),
+            intercept=np.asarray(estimator.intercept_, dtype=np.float64)
+        )
+        return
+
+    if hasattr(estimator, "tree_"):
+        trees = [estimator.tree_]
+    elif hasattr(estimator, "estimators_") and all(hasattr(t, "tree_") for t in estimator.estimators_):
+        # Bagged ensembles (RandomForest / ExtraTrees) average per-tree probabilities
+        trees = [t.tree_ for t in estimator.estimators_]
+    else:
+        raise ValueError(f"Unsupported estimator for NumPy kernel: {type(estimator).__name__}")
+
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        node_count = tree.node_count
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        # Leaves point to themselves so traversal can run a fixed number of steps
+        own_index = np.arange(node_count) + offset
+        left.append(np.where(is_leaf, own_index, tree.children_left + offset))
+        right.append(np.where(is_leaf, own_index, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        leaf_values = tree.value[:, 0, :]
+        value.append(leaf_values / leaf_values.sum(axis=1, keepdims=True))
+        offset += node_count
+
+    np.savez(
+        path,
+        kind=np.array(KERNEL_TREES),
+        classes=classes,
+        roots=np.asarray(roots, dtype=np.int64),
+        left=np.concatenate(left).astype(np.int64),
+        right=np.concatenate(right).astype(np.int64),
+        feature=np.concatenate(feature).astype(np.int64),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        value=np.concatenate(value).astype(np.float64),
+        max_depth=np.array(max(tree.max_depth for tree in trees))
+    )
+
+
+class KernelModel:
+    """
+    Drop-in replacement for the estimator's predict_proba,
+    evaluated with NumPy array operations only.
+    """
+
+    def __init__(self, arrays: dict):
+        self.kind = str(arrays["kind"])
+        self.classes_ = arrays["classes"]
+
+        if self.kind == KERNEL_LINEAR:
+            self.coef = arrays["coef"]
+            self.intercept = arrays["intercept"]
+        elif self.kind == KERNEL_TREES:
+            self.roots = arrays["roots"]
+            self.left = arrays["left"]
+            self.right = arrays["right"]
+            self.feature = arrays["feature"]
+            self.threshold = arrays["threshold"]
+            self.value = arrays["value"]
+            self.max_depth = int(arrays["max_depth"])
+        else:
+            raise ValueError(f"Unknown kernel kind: {self.kind}")
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if self.kind == KERNEL_LINEAR:
+            return self._predict_linear(X)
+        return self._predict_trees(X)
+
+    def _predict_linear(self, X: np.ndarray) -> np.ndarray:
+        decision = X @ self.coef.T + self.intercept
+        if decision.shape[1] == 1:
+            # Binary case: logistic sigmoid (exp overflow correctly yields 0)
+            with np.errstate(over="ignore"):
+                positive = 1.0 / (1.0 + np.exp(-decision[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        # Multinomial case: softmax over classes
+        decision = decision - decision.max(axis=1, keepdims=True)
+        exp = np.exp(decision)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def _predict_trees(self, X: np.ndarray) -> np.ndarray:
+        # scikit-learn trees compare float32 features against float64 thresholds
+        X = X.astype(np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+
+def load_kernel(path: str) -> KernelModel:
+    """Load an exported .npz archive into a KernelModel."""
+    with np.load(path, allow_pickle=False) as archive:
+        return KernelModel({key: archive[key] for key in archive.files})
@@ -1,96 +1,63 @@
 from app.schemas import Industry, MaturityLevel, Segment, JobRole
+import hashlib
+import json
 import random
-from app.model import model
-from app.utils import calculate_lead_score
+import numpy as np
+from app.model import get_model_snapshot
+from app.classifiers import industry_classifier, job_title_normalizer
+from app.rules import (
+    rule_engine, INDUSTRY_CODES, MATURITY_CODES, SEGMENT_CODES, INDUSTRIES, MATURITY_LEVELS, SEGMENTS
+)
+from app.utils import calculate_lead_score, calculate_lead_scores
+
+# Leads scored per predict_proba call in enrich_leads_batch
+BATCH_CHUNK_SIZE = 5000
+
+# Lead fields that feed segmentation and scoring; their hash is stored as input_fingerprint
+FINGERPRINT_FIELDS = (
+    'company_name', 'customer_name', 'quote_value', 'item_count',
+    'conversion_days', 'past_engagements', 'job_role', 'role'
+)
+
+# Fields written on every re-segmentation; a lead whose other fields are
+# unchanged counts as "unchanged" even if these are updated
+SEGMENTATION_BOOKKEEPING_FIELDS = ('input_fingerprint', 'model_version', 'rules_version', 'last_segmented_at')
 
 def determine_industry(company_name: str) -> Industry:
     """
     Determine industry based on company name keywords.
     In a real system, this would use an external API or detailed firmographic data.
+    Keyword lists are compiled into a single pattern (app/classifiers.py);
+    names with no keyword get a deterministic fallback, and results are
+    memoized per company name.
     """
-    name = company_name.lower()
-    
-    if any(x in name for x in ['tech', 'soft', 'data', 'cloud', 'ai', 'cyber', 'sys']):
-        return Industry.TECHNOLOGY
-    elif any(x in name for x in ['health', 'med', 'pharma', 'care', 'bio']):
-        return Industry.HEALTHCARE
-    elif any(x in name for x in ['bank', 'fin', 'capital', 'invest', 'insur']):
-        return Industry.FINANCE
-    elif any(x in name for x in ['shop', 'retail', 'store', 'market']):
-        return Industry.RETAIL
-    elif any(x in name for x in ['mfg', 'ind', 'eng', 'construct', 'build']):
-        return Industry.MANUFACTURING
-    elif any(x in name for x in ['edu', 'school', 'univ', 'learn']):
-        return Industry.EDUCATION
-    else:
-        # Randomly assign for demo purposes if no keyword match
-        return random.choice([Industry.TECHNOLOGY, Industry.MANUFACTURING, Industry.FINANCE, Industry.OTHER])
+    return industry_classifier.classify(company_name)
 
 def determine_maturity(quote_value: float, item_count: int, past_engagements: int = 0) -> MaturityLevel:
     """
     Determine customer maturity based on spending and engagement.
+    Thresholds come from the rules table (app/segmentation_rules.json).
     """
-    if quote_value > 50000 or item_count > 100:
-        return MaturityLevel.ENTERPRISE
-    elif quote_value > 10000 or item_count > 20:
-        return MaturityLevel.MATURE
-    elif quote_value > 5000:
-        return MaturityLevel.GROWTH
-    else:
-        return MaturityLevel.EARLY_STAGE
+    return MATURITY_LEVELS[rule_engine.maturity(quote_value, item_count)]
 
 def assign_segment(industry: Industry, maturity: MaturityLevel) -> Segment:
     """
     Assign a strategic segment based on Industry and Maturity.
+    Mapping comes from the rules table (app/segmentation_rules.json).
     """
-    if industry == Industry.TECHNOLOGY and maturity in [MaturityLevel.MATURE, MaturityLevel.ENTERPRISE]:
-        return Segment.HIGH_VALUE_TECH
-    elif industry == Industry.HEALTHCARE:
-        return Segment.HEALTHCARE_INNOVATORS
-    elif industry == Industry.FINANCE and maturity == MaturityLevel.ENTERPRISE:
-        return Segment.FINANCIAL_ENTERPRISE
-    elif industry == Industry.RETAIL and maturity == MaturityLevel.GROWTH:
-        return Segment.RETAIL_GROWTH
-    elif industry == Industry.MANUFACTURING:
-        return Segment.MANUFACTURING_DIGITAL
-    elif industry == Industry.EDUCATION:
-        return Segment.EDUCATION_TECH
-    else:
-        return Segment.GENERAL
+    industry_code = INDUSTRY_CODES[Industry(industry)]
+    maturity_code = MATURITY_CODES[MaturityLevel(maturity)]
+    return SEGMENTS[rule_engine.segment(industry_code, maturity_code)]
 
 
 def determine_job_role(role_string: str = None) -> JobRole:
     """
     Determine job role from string input.
     Used for decision-maker identification per problem statement.
+    Titles are matched on canonical token sets and interned, so a title
+    seen before costs one dict lookup (app/classifiers.py).
     """
-    if not role_string:
-        return JobRole.OTHER
-    
-    role_lower = role_string.lower()
-    
-    if 'cto' in role_lower or 'chief technology' in role_lower:
-        return JobRole.CTO
-    elif 'cio' in role_lower or 'chief information' in role_lower:
-        return JobRole.CIO
-    elif 'cfo' in role_lower or 'chief financial' in role_lower:
-        return JobRole.CFO
-    elif 'ceo' in role_lower or 'chief executive' in role_lower:
-        return JobRole.CEO
-    elif 'vp' in role_lower and 'eng' in role_lower:
-        return JobRole.VP_ENGINEERING
-    elif 'vp' in role_lower and 'sales' in role_lower:
-        return JobRole.VP_SALES
-    elif 'vp' in role_lower and 'operation' in role_lower:
-        return JobRole.VP_OPERATIONS
-    elif 'director' in role_lower and 'it' in role_lower:
-        return JobRole.DIRECTOR_IT
-    elif 'manager' in role_lower:
-        return JobRole.MANAGER
-    elif 'procurement' in role_lower or 'purchasing' in role_lower:
-        return JobRole.PROCUREMENT
-    else:
-        return JobRole.OTHER
+    return job_title_normalizer.resolve(role_string)
 
 
 def is_decision_maker(job_role: JobRole) -> bool:
@@ -98,10 +65,7 @@ def is_decision_maker(job_role: JobRole) -> bool:
     Identify if contact is a decision-maker (C-level or VP).
     Critical for prioritization per problem statement.
     """
-    return job_role in [
-        JobRole.CEO, JobRole.CTO, JobRole.CIO, JobRole.CFO,
-        JobRole.VP_ENGINEERING, JobRole.VP_SALES, JobRole.VP_OPERATIONS
-    ]
+    return rule_engine.is_decision_maker(job_role)
 
 
 def enrich_lead_data(lead_record: dict) -> dict:
@@ -135,56 +99,24 @@ def enrich_lead_data(lead_record: dict) -> dict:
     maturity = determine_maturity(quote_value, item_count, past_engagements)
     segment = assign_segment(industry, maturity)
     
-    # Calculate additional metrics
-    revenue_potential = quote_value * 1.5 if maturity == MaturityLevel.ENTERPRISE else quote_value * 1.2
-    
-    # Boost revenue potential for decision-makers
-    if is_decision_maker(job_role):
-        revenue_potential *= 1.3
+    # Calculate additional metrics (decision-makers boost revenue potential)
+    decision_maker = is_decision_maker(job_role)
+    revenue_potential = float(rule_engine.revenue_potential(quote_value, MATURITY_CODES[maturity], decision_maker))
     
     # Calculate lead score using ML model
     conversion_days = int(lead_record.get('conversion_days', 45) or 45)  # Default 45 days
+    model_version = None
     try:
         X = [[quote_value, item_count, conversion_days]]
-        ml_score, probability = calculate_lead_score(model, X)
-        
-        # Hybrid scoring: Start with Business Rules (more weight)
-        # Base score from deal size
-        if quote_value > 300000:
-            base_score = 50
-        elif quote_value > 150000:
-            base_score = 40
-        elif quote_value > 75000:
-            base_score = 35
-        elif quote_value > 30000:
-            base_score = 25
-        else:
-            base_score = 15
-        
-        # Boost for decision-makers (+20 points)
-        if is_decision_maker(job_role):
-            base_score += 25
-        
-        # Boost for high-value segments (+10 points)
-        if segment in [Segment.HIGH_VALUE_TECH, Segment.FINANCIAL_ENTERPRISE]:
-            base_score += 10
+        model, model_version = get_model_snapshot()
+        ml_score, probability = calculate_lead_score(model, X, model_version)
         
-        # Boost for multiple past engagements
-        if past_engagements > 10:
-            base_score += 10
-        elif past_engagements > 5:
-            base_score += 5
-        
-        # Boost based on item count (higher engagement)
-        if item_count > 400:
-            base_score += 5
-        
-        # Add ML model contribution (5-15 points based on its prediction)
-        ml_contribution = min(ml_score, 15)
-        hybrid_score = base_score + ml_contribution
-        
-        # Cap at 100
-        hybrid_score = min(hybrid_score, 100)
+        # Hybrid scoring: business-rule points (deal size, decision-maker,
+        # segment, engagements, item count) plus the capped ML contribution
+        hybrid_score = float(rule_engine.hybrid_score(
+            quote_value, item_count, past_engagements,
+            decision_maker, SEGMENT_CODES[segment], ml_score
+        ))
         
         # Convert to 0-1 scale for consistency (frontend expects decimal)
         lead_score = hybrid_score / 100
@@ -194,24 +126,224 @@ def enrich_lead_data(lead_record: dict) -> dict:
         # Fallback if model prediction fails
         lead_score = 0.5
         probability = 0.5
+        model_version = None
     
     # Update record
     lead_record['industry'] = industry
     lead_record['maturity_level'] = maturity
     lead_record['segment'] = segment
     lead_record['job_role'] = job_role
-    lead_record['is_decision_maker'] = is_decision_maker(job_role)
+    lead_record['is_decision_maker'] = decision_maker
     lead_record['revenue_potential'] = round(revenue_potential, 2)
     lead_record['past_engagements'] = past_engagements
     lead_record['lead_score'] = lead_score
     lead_record['conversion_probability'] = round(probability, 4)
+    lead_record['model_version'] = model_version
+    lead_record['rules_version'] = rule_engine.version
+    lead_record['input_fingerprint'] = lead_fingerprint(lead_record)
     
     return lead_record
 
 
+def _extract_lead_inputs(lead_record: dict) -> tuple:
+    """
+    Coerce the raw fields that feed segmentation and scoring, and resolve
+    the industry. The raw job title is returned as-is and resolved per
+    chunk with the batch title API.
+    Raises ValueError/TypeError/AttributeError for malformed fields.
+    """
+    company_name = lead_record.get('company_name', lead_record.get('customer_name', 'Unknown'))
+    quote_value = float(lead_record.get('quote_value', 0) or 0)
+    item_count = int(lead_record.get('item_count', 0) or 0)
+    conversion_days = int(lead_record.get('conversion_days', 45) or 45)
+    past_engagements = int(lead_record.get('past_engagements', 0) or 0)
+
+    job_title = lead_record.get('job_role') or lead_record.get('role')
+
+    industry = determine_industry(company_name)
+
+    return industry, quote_value, item_count, conversion_days, past_engagements, job_title
+
+
+def _enrich_chunk(records: list, inputs: list) -> list:
+    """
+    Enrich one chunk of lead records, given their extracted inputs, with array operations.
+    Mirrors enrich_lead_data rule for rule, with a single model call.
+    """
+    industries, quote_values, item_counts, conversion_days, engagements, job_titles = zip(*inputs)
+    job_roles = job_title_normalizer.resolve_many(job_titles)
+
+    quote_value = np.asarray(quote_values, dtype=float)
+    item_count = np.asarray(item_counts, dtype=np.int64)
+    days = np.asarray(conversion_days, dtype=np.int64)
+    past_engagements = np.asarray(engagements, dtype=np.int64)
+
+    # Simulate engagements where none were provided (for demo purposes)
+    missing = past_engagements == 0
+    past_engagements[missing] = np.random.randint(0, 6, size=int(missing.sum()))
+
+    industry_codes = np.fromiter((INDUSTRY_CODES[i] for i in industries), dtype=np.int64, count=len(industries))
+    decision_maker = rule_engine.decision_makers(job_roles)
+
+    # Rules table evaluated over whole columns
+    maturity_codes = rule_engine.maturity(quote_value, item_count)
+    segment_codes = rule_engine.segment(industry_codes, maturity_codes)
+    revenue_potential = rule_engine.revenue_potential(quote_value, maturity_codes, decision_maker)
+
+    model_version = None
+    try:
+        X = np.column_stack([quote_value, item_count, days])
+        model, model_version = get_model_snapshot()
+        ml_score, _ = calculate_lead_scores(model, X)
+
+        hybrid_score = rule_engine.hybrid_score(
+            quote_value, item_count, past_engagements,
+            decision_maker, segment_codes, ml_score
+        )
+        lead_score = hybrid_score / 100
+    except Exception:
+        # Fallback if model prediction fails
+        lead_score = np.full(len(records), 0.5)
+        model_version = None
+
+    industry = INDUSTRIES[industry_codes]
+    maturity = MATURITY_LEVELS[maturity_codes]
+    segment = SEGMENTS[segment_codes]
+    revenue_potential = np.round(revenue_potential, 2).tolist()
+    lead_score_list = lead_score.tolist()
+    probability = np.round(lead_score, 4).tolist()
+    past_engagements = past_engagements.tolist()
+
+    for i, record in enumerate(records):
+        record['industry'] = industry[i]
+        record['maturity_level'] = maturity[i]
+        record['segment'] = segment[i]
+        record['job_role'] = job_roles[i]
+        record['is_decision_maker'] = bool(decision_maker[i])
+        record['revenue_potential'] = revenue_potential[i]
+        record['past_engagements'] = past_engagements[i]
+        record['lead_score'] = lead_score_list[i]
+        record['conversion_probability'] = probability[i]
+        record['model_version'] = model_version
+        record['rules_version'] = rule_engine.version
+        record['input_fingerprint'] = lead_fingerprint(record)
+
+    return records
+
+
+def enrich_leads_batch(leads, chunk_size: int = BATCH_CHUNK_SIZE) -> tuple:
+    """
+    Vectorized counterpart of enrich_lead_data for bulk ingestion.
+    Accepts a list of lead dicts or a DataFrame and runs one model call
+    per chunk of `chunk_size` leads.
+
+    Returns (enriched, failed): the enriched records in input order, and
+    (record, error message) pairs for records whose fields could not be parsed.
+    """
+    if not isinstance(leads, list):
+        # DataFrame input; pandas is only needed on this path
+        import pandas as pd
+        leads = leads.replace([np.inf, -np.inf], None)
+        leads = leads.astype(object).where(pd.notna(leads), None).to_dict(orient="records")
+
+    enriched = []
+    failed = []
+    for start in range(0, len(leads), chunk_size):
+        valid = []
+        inputs = []
+        for record in leads[start:start + chunk_size]:
+            try:
+                inputs.append(_extract_lead_inputs(record))
+                valid.append(record)
+            except Exception as e:
+                failed.append((record, str(e)))
+        if valid:
+            enriched.extend(_enrich_chunk(valid, inputs))
+
+    return enriched, failed
+
+
+def lead_fingerprint(lead_record: dict) -> str:
+    """
+    Hash of the fields that feed segmentation and scoring, taken after
+    enrichment (resolved job role, simulated engagements) so that
+    re-enriching an untouched lead reproduces it.
+    """
+    values = [lead_record.get(field) for field in FINGERPRINT_FIELDS]
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def is_segmentation_stale(lead_record: dict, model_version: str = None) -> bool:
+    """
+    True if the lead's inputs, the rules version or the model version
+    changed since it was last segmented.
+    """
+    return (
+        lead_record.get('input_fingerprint') != lead_fingerprint(lead_record)
+        or lead_record.get('rules_version') != rule_engine.version
+        or lead_record.get('model_version') != model_version
+    )
+
+
+def resegment_stale_leads(leads: list, segmented_at: str) -> dict:
+    """
+    Re-segment only the leads whose fingerprint is stale and work out the
+    minimal $set for each.
+
+    Returns a report dict:
+    - updates: (lead, fields) pairs, where fields holds only values that
+      differ from the stored document
+    - skipped / changed / unchanged: lead counts (unchanged leads only get
+      their fingerprint and versions refreshed)
+    - failed: (lead, error message) pairs
+    - segment_changes: {"old → new": count}
+    """
+    try:
+        model_version = get_model_snapshot()[1]
+    except Exception:
+        model_version = None
+
+    stale = [lead for lead in leads if is_segmentation_stale(lead, model_version)]
+    # Enrichment mutates the records, so keep the stored values to diff against
+    stored = {id(lead): dict(lead) for lead in stale}
+
+    enriched_leads, failed = enrich_leads_batch(stale)
+
+    report = {
+        "updates": [],
+        "skipped": len(leads) - len(stale),
+        "changed": 0,
+        "unchanged": 0,
+        "failed": failed,
+        "segment_changes": {}
+    }
+    for enriched in enriched_leads:
+        enriched['last_segmented_at'] = segmented_at
+        before = stored[id(enriched)]
+        fields = {
+            key: value for key, value in enriched.items()
+            if key not in before or before[key] != value
+        }
+        if any(key not in SEGMENTATION_BOOKKEEPING_FIELDS for key in fields):
+            report["changed"] += 1
+        else:
+            report["unchanged"] += 1
+
+        old_segment = before.get('segment', 'UNKNOWN')
+        if old_segment != enriched['segment']:
+            change_key = f"{old_segment} → {enriched['segment'].value}"
+            report["segment_changes"][change_key] = report["segment_changes"].get(change_key, 0) + 1
+
+        report["updates"].append((enriched, fields))
+
+    return report
+
+
 def resegment_all_leads(leads: list) -> list:
     """
     Re-segment all leads for monthly automation.
     Problem statement requirement: "AI segments customers monthly"
     """
-    return [enrich_lead_data(lead) for lead in leads]
+    enriched, _ = enrich_leads_batch(leads)
+    return enriched
@@ -0,0 +1,39 @@
+"""
+Fast JSON encoding for API responses, built on orjson.
+
+orjson natively handles what sanitize_json_data used to walk in Python:
+NaN and inf are written as null, and NumPy scalars/arrays, datetimes and
+our str Enums are encoded directly. ObjectIds are written as hex strings.
+"""
+from datetime import date, datetime
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        # Subclasses such as pandas.Timestamp
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """Encode obj to JSON bytes"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    Returning an instance directly from an endpoint also skips FastAPI's
+    jsonable_encoder pass over the content.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,185 @@
+"""
+Pool of persistent, authenticated SMTP sessions.
+
+Opening a session costs a TCP connect, EHLO, STARTTLS and AUTH; at
+campaign volume that handshake costs more than the send itself.
+SMTPConnectionPool keeps up to `size` sessions open and reuses them:
+- a session idle for longer than `keepalive` seconds is checked with NOOP
+  before reuse and replaced if the server has dropped it
+- a send that fails with 421 (at MAIL, RCPT or DATA), a disconnect or a
+  socket error/timeout is retried once on a fresh session
+- a session is retired (QUIT) after `max_messages` messages
+The pool is thread-safe; sends run on the campaign executor's threads.
+"""
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Idle seconds after which a session is probed with NOOP before reuse
+SMTP_KEEPALIVE_SECONDS = float(os.getenv("SMTP_KEEPALIVE_SECONDS", "30"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+# Reply code of a server closing the transmission channel (busy, shutting down, idle timeout)
+SERVICE_NOT_AVAILABLE = 421
+
+
+class PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of reusable SMTP sessions"""
+
+    def __init__(self, host: str, port: int, user: str = None, password: str = None,
+                 size: int = SMTP_POOL_SIZE, max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 keepalive: float = SMTP_KEEPALIVE_SECONDS, timeout: float = SMTP_TIMEOUT,
+                 starttls: bool = SMTP_STARTTLS):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.starttls = starttls
+        # Most recently used sessions are reused first, so extra ones age out
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+        self.reconnects = 0
+        self.retired = 0
+        self.noops = 0
+        self.messages_sent = 0
+
+    def _connect(self) -> PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.opened += 1
+        return PooledConnection(server)
+
+    def _is_alive(self, connection: PooledConnection) -> bool:
+        with self._lock:
+            self.noops += 1
+        try:
+            return connection.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self) -> PooledConnection:
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            if time.monotonic() - connection.last_used < self.keepalive or self._is_alive(connection):
+                return connection
+            self._discard(connection)
+
+    def _checkin(self, connection: PooledConnection):
+        if connection.server.sock is None:
+            # smtplib already closed the session (e.g. on a 421 reply)
+            return
+        connection.messages += 1
+        connection.last_used = time.monotonic()
+        if connection.messages >= self.max_messages:
+            with self._lock:
+                self.retired += 1
+            self._quit(connection)
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    @staticmethod
+    def _discard(connection: PooledConnection):
+        try:
+            connection.server.close()
+        except OSError:
+            pass
+
+    def _quit(self, connection: PooledConnection):
+        try:
+            connection.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._discard(connection)
+
+    def send(self, message):
+        """
+        Send an email.message.Message on a pooled session.
+        Raises the smtplib exception if the send fails for any reason
+        other than a dropped session, or fails again after reconnecting.
+        """
+        with self._slots:
+            for attempt in range(2):
+                connection = self._checkout()
+                try:
+                    connection.server.send_message(message)
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code != SERVICE_NOT_AVAILABLE:
+                        # Refused sender, recipients or data: the session itself is still usable
+                        self._checkin(connection)
+                        raise
+                    error = e
+                except smtplib.SMTPRecipientsRefused as e:
+                    # smtplib closes the session and raises this on a 421 at RCPT
+                    if all(code != SERVICE_NOT_AVAILABLE for code, _ in e.recipients.values()):
+                        self._checkin(connection)
+                        raise
+                    error = e
+                except smtplib.SMTPServerDisconnected as e:
+                    error = e
+                except smtplib.SMTPException:
+                    self._checkin(connection)
+                    raise
+                except OSError as e:
+                    # Socket errors and timeouts
+                    error = e
+                else:
+                    with self._lock:
+                        self.messages_sent += 1
+                    self._checkin(connection)
+                    return
+
+                # The session is gone (421, disconnect, socket error): retry once on a fresh one
+                self._discard(connection)
+                if attempt:
+                    raise error
+                with self._lock:
+                    self.reconnects += 1
+
+    def close(self):
+        """QUIT every idle session"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._quit(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "opened": self.opened,
+                "reconnects": self.reconnects,
+                "retired": self.retired,
+                "noops": self.noops,
+                "messages_sent": self.messages_sent,
+                "messages_per_connection": round(self.messages_sent / self.opened, 2) if self.opened else 0.0
+            }
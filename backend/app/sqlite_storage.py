@@ -0,0 +1,644 @@
+"""
+Embedded SQLite storage backend, selected with STORAGE_BACKEND=sqlite.
+
+Runs the API without a MongoDB server (single-node installs, demos,
+Mongo outages) and keeps analytics in SQL. Each document is stored as
+JSON next to typed columns for the fields that are filtered, sorted or
+aggregated (email, segment, industry, lead_score, revenue_potential,
+last_segmented_at), so those queries are served from indexes and
+segment analytics are a single GROUP BY.
+
+Documents are JSON-encoded with app.serialization, so NumPy scalars and
+Enums are stored as plain values and datetimes as ISO strings. Ids are
+ObjectIds, as with MongoDB, so page tokens and `_id` handling are shared.
+
+sqlite3 is blocking: every statement runs on one dedicated worker thread,
+which also serializes access to the connection.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import orjson
+from bson import ObjectId
+
+from app.database import (
+    DB_NAME, BULK_WRITE_BATCH_SIZE, LEADS_PAGE_SIZE, LEAD_PAGE_ORDERS, STREAM_BATCH_SIZE,
+    StorageBackend, decode_page_token, encode_page_token, _copy_documents, _projection_key
+)
+from app.read_cache import lead_cache
+from app.serialization import dumps
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", f"{DB_NAME}.sqlite3")
+# Page cache per connection; index maintenance on large lead tables slows sharply once it spills
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "256"))
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS leads (
+        id TEXT PRIMARY KEY,
+        email TEXT UNIQUE,
+        segment TEXT,
+        industry TEXT,
+        lead_score REAL,
+        revenue_potential REAL,
+        last_segmented_at TEXT,
+        doc TEXT NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS use_cases (id TEXT PRIMARY KEY, doc TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS campaigns (
+        id TEXT PRIMARY KEY,
+        status TEXT,
+        send_time TEXT,
+        doc TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS deliveries (
+        id TEXT PRIMARY KEY,
+        campaign_id TEXT NOT NULL,
+        email TEXT NOT NULL,
+        state TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        updated_at TEXT,
+        claimed_by TEXT,
+        UNIQUE (campaign_id, email)
+    )""",
+    # expires_at is epoch seconds
+    "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)",
+]
+
+# Columns added after their table was first created: (table, column, declaration)
+MIGRATIONS = [
+    ("deliveries", "claimed_by", "TEXT"),
+]
+
+# Counterparts of INDEX_SPECS in app/database.py; email uniqueness is part of the table
+INDEXES = [
+    # Serves segment filters and covers the segment analytics GROUP BY
+    "CREATE INDEX IF NOT EXISTS leads_segment_analytics ON leads (segment, industry, lead_score, revenue_potential)",
+    "CREATE INDEX IF NOT EXISTS leads_lead_score_id ON leads (lead_score DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS leads_last_segmented_at ON leads (last_segmented_at)",
+    "CREATE INDEX IF NOT EXISTS campaigns_status_send_time ON campaigns (status, send_time)",
+    "CREATE INDEX IF NOT EXISTS deliveries_campaign_state ON deliveries (campaign_id, state, attempts)",
+]
+
+# Per-segment/industry partial sums; folded into the same documents SEGMENT_ANALYTICS_PIPELINE returns
+SEGMENT_ANALYTICS_SQL = """
+    SELECT COALESCE(segment, 'GENERAL') AS segment,
+           COALESCE(industry, 'OTHER') AS industry,
+           COUNT(*),
+           TOTAL(revenue_potential),
+           TOTAL(lead_score)
+    FROM leads
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+LEAD_ORDER_SQL = {
+    "_id": "id ASC",
+    "lead_score": "lead_score DESC, id DESC",
+}
+
+
+def _keyset_clause(order: str, values: list) -> tuple:
+    """SQL counterpart of app.database._keyset_filter"""
+    if order == "_id":
+        return "id > ?", [str(values[0])]
+    score, last_id = values
+    if score is None:
+        # Leads without a score sort last in descending order
+        return "lead_score IS NULL AND id < ?", [str(last_id)]
+    return "(lead_score < ? OR (lead_score = ? AND id < ?) OR lead_score IS NULL)", [score, score, str(last_id)]
+
+
+def _project(doc: dict, projection: dict = None) -> dict:
+    """Apply a MongoDB-style inclusion or exclusion projection"""
+    if not projection:
+        return doc
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and all(fields.values()):
+        projected = {key: doc[key] for key in fields if key in doc}
+        if include_id and "_id" in doc:
+            projected = {"_id": doc["_id"], **projected}
+        return projected
+    projected = {key: value for key, value in doc.items() if key not in fields}
+    if not include_id:
+        projected.pop("_id", None)
+    return projected
+
+
+def _load(row_id: str, doc_json: str) -> dict:
+    return {"_id": ObjectId(row_id), **orjson.loads(doc_json)}
+
+
+def _encode(doc: dict) -> tuple:
+    """(JSON text, JSON-normalized copy) of a document without its _id"""
+    body = {key: value for key, value in doc.items() if key != "_id"}
+    encoded = dumps(body)
+    return encoded.decode("utf-8"), orjson.loads(encoded)
+
+
+def _column(value, numeric: bool = False):
+    if numeric:
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return value if isinstance(value, str) else None
+
+
+def _lead_row(row_id: str, doc: dict) -> tuple:
+    doc_json, stored = _encode(doc)
+    return (
+        row_id,
+        _column(stored.get("email")),
+        _column(stored.get("segment")),
+        _column(stored.get("industry")),
+        _column(stored.get("lead_score"), numeric=True),
+        _column(stored.get("revenue_potential"), numeric=True),
+        _column(stored.get("last_segmented_at")),
+        doc_json
+    )
+
+
+class SQLiteDatabase(StorageBackend):
+    """Embedded SQLite backend"""
+    db: sqlite3.Connection = None
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._executor = None
+
+    def connect(self):
+        """Open (creating if needed) the SQLite database file."""
+        try:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+            self.db = self._executor.submit(self._open).result()
+            print(f"✅ Connected to SQLite: {self.path}")
+        except Exception as e:
+            self.db = None
+            print(f"❌ SQLite Connection Error: {e}")
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        for statement in SCHEMA:
+            connection.execute(statement)
+        for table, column, declaration in MIGRATIONS:
+            if column not in {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        connection.commit()
+        return connection
+
+    async def _run(self, fn, *args):
+        """Run a blocking sqlite3 call on the connection's worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def ensure_indexes(self):
+        """Create the indexes in INDEXES; existing ones are a no-op."""
+        if self.db is None: return
+        try:
+            await self._run(self._create_indexes)
+            print("✅ SQLite indexes ensured")
+        except Exception as e:
+            print(f"❌ SQLite index provisioning failed: {e}")
+
+    def _create_indexes(self):
+        for statement in INDEXES:
+            self.db.execute(statement)
+        self.db.commit()
+
+    def close(self):
+        """Close the SQLite connection."""
+        if self.db is not None:
+            self._executor.submit(self.db.close).result()
+            self._executor.shutdown()
+            self.db = None
+            print("❌ Closed SQLite connection")
+
+    # --- Lead reads ---
+
+    def _select_leads(self, where: str = "", params: list = (), order_by: str = "id ASC",
+                      limit: int = None, projection: dict = None) -> list:
+        sql = f"SELECT id, doc FROM leads {f'WHERE {where}' if where else ''} ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [_project(_load(row_id, doc), projection) for row_id, doc in self.db.execute(sql, list(params))]
+
+    async def get_all_leads(self, limit=1000, projection: dict = None):
+        if self.db is None: return []
+
+        async def load():
+            return await self._run(lambda: self._select_leads(limit=limit, projection=projection))
+
+        if not lead_cache.enabled:
+            return await load()
+        leads = await lead_cache.get_or_load(("all_leads", limit, _projection_key(projection)), load)
+        return _copy_documents(leads)
+
+    def _leads_page(self, limit: int, values: list, order: str, projection: dict) -> tuple:
+        where, params = _keyset_clause(order, values) if values is not None else ("", [])
+        if projection is not None:
+            # Sort keys are needed to build the next token
+            projection = {**projection, **{key: 1 for key, _ in LEAD_PAGE_ORDERS[order]}}
+        leads = self._select_leads(where, params, LEAD_ORDER_SQL[order], limit, projection)
+        next_after = encode_page_token(leads[-1], order) if len(leads) == limit else None
+        return leads, next_after
+
+    async def get_leads_page(self, limit: int = LEADS_PAGE_SIZE, after: str = None,
+                             order: str = "_id", projection: dict = None) -> tuple:
+        """
+        One keyset-paginated page of leads; same tokens and orders as the
+        MongoDB backend. Raises ValueError for an unknown order or a bad token.
+        """
+        if order not in LEAD_PAGE_ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {', '.join(LEAD_PAGE_ORDERS)}")
+        values = decode_page_token(after, order) if after else None
+        if self.db is None: return [], None
+
+        async def load():
+            return await self._run(self._leads_page, limit, values, order, projection)
+
+        if not lead_cache.enabled:
+            return await load()
+        leads, next_after = await lead_cache.get_or_load(
+            ("leads_page", limit, after, order, _projection_key(projection)), load
+        )
+        return _copy_documents(leads), next_after
+
+    def iter_leads(self, order: str = "_id", projection: dict = None, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Async iterator over every lead in a stable order, fetched in keyset
+        pages of `batch_size`. Raises ValueError for an unknown order.
+        """
+        if order not in LEAD_PAGE_ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {', '.join(LEAD_PAGE_ORDERS)}")
+        return self._iter_leads(order, projection, batch_size)
+
+    async def _iter_leads(self, order: str, projection: dict, batch_size: int):
+        values = None
+        while True:
+            leads, next_after = await self._run(self._leads_page, batch_size, values, order, projection)
+            for lead in leads:
+                yield lead
+            if next_after is None:
+                return
+            values = decode_page_token(next_after, order)
+
+    async def get_leads_by_segment(self, segment: str, projection: dict = None):
+        if self.db is None: return []
+
+        async def load():
+            return await self._run(lambda: self._select_leads("segment = ?", [segment], projection=projection))
+
+        if not lead_cache.enabled:
+            return await load()
+        leads = await lead_cache.get_or_load(("leads_by_segment", segment, _projection_key(projection)), load)
+        return _copy_documents(leads)
+
+    def _leads_by_emails(self, emails: list, projection: dict) -> dict:
+        leads = {}
+        for start in range(0, len(emails), 500):
+            chunk = emails[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for lead in self._select_leads(f"email IN ({placeholders})", chunk, projection=projection):
+                leads[lead["email"]] = lead
+        return leads
+
+    async def get_leads_by_emails(self, emails: list, projection: dict = None) -> dict:
+        """{email: lead} for the given emails; emails without a stored lead are absent"""
+        if self.db is None or not emails: return {}
+        if projection is not None:
+            projection = {**projection, "email": 1}
+        return await self._run(self._leads_by_emails, list(emails), projection)
+
+    def _segment_analytics(self) -> list:
+        segments = {}
+        for segment, industry, count, revenue, score in self.db.execute(SEGMENT_ANALYTICS_SQL):
+            stats = segments.setdefault(segment, {
+                "_id": segment, "count": 0, "total_revenue_potential": 0, "total_lead_score": 0, "top_industries": {}
+            })
+            stats["count"] += count
+            stats["total_revenue_potential"] += revenue
+            stats["total_lead_score"] += score
+            stats["top_industries"][industry] = count
+
+        for stats in segments.values():
+            stats["avg_lead_score"] = round(stats.pop("total_lead_score") / stats["count"], 2)
+            stats["avg_revenue_potential"] = round(stats["total_revenue_potential"] / stats["count"], 2)
+        return list(segments.values())
+
+    async def get_segment_analytics(self) -> list:
+        """Per-segment stats in the shape of SEGMENT_ANALYTICS_PIPELINE's output, aggregated in SQL"""
+        if self.db is None: return []
+
+        async def load():
+            return await self._run(self._segment_analytics)
+
+        if not lead_cache.enabled:
+            return await load()
+        return _copy_documents(await lead_cache.get_or_load(("segment_analytics",), load))
+
+    # --- Lead writes ---
+
+    def _write_leads(self, rows: list, updates_only: bool):
+        if updates_only:
+            self.db.executemany(
+                "UPDATE leads SET email = ?, segment = ?, industry = ?, lead_score = ?, revenue_potential = ?, "
+                "last_segmented_at = ?, doc = ? WHERE id = ?",
+                [row[1:] + row[:1] for row in rows]
+            )
+        else:
+            self.db.executemany(
+                "INSERT INTO leads (id, email, segment, industry, lead_score, revenue_potential, last_segmented_at, doc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET email = excluded.email, "
+                "segment = excluded.segment, industry = excluded.industry, lead_score = excluded.lead_score, "
+                "revenue_potential = excluded.revenue_potential, last_segmented_at = excluded.last_segmented_at, "
+                "doc = excluded.doc",
+                rows
+            )
+
+    def _existing(self, column: str, keys: list) -> dict:
+        """{key: (id, doc)} for the leads whose `column` is in keys"""
+        existing = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for row_id, key, doc in self.db.execute(
+                f"SELECT id, {column}, doc FROM leads WHERE {column} IN ({placeholders})", chunk
+            ):
+                existing[key] = (row_id, _load(row_id, doc))
+        return existing
+
+    def _upsert_batch(self, batch: list, errors: list) -> int:
+        """
+        $set-style upserts by email for (index, lead) pairs, in one transaction.
+        Leads that cannot be encoded are appended to `errors` (expected empty);
+        returns the number written.
+        """
+        existing = self._existing("email", list({lead["email"] for _, lead in batch}))
+        rows = {}
+        for index, lead in batch:
+            try:
+                row_id, doc = existing.get(lead["email"]) or (str(lead.get("_id") or ObjectId()), {})
+                doc = {**doc, **lead}
+                rows[row_id] = _lead_row(row_id, doc)
+                # Later leads with the same email merge into this one, as sequential upserts would
+                existing[lead["email"]] = (row_id, doc)
+            except Exception as e:
+                errors.append({"index": index, "email": lead.get("email"), "error": str(e)})
+        with self.db:
+            self._write_leads(list(rows.values()), updates_only=False)
+        return len(batch) - len(errors)
+
+    def _update_batch(self, batch: list, errors: list) -> int:
+        """$set `fields` on each lead's _id for (index, lead, fields) triples; returns the number written"""
+        existing = self._existing("id", list({str(lead["_id"]) for _, lead, _ in batch}))
+        rows = {}
+        written = 0
+        for index, lead, fields in batch:
+            row_id = str(lead["_id"])
+            try:
+                if row_id in existing:
+                    doc = {**existing[row_id][1], **fields}
+                    rows[row_id] = _lead_row(row_id, doc)
+                    existing[row_id] = (row_id, doc)
+                written += 1
+            except Exception as e:
+                errors.append({"index": index, "email": lead.get("email"), "error": str(e)})
+        with self.db:
+            self._write_leads(list(rows.values()), updates_only=True)
+        return written
+
+    async def save_lead(self, lead_data: dict):
+        if self.db is None: return
+        try:
+            errors = []
+            await self._run(self._upsert_batch, [(0, lead_data)], errors)
+            if errors:
+                raise ValueError(errors[0]["error"])
+        finally:
+            lead_cache.invalidate()
+
+    async def update_lead_fields(self, lead_id, fields: dict):
+        """$set only the given fields on an existing lead"""
+        if self.db is None or not fields: return
+        try:
+            await self._run(self._update_batch, [(0, {"_id": lead_id}, fields)], [])
+        finally:
+            lead_cache.invalidate()
+
+    async def save_leads_bulk(self, leads: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        """
+        Upsert leads by email, one transaction per batch.
+        Returns {"written": n, "errors": [...]} like the MongoDB backend.
+        """
+        operations = []
+        errors = []
+        for index, lead in enumerate(leads):
+            if not lead.get("email"):
+                errors.append({"index": index, "email": None, "error": "Lead has no email"})
+                continue
+            operations.append((index, lead))
+        return await self._bulk_write_leads(self._upsert_batch, operations, leads, errors, batch_size)
+
+    async def update_leads_bulk(self, updates: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> dict:
+        """Bulk counterpart of update_lead_fields; `updates` holds (lead, fields) pairs."""
+        operations = [(index, lead, fields) for index, (lead, fields) in enumerate(updates) if fields]
+        return await self._bulk_write_leads(self._update_batch, operations, [lead for lead, _ in updates], [], batch_size)
+
+    async def _bulk_write_leads(self, write_batch, operations: list, leads: list, errors: list, batch_size: int) -> dict:
+        if self.db is None:
+            return {"written": 0, "errors": errors}
+
+        written = 0
+        for start in range(0, len(operations), batch_size):
+            batch = operations[start:start + batch_size]
+            batch_errors = []
+            try:
+                written += await self._run(write_batch, batch, batch_errors)
+                errors.extend(batch_errors)
+            except Exception as e:
+                # The batch's transaction was rolled back
+                for operation in batch:
+                    index = operation[0]
+                    errors.append({"index": index, "email": leads[index].get("email"), "error": str(e)})
+
+        if operations:
+            lead_cache.invalidate()
+        if errors:
+            print(f"⚠️ Bulk lead write: {len(errors)} of {len(leads)} leads failed")
+        return {"written": written, "errors": errors}
+
+    # --- Use cases ---
+
+    async def get_use_cases(self):
+        if self.db is None: return []
+        return await self._run(lambda: [
+            _load(row_id, doc) for row_id, doc in self.db.execute("SELECT id, doc FROM use_cases LIMIT 100")
+        ])
+
+    def _seed_use_cases(self, use_cases_list) -> bool:
+        if self.db.execute("SELECT COUNT(*) FROM use_cases").fetchone()[0]:
+            return False
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO use_cases (id, doc) VALUES (?, ?)",
+                [(str(use_case.get("_id") or ObjectId()), _encode(use_case)[0]) for use_case in use_cases_list]
+            )
+        return True
+
+    async def seed_use_cases(self, use_cases_list):
+        """Populate DB with initial use cases if empty"""
+        if self.db is None: return
+        if await self._run(self._seed_use_cases, use_cases_list):
+            print("✅ Seeded initial Use Cases to SQLite")
+
+    # --- Campaigns ---
+
+    def _write_campaign(self, row_id: str, campaign: dict):
+        with self.db:
+            self.db.execute(
+                "INSERT INTO campaigns (id, status, send_time, doc) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, send_time = excluded.send_time, doc = excluded.doc",
+                (row_id, _column(campaign.get("status")), _column(campaign.get("send_time")), _encode(campaign)[0])
+            )
+
+    async def save_campaign(self, campaign_data: dict):
+        """Save email campaign"""
+        if self.db is None: return
+        row_id = str(ObjectId())
+        await self._run(self._write_campaign, row_id, campaign_data)
+        campaign_data["_id"] = row_id
+        return campaign_data
+
+    def _select_campaigns(self, where: str = "", params: list = (), limit: int = None) -> list:
+        sql = f"SELECT id, doc FROM campaigns {f'WHERE {where}' if where else ''} ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [_load(row_id, doc) for row_id, doc in self.db.execute(sql, list(params))]
+
+    async def get_all_campaigns(self):
+        """Fetch all campaigns"""
+        if self.db is None: return []
+        return await self._run(lambda: self._select_campaigns(limit=100))
+
+    async def get_campaigns_by_status(self, status: str):
+        if self.db is None: return []
+        return await self._run(lambda: self._select_campaigns("status = ?", [status]))
+
+    def _update_campaign(self, campaign_id: str, fields: dict):
+        campaigns = self._select_campaigns("id = ?", [campaign_id])
+        if campaigns:
+            self._write_campaign(campaign_id, {**campaigns[0], **fields})
+
+    async def update_campaign_status(self, campaign_id: str, status: str, emails_sent: int = 0):
+        """Update campaign progress"""
+        if self.db is None: return
+        await self._run(self._update_campaign, str(campaign_id), {"status": status, "emails_sent": emails_sent})
+
+    # --- Campaign delivery queue ---
+
+    def _enqueue_deliveries(self, campaign_id: str, emails: list) -> int:
+        now = datetime.now().isoformat()
+        before = self.db.total_changes
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO deliveries (id, campaign_id, email, state, attempts, updated_at) "
+                "VALUES (?, ?, ?, 'pending', 0, ?) ON CONFLICT(campaign_id, email) DO NOTHING",
+                [(str(ObjectId()), campaign_id, email, now) for email in emails]
+            )
+        return self.db.total_changes - before
+
+    async def enqueue_deliveries(self, campaign_id: str, emails: list, batch_size: int = BULK_WRITE_BATCH_SIZE) -> int:
+        """
+        Queue one pending delivery per email; emails already queued for the
+        campaign keep their state. Returns the number newly queued.
+        """
+        if self.db is None: return 0
+        emails = [email for email in dict.fromkeys(emails) if email]
+        queued = 0
+        for start in range(0, len(emails), batch_size):
+            queued += await self._run(self._enqueue_deliveries, campaign_id, emails[start:start + batch_size])
+        return queued
+
+    def _claim_deliveries(self, campaign_id: str, limit: int, max_attempts: int, owner: str) -> list:
+        # One statement, so claimers in other processes can't take the same rows
+        with self.db:
+            rows = self.db.execute(
+                "UPDATE deliveries SET state = 'sending', attempts = attempts + 1, claimed_by = ?, updated_at = ? "
+                "WHERE id IN (SELECT id FROM deliveries WHERE campaign_id = ? "
+                "AND (state = 'pending' OR (state = 'failed' AND attempts < ?)) LIMIT ?) "
+                "RETURNING id, email, attempts",
+                (owner, datetime.now().isoformat(), campaign_id, max_attempts, int(limit))
+            ).fetchall()
+        return [{"_id": ObjectId(row_id), "email": email, "attempts": attempts} for row_id, email, attempts in rows]
+
+    async def claim_deliveries(self, campaign_id: str, limit: int, max_attempts: int, owner: str = None) -> list:
+        """Mark up to `limit` pending (or retryable failed) deliveries as sending and return them"""
+        if self.db is None: return []
+        return await self._run(self._claim_deliveries, campaign_id, limit, max_attempts, owner)
+
+    def _checkpoint_deliveries(self, results: list):
+        now = datetime.now().isoformat()
+        with self.db:
+            self.db.executemany(
+                "UPDATE deliveries SET state = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                [(state, error, now, str(delivery_id)) for delivery_id, state, error in results]
+            )
+
+    async def checkpoint_deliveries(self, results: list):
+        """Record send outcomes in one transaction; `results` holds (delivery_id, state, error) triples"""
+        if self.db is None or not results: return
+        await self._run(self._checkpoint_deliveries, results)
+
+    def _requeue_stalled_deliveries(self, campaign_id: str) -> int:
+        with self.db:
+            return self.db.execute(
+                "UPDATE deliveries SET state = 'pending', updated_at = ? WHERE campaign_id = ? AND state = 'sending'",
+                (datetime.now().isoformat(), campaign_id)
+            ).rowcount
+
+    async def requeue_stalled_deliveries(self, campaign_id: str) -> int:
+        """Put deliveries left in `sending` by an interrupted run back to pending"""
+        if self.db is None: return 0
+        return await self._run(self._requeue_stalled_deliveries, campaign_id)
+
+    async def get_delivery_counts(self, campaign_id: str) -> dict:
+        """{state: count} for a campaign's deliveries"""
+        if self.db is None: return {}
+        return await self._run(lambda: dict(self.db.execute(
+            "SELECT state, COUNT(*) FROM deliveries WHERE campaign_id = ? GROUP BY state", (campaign_id,)
+        )))
+
+    # --- Leases ---
+
+    def _acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self.db:
+            return self.db.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                (name, owner, now + ttl_seconds, now)
+            ).rowcount == 1
+
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew lease `name` for `owner`; succeeds if it is new, expired or already ours"""
+        # Without a store there is nothing to coordinate with
+        if self.db is None: return True
+        return await self._run(self._acquire_lease, name, owner, ttl_seconds)
+
+    def _release_lease(self, name: str, owner: str, linger_seconds: float):
+        with self.db:
+            self.db.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                (time.time() + linger_seconds, name, owner)
+            )
+
+    async def release_lease(self, name: str, owner: str, linger_seconds: float = 0):
+        """Let lease `name` expire `linger_seconds` from now, if `owner` still holds it"""
+        if self.db is None: return
+        await self._run(self._release_lease, name, owner, linger_seconds)
@@ -1,14 +1,47 @@
 # Lead Scoring Utility
-def calculate_lead_score(model, data):
+import numpy as np
+from app.score_cache import score_cache
+from app.model import shadow_evaluator
+
+
+def calculate_lead_score(model, data, model_version=None):
+    """
+    Score a single lead. When model_version is given, results are memoized
+    in the shared score cache keyed on (model_version, feature tuple).
+    """
+    if model_version is None:
+        score, probability = _predict_lead_score(model, data)
+    else:
+        features = tuple(float(x) for x in data[0])
+        score, probability = score_cache.get_or_compute(
+            model_version, features, lambda: _predict_lead_score(model, data)
+        )
+
+    shadow_evaluator.submit(data, [probability])
+    return score, probability
+
+
+def _predict_lead_score(model, data):
     probability = model.predict_proba(data)[0][1]
     score = round(probability * 100, 2)
     return score, probability
 
 
+def calculate_lead_scores(model, data):
+    """
+    Batch variant of calculate_lead_score.
+    Scores a 2D feature matrix with a single predict_proba call and
+    returns (scores, probabilities) as NumPy arrays.
+    """
+    probabilities = model.predict_proba(data)[:, 1]
+    scores = np.round(probabilities * 100, 2)
+    shadow_evaluator.submit(data, probabilities)
+    return scores, probabilities
+
+
 # =====================================
 # LLaMA Email Generator (using Groq - FREE)
 # =====================================
-import requests
 import os
 from dotenv import load_dotenv
 
@@ -16,7 +49,24 @@ load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-def generate_email_llama2(customer_name, lead_score, quote_value, item_count, use_case_id=None):
+from app.email_cache import email_cache
+
+
+def generate_email_llama2(customer_name, lead_score, quote_value, item_count, use_case_id=None, campaign_id=None):
+    """
+    Draft a sales email with the LLM. Drafts are cached on the normalized
+    prompt inputs (app/email_cache.py); campaign_id attributes cache
+    hits and LLM time to a campaign in the cache stats. With the cache
+    disabled the LLM gets the raw, unbanded values.
+    """
+    if not email_cache.enabled:
+        return _generate_email(customer_name, lead_score, quote_value, item_count, use_case_id)[0]
+    inputs = email_cache.prompt_inputs(customer_name, lead_score, quote_value, item_count, use_case_id)
+    return email_cache.get_or_generate(inputs, lambda: _generate_email(**inputs), campaign_id=campaign_id)
+
+
+def _generate_email(customer_name, lead_score, quote_value, item_count, use_case_id=None):
+    """One LLM call; returns (email body, whether it may be cached)"""
     
     # Fetch use case details if provided
     use_case_context = ""
@@ -63,6 +113,9 @@ The tone should adapt based on the lead score:
         ]
     }
 
+    # Imported on first use to keep the requests stack out of app startup
+    import requests
+
     response = requests.post(
         "https://api.groq.com/openai/v1/chat/completions",
         headers=headers,
@@ -75,6 +128,6 @@ The tone should adapt based on the lead score:
     # Safety fallback
     if "choices" not in result:
         print(f"Groq API Error: {response.status_code} - {response.text}")
-        return f"Unable to generate email at this time. Error: {result.get('error', {}).get('message', 'Unknown error')}"
+        return f"Unable to generate email at this time. Error: {result.get('error', {}).get('message', 'Unknown error')}", False
 
-    return result["choices"][0]["message"]["content"]
+    return result["choices"][0]["message"]["content"], True
@@ -0,0 +1,136 @@
+"""
+Benchmark /analytics/segments against a large lead collection.
+
+Seeds BENCHMARK_DB_NAME (a separate database, reused between runs while
+it holds the requested number of leads) with synthetic enriched leads,
+provisions the indexes, then times:
+- the previous approach: pulling every lead into Python and summing in dicts
+- SEGMENT_ANALYTICS_PIPELINE, aggregated inside MongoDB
+and checks that both produce the same numbers.
+
+Usage: python benchmark_analytics.py [num_leads]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.database import Database, MONGO_URL
+from app.rules import INDUSTRIES, SEGMENTS
+
+BENCHMARK_DB_NAME = os.getenv("BENCHMARK_DB_NAME", "ai_sales_benchmark")
+NUM_LEADS = 1_000_000
+INSERT_CHUNK = 10_000
+
+
+async def seed_leads(database: Database, n: int):
+    leads = database.db["leads"]
+    if await leads.estimated_document_count() == n:
+        print(f"♻️  Reusing {n:,} seeded leads in {BENCHMARK_DB_NAME}")
+        return
+
+    await leads.drop()
+    rng = np.random.default_rng(42)
+    print(f"🌱 Seeding {n:,} leads into {BENCHMARK_DB_NAME}...")
+    for start in range(0, n, INSERT_CHUNK):
+        size = min(INSERT_CHUNK, n - start)
+        segments = rng.integers(0, len(SEGMENTS), size)
+        industries = rng.integers(0, len(INDUSTRIES), size)
+        scores = np.round(rng.uniform(0.1, 1.0, size), 4)
+        revenue = np.round(rng.uniform(1_000, 500_000, size), 2)
+        await leads.insert_many([
+            {
+                "email": f"lead{start + i}@benchmark.example",
+                "segment": SEGMENTS[segments[i]].value,
+                "industry": INDUSTRIES[industries[i]].value,
+                "lead_score": float(scores[i]),
+                "revenue_potential": float(revenue[i])
+            }
+            for i in range(size)
+        ], ordered=False)
+
+
+async def python_segment_analytics(database: Database) -> dict:
+    """The previous /analytics/segments loop, over every lead instead of the first 1000"""
+    segment_stats = {}
+    async for lead in database.db["leads"].find():
+        segment = lead.get("segment", "GENERAL")
+        if segment not in segment_stats:
+            segment_stats[segment] = {
+                "count": 0,
+                "total_revenue_potential": 0,
+                "avg_lead_score": 0,
+                "top_industries": {}
+            }
+
+        segment_stats[segment]["count"] += 1
+        segment_stats[segment]["total_revenue_potential"] += lead.get("revenue_potential", 0)
+        segment_stats[segment]["avg_lead_score"] += lead.get("lead_score", 0)
+
+        industry = lead.get("industry", "OTHER")
+        segment_stats[segment]["top_industries"][industry] = \
+            segment_stats[segment]["top_industries"].get(industry, 0) + 1
+
+    for stats in segment_stats.values():
+        stats["avg_lead_score"] = round(stats["avg_lead_score"] / stats["count"], 2)
+        stats["avg_revenue_potential"] = round(stats["total_revenue_potential"] / stats["count"], 2)
+    return segment_stats
+
+
+def results_match(python_stats: dict, pipeline_stats: dict) -> bool:
+    if python_stats.keys() != pipeline_stats.keys():
+        return False
+    for segment, expected in python_stats.items():
+        actual = pipeline_stats[segment]
+        if expected["count"] != actual["count"] or expected["top_industries"] != actual["top_industries"]:
+            return False
+        for key in ("total_revenue_potential", "avg_lead_score", "avg_revenue_potential"):
+            if not np.isclose(expected[key], actual[key], rtol=1e-9, atol=0.01):
+                return False
+    return True
+
+
+async def benchmark(n: int) -> bool:
+    print("=" * 60)
+    print("  SEGMENT ANALYTICS BENCHMARK")
+    print("=" * 60)
+
+    database = Database()
+    database.client = AsyncIOMotorClient(MONGO_URL)
+    database.db = database.client[BENCHMARK_DB_NAME]
+
+    await seed_leads(database, n)
+    await database.ensure_indexes()
+
+    start = time.perf_counter()
+    python_stats = await python_segment_analytics(database)
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline_stats = {stats.pop("_id"): stats for stats in await database.get_segment_analytics()}
+    pipeline_time = time.perf_counter() - start
+
+    print(f"\n⏱️  Python loop over all leads: {python_time:.2f}s")
+    print(f"⏱️  Aggregation pipeline:       {pipeline_time:.2f}s  x{python_time / pipeline_time:.1f}")
+
+    ok = results_match(python_stats, pipeline_stats)
+    print("✅ Pipeline matches the Python loop" if ok else "❌ Pipeline results differ from the Python loop")
+    database.close()
+    return ok
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LEADS
+    try:
+        ok = asyncio.run(benchmark(n))
+    except Exception as e:
+        print(f"\n❌ MongoDB Error: {e}")
+        return 1
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark campaign recipient lookup: one get_all_leads scan per recipient
+(the previous execute_scheduled_campaigns loop) against one indexed
+$in query per CAMPAIGN_BATCH_SIZE recipients with CAMPAIGN_LEAD_PROJECTION.
+
+Runs against MongoDB (BENCHMARK_DB_NAME, seeded with the leads of
+benchmark_storage.py when its count differs) or, when no server answers,
+an SQLite backend in a temporary file. The per-recipient scan is timed on
+a sample and extrapolated; it also only ever sees the first 1000 leads,
+so most recipients are never found.
+
+Usage: python benchmark_campaign_lookup.py [num_leads] [num_recipients]   (default: 1000000 10000)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.campaign_executor import CAMPAIGN_BATCH_SIZE, CAMPAIGN_LEAD_PROJECTION
+from app.database import Database, MONGO_URL
+from app.read_cache import lead_cache
+from app.sqlite_storage import SQLiteDatabase
+from benchmark_analytics import BENCHMARK_DB_NAME, NUM_LEADS
+from benchmark_storage import generate_leads
+
+NUM_RECIPIENTS = 10_000
+# Recipients timed with the per-recipient scan before extrapolating
+LEGACY_SAMPLE = 200
+
+
+async def seed(database, n: int):
+    if isinstance(database, Database) and await database.db["leads"].estimated_document_count() == n:
+        print(f"♻️  Reusing {n:,} seeded leads in {BENCHMARK_DB_NAME}")
+        return
+    if isinstance(database, Database):
+        await database.db["leads"].drop()
+    await database.ensure_indexes()
+    print(f"🌱 Seeding {n:,} leads...")
+    for chunk in generate_leads(n):
+        await database.save_leads_bulk(chunk)
+
+
+async def open_backend(directory: str):
+    client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command("ping")
+        database = Database()
+        database.client = client
+        database.db = client[BENCHMARK_DB_NAME]
+        return "MongoDB", database
+    except Exception:
+        client.close()
+        print("⚠️ MongoDB unavailable, benchmarking the SQLite backend")
+        database = SQLiteDatabase(os.path.join(directory, "benchmark.sqlite3"))
+        database.connect()
+        return "SQLite", database
+
+
+async def legacy_lookup(database, emails: list) -> int:
+    found = 0
+    for email in emails:
+        all_leads = await database.get_all_leads()
+        lead = next((l for l in all_leads if l.get("email") == email), None)
+        found += lead is not None
+    return found
+
+
+async def batched_lookup(database, emails: list) -> int:
+    found = 0
+    for start in range(0, len(emails), CAMPAIGN_BATCH_SIZE):
+        batch = emails[start:start + CAMPAIGN_BATCH_SIZE]
+        leads = await database.get_leads_by_emails(batch, CAMPAIGN_LEAD_PROJECTION)
+        found += sum(1 for email in batch if email in leads)
+    return found
+
+
+async def benchmark(n: int, recipients: int) -> bool:
+    print("=" * 60)
+    print(f"  CAMPAIGN RECIPIENT LOOKUP ({recipients:,} recipients x {n:,} leads)")
+    print("=" * 60)
+    lead_cache.enabled = False
+
+    with tempfile.TemporaryDirectory() as directory:
+        name, database = await open_backend(directory)
+        await seed(database, n)
+
+        rng = np.random.default_rng(7)
+        emails = [f"lead{i}@benchmark.example" for i in rng.choice(n, recipients, replace=False)]
+        sample = emails[:LEGACY_SAMPLE]
+
+        start = time.perf_counter()
+        legacy_found = await legacy_lookup(database, sample)
+        legacy_time = (time.perf_counter() - start) * recipients / len(sample)
+
+        start = time.perf_counter()
+        batched_found = await batched_lookup(database, emails)
+        batched_time = time.perf_counter() - start
+
+        print(f"\n📋 {name}, batches of {CAMPAIGN_BATCH_SIZE}")
+        print(f"⏱️  get_all_leads per recipient: {legacy_time:8.2f}s (extrapolated from {len(sample)}), "
+              f"found {legacy_found}/{len(sample)}")
+        print(f"⏱️  $in per batch:               {batched_time:8.2f}s  x{legacy_time / batched_time:.0f}, "
+              f"found {batched_found:,}/{recipients:,}")
+        database.close()
+
+    ok = batched_found == recipients
+    print("✅ Every recipient found" if ok else "❌ Some recipients were not found")
+    return ok
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LEADS
+    recipients = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_RECIPIENTS
+    return 0 if asyncio.run(benchmark(n, recipients)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
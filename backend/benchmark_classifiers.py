@@ -0,0 +1,206 @@
+"""
+Benchmark the compiled segmentation classifiers against the keyword scans
+they replaced.
+
+Generates company names the way auto_generate_leads.py does (plus a share
+of made-up names that match no keyword), checks that the compiled
+classifier agrees with the legacy scans wherever a keyword matches and
+that the fallback is deterministic, then times both.
+
+Job titles are drawn from CRM-style variants of each role; the token-set
+normalizer is timed against the legacy substring chain, and titles the
+two resolve differently are listed (substring checks misread titles such
+as 'Director IT', which contains 'cto').
+
+Usage: python benchmark_classifiers.py [num_names]
+"""
+import random
+import string
+import sys
+import time
+
+from app.classifiers import IndustryClassifier, JobTitleNormalizer
+from app.schemas import Industry, JobRole
+
+NUM_NAMES = 1_000_000
+
+# Same building blocks as auto_generate_leads.py
+COMPANY_PREFIXES = ['Tech', 'Cloud', 'Data', 'Cyber', 'Smart', 'Digital', 'AI', 'Quantum',
+                    'Health', 'Medi', 'Care', 'Pharma', 'Bio', 'Medical',
+                    'Fin', 'Capital', 'Invest', 'Bank', 'Trading', 'Wealth',
+                    'Precision', 'Auto', 'Industrial', 'Robo', 'Advanced',
+                    'Retail', 'Shop', 'Commerce', 'Fashion', 'Mega',
+                    'Edu', 'Learn', 'Academy', 'University', 'Online',
+                    'Global', 'Premier', 'Elite', 'Dynamic']
+COMPANY_MIDDLES = ['Tech', 'Soft', 'Pro', 'Plus', 'Max', 'Star', '']
+COMPANY_SUFFIXES = ['Corp', 'Inc', 'Solutions', 'Systems', 'Group', 'Partners',
+                    'Industries', 'Technologies', 'Services', 'Labs']
+
+# CRM-style title variants
+JOB_TITLES = ['Chief Technology Officer', 'CTO', 'Chief Information Officer', 'CIO',
+              'Chief Financial Officer', 'CFO', 'Chief Executive Officer', 'CEO & Founder',
+              'VP Engineering', 'VP, Engineering & Ops', 'Vice President of Engineering', 'SVP Sales',
+              'VP Sales', 'VP Operations', 'Vice President, Operations', 'Director IT',
+              'Director of Information Technology', 'IT Director', 'Manager', 'Sales Manager',
+              'Procurement', 'Purchasing Lead', 'Procurement Specialist', 'Director of Digital',
+              'Facilities Coordinator', 'Software Engineer', '']
+
+# Share of names drawn from random letters (mostly no keyword match)
+RANDOM_NAME_SHARE = 0.2
+
+
+def legacy_determine_industry(company_name: str):
+    """
+    The previous determine_industry keyword scans, minus the random fallback.
+    Returns None where the old function picked a random industry.
+    """
+    name = company_name.lower()
+
+    if any(x in name for x in ['tech', 'soft', 'data', 'cloud', 'ai', 'cyber', 'sys']):
+        return Industry.TECHNOLOGY
+    elif any(x in name for x in ['health', 'med', 'pharma', 'care', 'bio']):
+        return Industry.HEALTHCARE
+    elif any(x in name for x in ['bank', 'fin', 'capital', 'invest', 'insur']):
+        return Industry.FINANCE
+    elif any(x in name for x in ['shop', 'retail', 'store', 'market']):
+        return Industry.RETAIL
+    elif any(x in name for x in ['mfg', 'ind', 'eng', 'construct', 'build']):
+        return Industry.MANUFACTURING
+    elif any(x in name for x in ['edu', 'school', 'univ', 'learn']):
+        return Industry.EDUCATION
+    return None
+
+
+def legacy_determine_job_role(role_string: str = None) -> JobRole:
+    """The previous determine_job_role substring chain"""
+    if not role_string:
+        return JobRole.OTHER
+
+    role_lower = role_string.lower()
+
+    if 'cto' in role_lower or 'chief technology' in role_lower:
+        return JobRole.CTO
+    elif 'cio' in role_lower or 'chief information' in role_lower:
+        return JobRole.CIO
+    elif 'cfo' in role_lower or 'chief financial' in role_lower:
+        return JobRole.CFO
+    elif 'ceo' in role_lower or 'chief executive' in role_lower:
+        return JobRole.CEO
+    elif 'vp' in role_lower and 'eng' in role_lower:
+        return JobRole.VP_ENGINEERING
+    elif 'vp' in role_lower and 'sales' in role_lower:
+        return JobRole.VP_SALES
+    elif 'vp' in role_lower and 'operation' in role_lower:
+        return JobRole.VP_OPERATIONS
+    elif 'director' in role_lower and 'it' in role_lower:
+        return JobRole.DIRECTOR_IT
+    elif 'manager' in role_lower:
+        return JobRole.MANAGER
+    elif 'procurement' in role_lower or 'purchasing' in role_lower:
+        return JobRole.PROCUREMENT
+    else:
+        return JobRole.OTHER
+
+
+def generate_company_names(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    names = []
+    for _ in range(n):
+        if rng.random() < RANDOM_NAME_SHARE:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+            names.append(f"{word.capitalize()} {rng.choice(['LLC', 'Ltd', 'Co'])}")
+        else:
+            names.append(f"{rng.choice(COMPANY_PREFIXES)}{rng.choice(COMPANY_MIDDLES)}{rng.choice(COMPANY_SUFFIXES)}")
+    return names
+
+
+def generate_job_titles(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [rng.choice(JOB_TITLES) for _ in range(n)]
+
+
+def timed(fn, names: list) -> tuple:
+    start = time.perf_counter()
+    results = [fn(name) for name in names]
+    return results, time.perf_counter() - start
+
+
+def benchmark_industries(n: int) -> bool:
+    print("=" * 60)
+    print("  INDUSTRY CLASSIFIER BENCHMARK")
+    print("=" * 60)
+
+    names = generate_company_names(n)
+    print(f"\n📋 {n:,} company names ({len(set(names)):,} distinct)")
+
+    legacy, legacy_time = timed(legacy_determine_industry, names)
+
+    # Uncached: every name goes through the compiled pattern
+    uncached = IndustryClassifier(cache_size=0)
+    compiled, compiled_time = timed(uncached.classify, names)
+
+    classifier = IndustryClassifier(cache_size=len(names))
+    memoized, memo_time = timed(classifier.classify, names)
+    stats = classifier.stats()
+
+    mismatches = sum(1 for old, new in zip(legacy, compiled) if old is not None and old != new)
+    fallbacks = sum(1 for old in legacy if old is None)
+    rerun = IndustryClassifier(cache_size=0)
+    nondeterministic = sum(1 for name, first in zip(names, compiled) if rerun.classify(name) != first)
+
+    print(f"\n⏱️  legacy keyword scans: {legacy_time:.2f}s ({legacy_time / n * 1e6:.2f} µs/name)")
+    print(f"⏱️  compiled pattern:     {compiled_time:.2f}s ({compiled_time / n * 1e6:.2f} µs/name)"
+          f"  x{legacy_time / compiled_time:.1f}")
+    print(f"⏱️  compiled + memo:      {memo_time:.2f}s ({memo_time / n * 1e6:.2f} µs/name)"
+          f"  x{legacy_time / memo_time:.1f}, hit rate {stats['hit_rate']:.1%}")
+
+    print(f"\n🔍 Fallback (no keyword) names: {fallbacks:,}")
+    ok = mismatches == 0 and nondeterministic == 0
+    if mismatches:
+        print(f"❌ {mismatches:,} keyword-matched names classified differently from the legacy scans")
+    if nondeterministic:
+        print(f"❌ {nondeterministic:,} names classified differently on a second run")
+    if ok:
+        print("✅ Matches legacy classification; fallback is deterministic")
+    return ok
+
+
+def benchmark_job_titles(n: int) -> bool:
+    print("\n" + "=" * 60)
+    print("  JOB TITLE NORMALIZER BENCHMARK")
+    print("=" * 60)
+
+    titles = generate_job_titles(n)
+    print(f"\n📋 {n:,} job titles ({len(set(titles)):,} distinct)")
+
+    legacy, legacy_time = timed(legacy_determine_job_role, titles)
+
+    normalizer = JobTitleNormalizer()
+    start = time.perf_counter()
+    roles = normalizer.resolve_many(titles)
+    batch_time = time.perf_counter() - start
+
+    print(f"\n⏱️  legacy substring chain: {legacy_time:.2f}s ({legacy_time / n * 1e6:.2f} µs/title)")
+    print(f"⏱️  interned batch resolve: {batch_time:.2f}s ({batch_time / n * 1e6:.2f} µs/title)"
+          f"  x{legacy_time / batch_time:.1f}, hit rate {normalizer.stats()['hit_rate']:.1%}")
+
+    changed = sorted({(title, old.value, new.value) for title, old, new in zip(titles, legacy, roles) if old != new})
+    if changed:
+        print("\n🔍 Titles resolved differently from the legacy chain:")
+        for title, old, new in changed:
+            print(f"   {title!r}: {old} → {new}")
+
+    ok = all(roles[i] == normalizer.normalize(titles[i]) for i in range(min(n, 1000)) if titles[i])
+    print("✅ Interned results match direct normalization" if ok else "❌ Interned results differ from normalization")
+    return ok
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_NAMES
+    ok = benchmark_industries(n)
+    ok = benchmark_job_titles(n) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
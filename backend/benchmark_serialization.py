@@ -0,0 +1,131 @@
+"""
+Benchmark lead-listing serialization: the orjson response class against
+the recursive sanitize_json_data pass it replaced.
+
+Builds enriched leads shaped like /leads responses (NumPy scalars, NaN
+and inf values, str Enums, ObjectIds, datetimes), then times
+- legacy: sanitize_json_data + FastAPI's jsonable_encoder + JSONResponse
+- FastJSONResponse rendering the same records directly
+and checks that both produce the same JSON.
+
+Usage: python benchmark_serialization.py [sizes...]   (default: 10000 100000)
+"""
+import json
+import math
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.rules import INDUSTRIES, MATURITY_LEVELS, SEGMENTS
+from app.schemas import JobRole
+from app.serialization import FastJSONResponse
+
+SIZES = [10_000, 100_000]
+ROLES = list(JobRole)
+
+
+def sanitize_json_data(obj):
+    """
+    The previous app/main.py helper.
+    Recursively sanitize data to ensure JSON compliance.
+    Converts inf, -inf, and NaN to None.
+    """
+    if isinstance(obj, dict):
+        return {k: sanitize_json_data(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [sanitize_json_data(item) for item in obj]
+    elif isinstance(obj, float):
+        if math.isnan(obj) or math.isinf(obj):
+            return None
+        return obj
+    elif isinstance(obj, np.floating):
+        if np.isnan(obj) or np.isinf(obj):
+            return None
+        return float(obj)
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    return obj
+
+
+def generate_leads(n: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    quote_values = rng.uniform(1_000, 500_000, n)
+    quote_values[rng.random(n) < 0.01] = np.nan
+    scores = rng.uniform(0, 1, n)
+    scores[rng.random(n) < 0.01] = np.inf
+    segmented_at = datetime(2026, 10, 1, 2, 0, 0)
+    return [
+        {
+            "_id": ObjectId(f"{i:024x}"),
+            "company_name": f"Company {i}",
+            "email": f"contact{i}@example.com",
+            "quote_value": quote_values[i],
+            "item_count": np.int64(rng.integers(1, 500)),
+            "conversion_days": int(rng.integers(15, 90)),
+            "industry": INDUSTRIES[i % len(INDUSTRIES)],
+            "maturity_level": MATURITY_LEVELS[i % len(MATURITY_LEVELS)],
+            "segment": SEGMENTS[i % len(SEGMENTS)],
+            "job_role": ROLES[i % len(ROLES)],
+            "is_decision_maker": bool(i % 2),
+            "revenue_potential": float(quote_values[i] * 1.2),
+            "past_engagements": int(rng.integers(0, 15)),
+            "lead_score": float(scores[i]),
+            "conversion_probability": round(float(scores[i]), 4) if np.isfinite(scores[i]) else scores[i],
+            "last_segmented_at": segmented_at
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_render(leads: list) -> bytes:
+    # The endpoint stringified _id itself before sanitizing
+    for lead in leads:
+        lead["_id"] = str(lead["_id"])
+    return JSONResponse(jsonable_encoder(sanitize_json_data(leads))).body
+
+
+def fast_render(leads: list) -> bytes:
+    return FastJSONResponse(leads).body
+
+
+def timed(fn, leads: list) -> tuple:
+    start = time.perf_counter()
+    body = fn(leads)
+    return body, time.perf_counter() - start
+
+
+def benchmark(n: int) -> bool:
+    print(f"\n📋 {n:,} leads")
+
+    fast_body, fast_time = timed(fast_render, generate_leads(n))
+    legacy_body, legacy_time = timed(legacy_render, generate_leads(n))
+
+    print(f"⏱️  sanitize_json_data + JSONResponse: {legacy_time:.3f}s ({len(legacy_body) / 1e6:.1f} MB)")
+    print(f"⏱️  FastJSONResponse (orjson):         {fast_time:.3f}s ({len(fast_body) / 1e6:.1f} MB)"
+          f"  x{legacy_time / fast_time:.1f}")
+
+    ok = json.loads(legacy_body) == json.loads(fast_body)
+    print("✅ Same JSON" if ok else "❌ Encoders produced different JSON")
+    return ok
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    print("=" * 60)
+    print("  RESPONSE SERIALIZATION BENCHMARK")
+    print("=" * 60)
+
+    ok = True
+    for n in sizes:
+        ok = benchmark(n) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Compare the MongoDB and embedded SQLite storage backends on the same leads.
+
+Each backend is loaded with the same synthetic enriched leads through
+save_leads_bulk, then timed on the operations the API runs:
+- bulk upsert of every lead
+- segment analytics (aggregation pipeline vs SQL GROUP BY)
+- campaign targeting (leads of one segment, emails only)
+- walking 100 keyset pages by lead score
+- streaming every lead
+Analytics results are checked to be identical across backends.
+
+MongoDB uses BENCHMARK_DB_NAME and is skipped if no server answers;
+SQLite writes to a temporary file. The read cache is disabled throughout.
+
+Usage: python benchmark_storage.py [num_leads]   (default: 1000000)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.database import Database, MONGO_URL
+from app.read_cache import lead_cache
+from app.rules import INDUSTRIES, SEGMENTS
+from app.sqlite_storage import SQLiteDatabase
+from benchmark_analytics import BENCHMARK_DB_NAME, NUM_LEADS, results_match
+
+GENERATE_CHUNK = 100_000
+PAGES = 100
+PAGE_SIZE = 100
+
+
+def generate_leads(n: int, seed: int = 42):
+    """Synthetic enriched leads, yielded in chunks so 1M leads never sit in memory twice"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, GENERATE_CHUNK):
+        size = min(GENERATE_CHUNK, n - start)
+        segments = rng.integers(0, len(SEGMENTS), size)
+        industries = rng.integers(0, len(INDUSTRIES), size)
+        scores = np.round(rng.uniform(0.1, 1.0, size), 4)
+        revenue = np.round(rng.uniform(1_000, 500_000, size), 2)
+        yield [
+            {
+                "email": f"lead{start + i}@benchmark.example",
+                "company_name": f"Company {start + i}",
+                "segment": SEGMENTS[segments[i]].value,
+                "industry": INDUSTRIES[industries[i]].value,
+                "lead_score": float(scores[i]),
+                "revenue_potential": float(revenue[i]),
+                "past_engagements": int(i % 15)
+            }
+            for i in range(size)
+        ]
+
+
+async def timed(coro) -> tuple:
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+
+async def walk_pages(database) -> int:
+    after, count = None, 0
+    for _ in range(PAGES):
+        leads, after = await database.get_leads_page(PAGE_SIZE, after, "lead_score")
+        count += len(leads)
+        if after is None:
+            break
+    return count
+
+
+async def stream_all(database) -> int:
+    count = 0
+    async for _ in database.iter_leads():
+        count += 1
+    return count
+
+
+async def run_backend(name: str, database, n: int) -> tuple:
+    print(f"\n📋 {name}")
+    await database.ensure_indexes()
+
+    written = 0
+    start = time.perf_counter()
+    for chunk in generate_leads(n):
+        written += (await database.save_leads_bulk(chunk))["written"]
+    timings = {"bulk upsert": time.perf_counter() - start}
+    if written != n:
+        print(f"❌ Only {written:,} of {n:,} leads were written")
+
+    analytics, timings["segment analytics"] = await timed(database.get_segment_analytics())
+    targets, timings["campaign targeting"] = await timed(
+        database.get_leads_by_segment(SEGMENTS[0].value, {"email": 1})
+    )
+    paged, timings[f"{PAGES} score pages"] = await timed(walk_pages(database))
+    streamed, timings["stream all leads"] = await timed(stream_all(database))
+
+    for label, seconds in timings.items():
+        print(f"⏱️  {label:<20} {seconds:8.2f}s")
+    print(f"   {len(targets):,} targeted, {paged:,} paged, {streamed:,} streamed")
+    return {stats.pop("_id"): stats for stats in analytics}, timings
+
+
+async def connect_mongo():
+    client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command("ping")
+    except Exception as e:
+        print(f"⚠️ MongoDB unavailable, benchmarking SQLite only: {e}")
+        client.close()
+        return None
+    database = Database()
+    database.client = client
+    database.db = client[BENCHMARK_DB_NAME]
+    await database.db["leads"].drop()
+    return database
+
+
+async def benchmark(n: int) -> bool:
+    print("=" * 60)
+    print(f"  STORAGE BACKEND BENCHMARK ({n:,} leads)")
+    print("=" * 60)
+    lead_cache.enabled = False
+    results = {}
+
+    mongo = await connect_mongo()
+    if mongo is not None:
+        results["MongoDB"] = await run_backend("MongoDB", mongo, n)
+        mongo.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = SQLiteDatabase(os.path.join(directory, "benchmark.sqlite3"))
+        sqlite.connect()
+        results["SQLite"] = await run_backend("SQLite", sqlite, n)
+        sqlite.close()
+
+    if len(results) < 2:
+        return True
+
+    (mongo_stats, mongo_times), (sqlite_stats, sqlite_times) = results["MongoDB"], results["SQLite"]
+    print("\n📊 SQLite vs MongoDB")
+    for label, seconds in sqlite_times.items():
+        print(f"   {label:<20} x{mongo_times[label] / seconds:.1f}")
+    ok = results_match(mongo_stats, sqlite_stats)
+    print("✅ Both backends report the same analytics" if ok else "❌ Backends report different analytics")
+    return ok
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LEADS
+    return 0 if asyncio.run(benchmark(n)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Throughput and crash-resume check for the campaign delivery queue.
+
+- Queues a campaign of NUM_RECIPIENTS recipients and drains it with an
+  instant simulated sender, reporting deliveries/sec through the queue
+  (claim, lead lookup, send, bulk checkpoint).
+- Stops the campaign part-way through the app's shutdown hook, which
+  also closes the store, and checks that the sends finished before the
+  stop were checkpointed. Then resumes the campaign and checks that every
+  recipient was delivered, with duplicates limited to the sends that
+  were in flight at the stop.
+- Sends a small campaign at a fixed throttle_rate and checks the rate.
+
+Runs on a temporary SQLite store by default; STORAGE_BACKEND=mongo uses
+BENCHMARK_DB_NAME on MONGO_URL instead.
+
+Usage: python check_delivery_queue.py [num_recipients]   (default: 100000)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Must be set before app modules create the global database
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "deliveries.sqlite3")
+os.environ["DB_NAME"] = os.getenv("BENCHMARK_DB_NAME", "ai_sales_benchmark")
+
+from app.campaign_executor import CAMPAIGN_SEND_WORKERS, CampaignExecutor, campaign_executor
+from app.database import db
+from app.main import shutdown_db_client
+from app.scheduler import automation_scheduler
+from app.read_cache import lead_cache
+
+NUM_RECIPIENTS = 100_000
+# Fraction of the campaign sent before the simulated crash
+STOP_AT = 0.4
+UNTHROTTLED = 60_000_000  # emails per minute
+RATE_CHECK_RECIPIENTS = 100
+RATE_CHECK_THROTTLE = 1200  # emails per minute
+
+
+class RecordingSender:
+    """Simulated send_sales_email recording every recipient it was called for"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = Counter()
+
+    def __call__(self, customer_email: str, **kwargs) -> dict:
+        with self.lock:
+            self.sent[customer_email] += 1
+        return {"success": True}
+
+    @property
+    def total(self) -> int:
+        with self.lock:
+            return sum(self.sent.values())
+
+
+async def create_campaign(name: str, emails: list, throttle_rate: int) -> dict:
+    campaign = await db.save_campaign({
+        "name": name,
+        "campaign_type": "Upsell",
+        "status": "scheduled",
+        "throttle_rate": throttle_rate,
+        "emails_sent": 0
+    })
+    start = time.perf_counter()
+    queued = await db.enqueue_deliveries(campaign["_id"], emails)
+    print(f"📥 Queued {queued:,} deliveries for {name} in {time.perf_counter() - start:.2f}s")
+    return campaign
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+async def check_throughput_and_resume(n: int) -> bool:
+    emails = [f"queue{i}@example.com" for i in range(n)]
+    for start in range(0, n, 10_000):
+        await db.save_leads_bulk([
+            {"email": email, "company_name": f"Company {start + i}", "lead_score": 0.5}
+            for i, email in enumerate(emails[start:start + 10_000])
+        ])
+    campaign = await create_campaign("Queue throughput", emails, UNTHROTTLED)
+    sender = RecordingSender()
+
+    # First run: the scheduler's executor, stopped part-way by the app's shutdown hook
+    campaign_executor.sender = sender
+    automation_scheduler.start()
+    start = time.perf_counter()
+    campaign_executor.submit([campaign])
+    while sender.total < n * STOP_AT:
+        await asyncio.sleep(0.01)
+    await shutdown_db_client()
+    first_run = time.perf_counter() - start
+    db.connect()
+    counts = await db.get_delivery_counts(campaign["_id"])
+    print(f"🛑 Stopped after {sender.total:,} sends: {counts}")
+    ok = check(f"Finished sends checkpointed before the store closed ({counts.get('sent', 0):,} of "
+               f"{sender.total:,}, at most {CAMPAIGN_SEND_WORKERS} in flight)",
+               counts.get("sent", 0) >= sender.total - CAMPAIGN_SEND_WORKERS)
+    lease = f"campaign:{campaign['_id']}"
+    ok &= check("Campaign lease released at shutdown", await db.acquire_lease(lease, "check_delivery_queue", 60))
+    await db.release_lease(lease, "check_delivery_queue")
+
+    # Second run: resumes from the checkpoints
+    executor = CampaignExecutor(sender=sender)
+    start = time.perf_counter()
+    await executor.run([campaign])
+    second_run = time.perf_counter() - start
+    await executor.shutdown()
+
+    counts = await db.get_delivery_counts(campaign["_id"])
+    duplicates = sum(count - 1 for count in sender.sent.values())
+    print(f"⏱️  {n:,} deliveries in {first_run + second_run:.2f}s "
+          f"({n / (first_run + second_run):,.0f} deliveries/s)")
+    ok &= check(f"Drained after resume: {counts}", counts == {"sent": n})
+    ok &= check(f"Every recipient delivered ({len(sender.sent):,}/{n:,})", len(sender.sent) == n)
+    ok &= check(f"{duplicates} duplicate sends, at most the {CAMPAIGN_SEND_WORKERS} in flight when stopped",
+                duplicates <= CAMPAIGN_SEND_WORKERS)
+    campaigns = {str(c["_id"]): c for c in await db.get_all_campaigns()}
+    stored = campaigns[str(campaign["_id"])]
+    ok &= check(f"Campaign {stored['status']} with emails_sent={stored['emails_sent']:,}",
+                stored["status"] == "completed" and stored["emails_sent"] == n)
+    return ok
+
+
+async def check_rate() -> bool:
+    emails = [f"rate{i}@example.com" for i in range(RATE_CHECK_RECIPIENTS)]
+    await db.save_leads_bulk([{"email": email, "company_name": "Rate Co"} for email in emails])
+    campaign = await create_campaign("Rate check", emails, RATE_CHECK_THROTTLE)
+    executor = CampaignExecutor(sender=RecordingSender())
+    start = time.perf_counter()
+    await executor.run([campaign])
+    elapsed = time.perf_counter() - start
+    await executor.shutdown()
+    rate = RATE_CHECK_RECIPIENTS / elapsed * 60
+    return check(f"Throttle {RATE_CHECK_THROTTLE}/min: sent at {rate:,.0f}/min",
+                 RATE_CHECK_THROTTLE * 0.9 <= rate <= RATE_CHECK_THROTTLE * 1.05)
+
+
+async def main_async(n: int) -> bool:
+    print("=" * 60)
+    print(f"  CAMPAIGN DELIVERY QUEUE ({n:,} recipients, {type(db).__name__})")
+    print("=" * 60)
+    lead_cache.enabled = False
+    db.connect()
+    await db.ensure_indexes()
+    try:
+        ok = await check_throughput_and_resume(n)
+        ok &= await check_rate()
+    finally:
+        db.close()
+    return ok
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECIPIENTS
+    sys.exit(0 if asyncio.run(main_async(n)) else 1)
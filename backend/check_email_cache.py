@@ -0,0 +1,167 @@
+"""
+Replay the quote book (data/scored_leads.csv) through the generated-email
+cache as one campaign, with a simulated LLM taking LLM_SECONDS per draft,
+on CAMPAIGN_SEND_WORKERS threads like the campaign executor.
+
+Reports hit rate, LLM calls saved and latency saved with the default
+normalization, and with every numeric field personalized
+(EMAIL_PERSONALIZED_FIELDS=lead_score,quote_value,item_count). Checks:
+- lead scores, on the 0-1 scale leads are stored with, spread over the tiers
+- a cached draft is only reused for identical normalized prompt inputs
+- the cache persists: a new instance on the same file serves hits
+- entries expire after the TTL, and LRU eviction caps the size
+- failed generations (API errors) are not cached
+- generate_email_llama2 goes through the cache and attributes stats
+  to the campaign, and sends the raw values when the cache is disabled
+
+Usage: python check_email_cache.py [llm_seconds]   (default: 0.02)
+"""
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Must be set before app modules create the global cache
+os.environ["EMAIL_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "email_cache.sqlite3")
+
+from app import utils
+from app.campaign_executor import CAMPAIGN_SEND_WORKERS
+from app.email_cache import EmailCache, email_cache, score_tier
+
+QUOTE_BOOK = os.path.join(os.path.dirname(__file__), "data", "scored_leads.csv")
+LLM_SECONDS = 0.02
+PERSONALIZED = {"lead_score", "quote_value", "item_count"}
+
+
+class FakeLLM:
+    """Stands in for the LLM call; records the prompt inputs behind each draft"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, **inputs) -> tuple:
+        time.sleep(self.seconds)
+        with self.lock:
+            self.calls += 1
+        if self.fail:
+            return "Unable to generate email at this time. Error: rate limited", False
+        return repr(sorted(inputs.items(), key=lambda item: item[0])), True
+
+
+def load_quotes() -> list:
+    """Quotes with lead_score on the stored 0-1 scale (the CSV has percentages)"""
+    with open(QUOTE_BOOK) as f:
+        return [
+            (row["customer_name"], float(row["lead_score"] or 0) / 100, float(row["quote_value"] or 0),
+             int(float(row["item_count"] or 0)))
+            for row in csv.DictReader(f)
+        ]
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def replay(cache: EmailCache, llm: FakeLLM, quotes: list, campaign_id: str) -> tuple:
+    """Draft every quote; returns (elapsed seconds, drafts whose inputs don't match their quote)"""
+    def draft(quote):
+        inputs = cache.prompt_inputs(*quote)
+        body = cache.get_or_generate(inputs, lambda: llm(**inputs), campaign_id=campaign_id)
+        return body != repr(sorted(inputs.items(), key=lambda item: item[0]))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CAMPAIGN_SEND_WORKERS) as executor:
+        mismatches = sum(executor.map(draft, quotes))
+    return time.perf_counter() - start, mismatches
+
+
+def report(label: str, stats: dict, elapsed: float):
+    print(f"📊 {label}: {stats['lookups']:,} drafts, hit rate {stats['hit_rate']:.1%}, "
+          f"{stats['llm_calls_saved']:,} LLM calls saved, {stats['latency_saved_seconds']:.1f}s latency saved "
+          f"(LLM time spent {stats['llm_seconds']:.1f}s, wall {elapsed:.1f}s)")
+
+
+def main() -> int:
+    llm_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else LLM_SECONDS
+    quotes = load_quotes()
+    customers = len({" ".join(name.split()).casefold() for name, *_ in quotes})
+    print("=" * 60)
+    print(f"  EMAIL CACHE ({len(quotes):,} quotes, {customers} customers, LLM {llm_seconds * 1000:.0f}ms)")
+    print("=" * 60)
+    directory = tempfile.mkdtemp()
+    tiers = Counter(score_tier(score) for _, score, *_ in quotes)
+    print(f"📊 Lead score tiers: {dict(tiers)}")
+    ok = check("Stored 0-1 scores spread over the tiers (0.85 → "
+               f"{EmailCache(enabled=False).prompt_inputs('Acme', 0.85, 0, 0)['lead_score']})",
+               len(tiers) > 1 and score_tier(0.85) == "High")
+
+    llm = FakeLLM(llm_seconds)
+    cache = EmailCache(os.path.join(directory, "banded.sqlite3"), enabled=True, personalized_fields=set())
+    elapsed, mismatches = replay(cache, llm, quotes, "banded")
+    stats = cache.campaign_stats("banded")
+    report("Banded inputs", stats, elapsed)
+    ok &= check(f"LLM called once per miss ({llm.calls:,} calls, {stats['misses']:,} misses)",
+                llm.calls == stats["misses"] and stats["hits"] > 0)
+    ok &= check(f"Drafts reused only for identical normalized inputs ({mismatches} mismatches)", mismatches == 0)
+
+    llm = FakeLLM(llm_seconds)
+    personalized = EmailCache(os.path.join(directory, "personalized.sqlite3"), enabled=True,
+                              personalized_fields=PERSONALIZED)
+    elapsed, mismatches = replay(personalized, llm, quotes, "personalized")
+    exact = personalized.campaign_stats("personalized")
+    report("Personalized numbers", exact, elapsed)
+    ok &= check(f"Personalized fields bypass the shared drafts: hit rate {exact['hit_rate']:.1%} "
+                f"< {stats['hit_rate']:.1%}, {mismatches} mismatches",
+                exact["hit_rate"] < stats["hit_rate"] and mismatches == 0)
+
+    llm = FakeLLM(0)
+    reopened = EmailCache(cache.path, enabled=True, personalized_fields=set())
+    replay(reopened, llm, quotes, "reopened")
+    ok &= check(f"Persisted across restarts: {reopened.campaign_stats('reopened')['hit_rate']:.0%} hits, "
+                f"{llm.calls} LLM calls", llm.calls == 0)
+
+    llm = FakeLLM(0)
+    short = EmailCache(os.path.join(directory, "ttl.sqlite3"), enabled=True, ttl=0.2, maxsize=10,
+                       personalized_fields=set())
+    replay(short, llm, quotes[:200], "ttl")
+    size = short.stats()["size"]
+    ok &= check(f"LRU eviction caps the size at 10 ({size} entries)", size == 10)
+    time.sleep(0.3)
+    replay(short, llm, quotes[199:200], "ttl")
+    ok &= check(f"Entries expire after the TTL ({short.campaign_stats('ttl')['expired']} expired)",
+                short.campaign_stats("ttl")["expired"] == 1)
+
+    llm = FakeLLM(0)
+    llm.fail = True
+    errors = EmailCache(os.path.join(directory, "errors.sqlite3"), enabled=True, personalized_fields=set())
+    replay(errors, llm, quotes[:1] * 3, "errors")
+    ok &= check(f"API errors are not cached ({llm.calls} LLM calls for 3 identical drafts)", llm.calls == 3)
+
+    llm = FakeLLM(0)
+    utils._generate_email = llm
+    for _ in range(2):
+        utils.generate_email_llama2("Acme  Corp", 0.825, 42_000, 12, use_case_id=None, campaign_id="wired")
+    wired = email_cache.campaign_stats("wired")
+    ok &= check(f"generate_email_llama2 uses the cache: {wired['hits']} hit, {llm.calls} LLM call",
+                wired["hits"] == 1 and llm.calls == 1)
+
+    prompts = []
+    utils._generate_email = lambda *args: prompts.append(args) or ("body", True)
+    email_cache.enabled = False
+    utils.generate_email_llama2("Acme  Corp", 0.825, 42_000, 12, campaign_id="disabled")
+    email_cache.enabled = True
+    ok &= check(f"Cache disabled: the LLM gets the raw values {prompts[0][1:4]}",
+                prompts == [("Acme  Corp", 0.825, 42_000, 12, None)])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Provision MongoDB indexes and verify the hot queries use them.
+
+Creates the indexes declared in app/database.py (INDEX_SPECS), runs
+explain() on every query shape in HOT_QUERIES and on the segment
+analytics pipeline, and exits with code 1 if any winning plan contains
+a COLLSCAN stage.
+
+Usage: python check_indexes.py
+"""
+import asyncio
+import sys
+
+from app.database import db, HOT_QUERIES, SEGMENT_ANALYTICS_PIPELINE
+
+
+def plan_stages(plan: dict) -> list:
+    """All stage names in an explain() plan tree"""
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def winning_plan_stages(explain) -> list:
+    """Stage names of every winning plan in an explain() result (find or aggregate)"""
+    stages = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                stages.extend(plan_stages(value))
+            else:
+                stages.extend(winning_plan_stages(value))
+    elif isinstance(explain, list):
+        for value in explain:
+            stages.extend(winning_plan_stages(value))
+    return stages
+
+
+def report(description: str, stages: list) -> bool:
+    if "COLLSCAN" in stages:
+        print(f"❌ {description}: {' ← '.join(stages)}")
+        return False
+    print(f"✅ {description}: {' ← '.join(stages)}")
+    return True
+
+
+async def check_indexes() -> bool:
+    print("=" * 60)
+    print("  MONGODB INDEX & QUERY PLAN CHECK")
+    print("=" * 60)
+
+    db.connect()
+    await db.ensure_indexes()
+
+    ok = True
+    print()
+    for collection, query, description in HOT_QUERIES:
+        explain = await db.db[collection].find(query).explain()
+        ok = report(f"{description} ({collection}.find({query}))", winning_plan_stages(explain)) and ok
+
+    explain = await db.db.command("aggregate", "leads", pipeline=SEGMENT_ANALYTICS_PIPELINE, explain=True)
+    ok = report("segment analytics pipeline", winning_plan_stages(explain)) and ok
+
+    db.close()
+    return ok
+
+
+def main():
+    try:
+        ok = asyncio.run(check_indexes())
+    except Exception as e:
+        print(f"\n❌ MongoDB Error: {e}")
+        return 1
+    print("\n✅ All hot queries use an index" if ok else "\n❌ Some hot queries scan the whole collection")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
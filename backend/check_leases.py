@@ -0,0 +1,217 @@
+"""
+Multi-process check of lease-based job and campaign coordination.
+
+Starts WORKERS separate processes against one shared store, as
+`uvicorn --workers N` or dedicated worker processes would run:
+- job lease: every worker fires the same job at once; it must run once,
+  and a late trigger after it finished must not run it again
+- campaign split: every worker runs the executor over the same due
+  campaigns; each recipient must be sent exactly once and the
+  campaigns must spread over more than one worker
+- failover: the worker sending a campaign is killed (SIGKILL) part-way;
+  another worker is refused while the lease is live, then takes the
+  campaign over once it expires and drains it. Duplicates are limited to
+  the one batch the killed worker had claimed but not checkpointed.
+
+Runs on a temporary SQLite file by default; STORAGE_BACKEND=mongo uses
+BENCHMARK_DB_NAME on MONGO_URL instead.
+
+Usage: python check_leases.py [workers]   (default: 4)
+"""
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Must be set before app modules create the global database; spawned workers inherit them
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "leases.sqlite3"))
+os.environ["DB_NAME"] = os.getenv("BENCHMARK_DB_NAME", "ai_sales_benchmark")
+os.environ.setdefault("LEASE_TTL_SECONDS", "2")
+os.environ.setdefault("JOB_LEASE_LINGER_SECONDS", "5")
+
+from app.campaign_executor import CAMPAIGN_BATCH_SIZE, CampaignExecutor
+from app.database import db
+from app.leases import LEASE_TTL_SECONDS, WORKER_ID, run_exclusive
+from app.read_cache import lead_cache
+
+WORKERS = 4
+CAMPAIGNS = 8
+RECIPIENTS_PER_CAMPAIGN = 500
+FAILOVER_RECIPIENTS = 300
+FAILOVER_THROTTLE = 1200  # emails per minute
+UNTHROTTLED = 60_000_000
+
+
+class FileSender:
+    """Simulated send_sales_email appending each recipient to a per-process log, which survives a kill"""
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.file = open(path, "a")
+
+    def __call__(self, customer_email: str, **kwargs) -> dict:
+        with self.lock:
+            self.file.write(customer_email + "\n")
+            self.file.flush()
+        return {"success": True}
+
+
+def read_sends(directory: str) -> Counter:
+    sent = Counter()
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name)) as log:
+            sent.update(line.strip() for line in log if line.strip())
+    return sent
+
+
+async def with_db(coro_fn, *args):
+    lead_cache.enabled = False
+    db.connect()
+    try:
+        return await coro_fn(*args)
+    finally:
+        db.close()
+
+
+async def job_worker(start_at: float) -> bool:
+    async def job():
+        await asyncio.sleep(0.5)
+        return True
+
+    await asyncio.sleep(max(0, start_at - time.time()))
+    return bool(await run_exclusive("job:lease_check", job))
+
+
+async def campaign_worker(campaign_ids: list, log_dir: str) -> int:
+    campaigns = {str(c["_id"]): c for c in await db.get_all_campaigns()}
+    executor = CampaignExecutor(sender=FileSender(os.path.join(log_dir, f"{os.getpid()}.log")))
+    try:
+        results = await asyncio.gather(*executor.submit([campaigns[campaign_id] for campaign_id in campaign_ids]))
+    finally:
+        await executor.shutdown()
+    return sum(results)
+
+
+def run_worker(kind: str, args: tuple, results):
+    """Entry point of a spawned worker process; its own output is silenced"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == "job":
+            result = asyncio.run(with_db(job_worker, *args))
+        else:
+            result = asyncio.run(with_db(campaign_worker, *args))
+    results.put((WORKER_ID, result))
+
+
+def start(context, kind: str, args: tuple, results):
+    process = context.Process(target=run_worker, args=(kind, args, results))
+    process.start()
+    return process
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+async def create_campaigns(prefix: str, count: int, recipients: int, throttle_rate: int) -> list:
+    ids = []
+    for c in range(count):
+        emails = [f"{prefix}{c}-{i}@example.com" for i in range(recipients)]
+        await db.save_leads_bulk([{"email": email, "company_name": f"{prefix} {c}"} for email in emails])
+        campaign = await db.save_campaign({
+            "name": f"{prefix} {c}", "campaign_type": "Upsell", "status": "scheduled",
+            "throttle_rate": throttle_rate, "emails_sent": 0
+        })
+        await db.enqueue_deliveries(campaign["_id"], emails)
+        ids.append(str(campaign["_id"]))
+    return ids
+
+
+def collect(processes: list, results) -> list:
+    for process in processes:
+        process.join()
+    return [results.get() for _ in processes]
+
+
+def check_job_lease(context, workers: int) -> bool:
+    results = context.Queue()
+    processes = [start(context, "job", (time.time() + 3,), results) for _ in range(workers)]
+    ran = [result for _, result in collect(processes, results)]
+    ok = check(f"Job fired in {workers} workers at once: ran in {sum(ran)}", sum(ran) == 1)
+    late = collect([start(context, "job", (0,), results)], results)
+    ok &= check("Late trigger within the linger period: skipped", not late[0][1])
+    return ok
+
+
+def check_campaign_split(context, workers: int, campaign_ids: list) -> bool:
+    results = context.Queue()
+    log_dir = tempfile.mkdtemp()
+    processes = [start(context, "campaigns", (campaign_ids, log_dir), results) for _ in range(workers)]
+    sent_by_worker = dict(collect(processes, results))
+    sent = read_sends(log_dir)
+    expected = CAMPAIGNS * RECIPIENTS_PER_CAMPAIGN
+    duplicates = sum(count - 1 for count in sent.values())
+    busy = [count for count in sent_by_worker.values() if count]
+    print(f"📊 Sends per worker: {sorted(sent_by_worker.values(), reverse=True)}")
+    ok = check(f"Every recipient sent ({len(sent):,}/{expected:,}), {duplicates} duplicates",
+               len(sent) == expected and duplicates == 0)
+    ok &= check(f"Campaigns spread over {len(busy)} of {workers} workers", len(busy) > 1)
+    return ok
+
+
+def check_failover(context, campaign_id: str) -> bool:
+    results = context.Queue()
+    log_dir = tempfile.mkdtemp()
+    first = start(context, "campaigns", ([campaign_id], log_dir), results)
+    while sum(read_sends(log_dir).values()) < FAILOVER_RECIPIENTS // 3:
+        time.sleep(0.05)
+    first.kill()
+    first.join()
+    killed_at = sum(read_sends(log_dir).values())
+    print(f"💥 Killed the sending worker after {killed_at} sends")
+
+    # The lease is still live: a second worker must not start sending
+    refused = collect([start(context, "campaigns", ([campaign_id], log_dir), results)], results)
+    ok = check("Second worker refused while the lease is live", refused[0][1] == 0
+               and sum(read_sends(log_dir).values()) == killed_at)
+
+    time.sleep(LEASE_TTL_SECONDS)
+    collect([start(context, "campaigns", ([campaign_id], log_dir), results)], results)
+    sent = read_sends(log_dir)
+    duplicates = sum(count - 1 for count in sent.values())
+    ok &= check(f"Taken over after lease expiry: {len(sent)}/{FAILOVER_RECIPIENTS} delivered",
+                len(sent) == FAILOVER_RECIPIENTS)
+    ok &= check(f"{duplicates} duplicate sends, at most the {CAMPAIGN_BATCH_SIZE} claimed when killed",
+                duplicates <= CAMPAIGN_BATCH_SIZE)
+    return ok
+
+
+async def setup() -> tuple:
+    await db.ensure_indexes()
+    split_ids = await create_campaigns("split", CAMPAIGNS, RECIPIENTS_PER_CAMPAIGN, UNTHROTTLED)
+    failover_id = (await create_campaigns("failover", 1, FAILOVER_RECIPIENTS, FAILOVER_THROTTLE))[0]
+    return split_ids, failover_id
+
+
+def main() -> int:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    print("=" * 60)
+    print(f"  LEASE COORDINATION ({workers} worker processes, {type(db).__name__})")
+    print("=" * 60)
+    split_ids, failover_id = asyncio.run(with_db(setup))
+    context = multiprocessing.get_context("spawn")
+    ok = check_job_lease(context, workers)
+    ok &= check_campaign_split(context, workers, split_ids)
+    ok &= check_failover(context, failover_id)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
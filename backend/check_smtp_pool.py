@@ -0,0 +1,182 @@
+"""
+Exercise SMTPConnectionPool against a local aiosmtpd server and compare
+throughput with the previous one-session-per-message sending.
+
+Checks:
+- messages/sec: new session + AUTH per message vs pooled sessions
+- 421 replies: the server answers DATA, then RCPT, with 421 every
+  FAULT_EVERY messages; every message must still be delivered exactly once
+- retirement: sessions QUIT after max_messages
+- keep-alive: a session the server dropped while idle is detected with
+  NOOP and replaced
+
+STARTTLS is off because the stand-in server has no certificate; against
+a real relay the handshake saved per message also includes TLS.
+
+Requires aiosmtpd (pip install aiosmtpd); it is a test tool, not an app dependency.
+Usage: python check_smtp_pool.py [num_messages]   (default: 500)
+"""
+import logging
+import smtplib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from app.smtp_pool import SMTPConnectionPool
+
+HOST = "127.0.0.1"
+PORT = 8025
+USER = "campaigns@example.com"
+PASSWORD = "secret"
+NUM_MESSAGES = 500
+THREADS = 8
+FAULT_EVERY = 50
+# Seconds the server keeps an idle session open
+SERVER_IDLE_TIMEOUT = 1
+
+
+class CountingHandler:
+    """Accepts every message; optionally answers 421 to every `fault_every`-th DATA or RCPT"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fault_every = 0
+        self.rcpt_fault_every = 0
+        self.data_commands = 0
+        self.rcpt_commands = 0
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        with self.lock:
+            self.rcpt_commands += 1
+            if self.rcpt_fault_every and self.rcpt_commands % self.rcpt_fault_every == 0:
+                return "421 Service not available, closing transmission channel"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            self.data_commands += 1
+            if self.fault_every and self.data_commands % self.fault_every == 0:
+                return "421 Service not available, closing transmission channel"
+            self.delivered.append(envelope.rcpt_tos[0])
+        return "250 OK"
+
+    def reset(self, fault_every: int = 0, rcpt_fault_every: int = 0):
+        with self.lock:
+            self.fault_every = fault_every
+            self.rcpt_fault_every = rcpt_fault_every
+            self.data_commands = 0
+            self.rcpt_commands = 0
+            self.delivered = []
+
+
+def authenticate(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login.decode() == USER and auth_data.password.decode() == PASSWORD)
+
+
+def make_message(i: int) -> MIMEText:
+    message = MIMEText(f"Hello from message {i}", "plain")
+    message["From"] = USER
+    message["To"] = f"lead{i}@example.com"
+    message["Subject"] = "Exclusive Upsell Opportunity"
+    return message
+
+
+def send_unpooled(message):
+    """The previous send_sales_email: one session per message"""
+    with smtplib.SMTP(HOST, PORT) as server:
+        server.login(USER, PASSWORD)
+        server.send_message(message)
+
+
+def new_pool(**kwargs) -> SMTPConnectionPool:
+    return SMTPConnectionPool(HOST, PORT, USER, PASSWORD, starttls=False, size=THREADS, **kwargs)
+
+
+def send_all(send, n: int) -> float:
+    messages = [make_message(i) for i in range(n)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(send, messages))
+    return time.perf_counter() - start
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def main():
+    # aiosmtpd logs every session (and a deprecation warning per AUTH)
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_MESSAGES
+    handler = CountingHandler()
+    controller = Controller(
+        handler, hostname=HOST, port=PORT, authenticator=authenticate, auth_require_tls=False,
+        server_kwargs={"timeout": SERVER_IDLE_TIMEOUT}
+    )
+    controller.start()
+
+    print("=" * 60)
+    print(f"  SMTP CONNECTION POOL ({n} messages, {THREADS} threads)")
+    print("=" * 60)
+    ok = True
+    try:
+        unpooled_time = send_all(send_unpooled, n)
+        ok &= check(f"Unpooled delivered {len(handler.delivered)}/{n}", len(handler.delivered) == n)
+
+        handler.reset()
+        pool = new_pool()
+        pooled_time = send_all(pool.send, n)
+        pool.close()
+        ok &= check(f"Pooled delivered {len(handler.delivered)}/{n} over {pool.stats()['opened']} sessions",
+                    len(handler.delivered) == n)
+        print(f"⏱️  session per message: {n / unpooled_time:8.0f} msg/s")
+        print(f"⏱️  pooled sessions:     {n / pooled_time:8.0f} msg/s  x{unpooled_time / pooled_time:.1f}")
+
+        handler.reset(fault_every=FAULT_EVERY)
+        pool = new_pool()
+        send_all(pool.send, n)
+        pool.close()
+        ok &= check(f"421 every {FAULT_EVERY} messages: delivered {len(handler.delivered)}/{n}, "
+                    f"{pool.stats()['reconnects']} reconnects",
+                    sorted(handler.delivered) == sorted(f"lead{i}@example.com" for i in range(n)))
+
+        handler.reset(rcpt_fault_every=FAULT_EVERY)
+        pool = new_pool()
+        send_all(pool.send, n)
+        pool.close()
+        ok &= check(f"421 at RCPT every {FAULT_EVERY} messages: delivered {len(handler.delivered)}/{n}, "
+                    f"{pool.stats()['reconnects']} reconnects",
+                    sorted(handler.delivered) == sorted(f"lead{i}@example.com" for i in range(n))
+                    and pool.stats()["reconnects"] >= n // FAULT_EVERY)
+
+        handler.reset()
+        pool = new_pool(max_messages=20)
+        send_all(pool.send, n)
+        pool.close()
+        ok &= check(f"Retirement after 20 messages: {pool.stats()['retired']} sessions retired",
+                    pool.stats()["retired"] >= n // 20 - THREADS and len(handler.delivered) == n)
+
+        handler.reset()
+        pool = new_pool(keepalive=SERVER_IDLE_TIMEOUT / 2)
+        pool.send(make_message(0))
+        time.sleep(SERVER_IDLE_TIMEOUT * 1.5)
+        pool.send(make_message(1))
+        pool.close()
+        stats = pool.stats()
+        ok &= check(f"Idle session dropped by the server: {stats['noops']} NOOP, {stats['opened']} sessions opened",
+                    stats["noops"] == 1 and stats["opened"] == 2 and len(handler.delivered) == 2)
+    finally:
+        controller.stop()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
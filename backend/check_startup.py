@@ -0,0 +1,71 @@
+"""
+Import-time budget check for the FastAPI app.
+
+Imports app.main in fresh interpreters and fails (exit code 1) if the best
+import time exceeds the budget, or if heavy stacks that should load lazily
+(pandas, scikit-learn, Salesforce, APScheduler, requests) are imported.
+
+Usage: python check_startup.py [budget_seconds]
+"""
+import os
+import subprocess
+import sys
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))
+RUNS = 3
+
+# Modules that must not be imported by `import app.main`
+LAZY_MODULES = ["pandas", "sklearn", "joblib", "simple_salesforce", "apscheduler", "requests"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+loaded = [m for m in {modules!r} if m in sys.modules]
+print(elapsed)
+print(",".join(loaded))
+"""
+
+
+def measure_import():
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(modules=LAZY_MODULES)],
+        cwd=backend_dir, capture_output=True, text=True, check=True
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed), [m for m in loaded.split(",") if m]
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else STARTUP_BUDGET_SECONDS
+
+    print("=" * 60)
+    print("  STARTUP IMPORT-TIME CHECK")
+    print("=" * 60)
+
+    timings = []
+    eager = []
+    for _ in range(RUNS):
+        elapsed, eager = measure_import()
+        timings.append(elapsed)
+
+    best = min(timings)
+    print(f"\n⏱️  import app.main: best {best:.3f}s over {RUNS} runs (budget {budget:.2f}s)")
+
+    ok = True
+    if best > budget:
+        print("❌ Import time is over budget")
+        ok = False
+    if eager:
+        print(f"❌ Heavy modules imported eagerly: {', '.join(eager)}")
+        ok = False
+
+    if ok:
+        print("✅ Startup within budget")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
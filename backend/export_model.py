@@ -0,0 +1,78 @@
+"""
+Export app/lead_scoring_model.pkl into the NumPy scoring kernel format.
+
+The serving process loads app/lead_scoring_model.npz with NumPy only.
+Before writing, the kernel is checked against scikit-learn's predict_proba
+on every row of data/scored_leads.csv; the export is refused if any
+probability differs by more than PARITY_TOLERANCE.
+
+Usage: python export_model.py
+"""
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.model import MODEL_PATH, KERNEL_PATH
+from app.scoring_kernel import export_model, load_kernel
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARITY_DATA_PATH = os.path.join(BASE_DIR, "data", "scored_leads.csv")
+
+# Max absolute difference allowed between kernel and sklearn probabilities
+PARITY_TOLERANCE = 1e-9
+
+FEATURES = ["quote_value", "item_count", "conversion_days"]
+
+
+def check_parity(estimator, kernel) -> float:
+    """Return the max absolute probability difference on the parity dataset."""
+    df = pd.read_csv(PARITY_DATA_PATH)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+
+    expected = estimator.predict_proba(X)
+    actual = kernel.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+
+    # scored_leads.csv stores lead_score rounded to 2 decimals (percent)
+    stored_diff = float(np.abs(actual[:, 1] * 100 - df["lead_score"].to_numpy()).max())
+
+    print(f"   Rows checked: {len(X)}")
+    print(f"   Max |kernel - sklearn| probability: {max_diff:.3e}")
+    print(f"   Max |kernel - stored lead_score|: {stored_diff:.4f} points")
+    return max_diff
+
+
+def main():
+    print(f"🔄 Loading estimator from {MODEL_PATH}")
+    estimator = joblib.load(MODEL_PATH)
+    print(f"   Estimator: {type(estimator).__name__}")
+
+    # Export to a temp file first so a failed parity check never replaces the kernel
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(KERNEL_PATH))
+    os.close(fd)
+    try:
+        export_model(estimator, tmp_path)
+        kernel = load_kernel(tmp_path)
+
+        print("🧮 Checking parity against scored_leads.csv...")
+        max_diff = check_parity(estimator, kernel)
+        if max_diff > PARITY_TOLERANCE:
+            print(f"❌ Parity check failed (tolerance {PARITY_TOLERANCE:.0e}); kernel not written")
+            return 1
+
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, KERNEL_PATH)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    print(f"✅ Kernel written to {KERNEL_PATH} ({os.path.getsize(KERNEL_PATH)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.segmentation import enrich_lead_data
+from app.segmentation import enrich_leads_batch
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,20 +35,28 @@ async def recalculate_all_scores():
     updated_count = 0
     errors = []
     
-    for idx, lead in enumerate(leads, 1):
+    # Keep ObjectIds aside so the records can be enriched as plain dicts
+    lead_ids = {id(lead): lead.pop('_id') for lead in leads}
+    
+    # Enrich all leads in one vectorized pass (this will calculate lead_score)
+    enriched_leads, failed = enrich_leads_batch(leads)
+    for lead, error in failed:
+        error_msg = f"Error processing lead {lead.get('company_name', 'N/A')}: {error}"
+        errors.append(error_msg)
+        print(f"❌ {error_msg}")
+    
+    scored = len(enriched_leads)
+    for idx, enriched in enumerate(enriched_leads, 1):
         try:
-            # Convert ObjectId to string for processing
-            lead_id = lead.pop('_id')
-            
-            # Enrich lead data (this will calculate lead_score)
-            enriched = enrich_lead_data(lead)
+            lead_id = lead_ids[id(enriched)]
             
             # Update in database
             result = await db["leads"].update_one(
                 {"_id": lead_id},
                 {"$set": {
                     "lead_score": enriched.get("lead_score", 0),
-                    "conversion_probability": enriched.get("conversion_probability", 0)
+                    "conversion_probability": enriched.get("conversion_probability", 0),
+                    "model_version": enriched.get("model_version")
                 }}
             )
             
@@ -56,8 +64,8 @@ async def recalculate_all_scores():
                 updated_count += 1
             
             # Print progress
-            if idx % 50 == 0 or idx == total:
-                print(f"⏳ Progress: {idx}/{total} leads processed ({updated_count} updated)")
+            if idx % 50 == 0 or idx == scored:
+                print(f"⏳ Progress: {idx}/{scored} leads processed ({updated_count} updated)")
                 if enriched.get("lead_score"):
                     print(f"   Last: {enriched.get('company_name', 'N/A')} - Score: {enriched['lead_score']:.1f}%")
         